@@ -65,6 +65,7 @@ const ChatInterface = () => {
             const decoder = new TextDecoder();
             let aiMsgId = uuidv4();
             let aiContent = '';
+            let draft = ''; // Tokens of the node currently generating
 
             // Add placeholder AI message
             setMessages(prev => [...prev, {
@@ -87,7 +88,13 @@ const ChatInterface = () => {
                     if (line.trim()) {
                         try {
                             const data = JSON.parse(line);
-                            if (data.response) {
+                            if (data.type === 'delta') {
+                                draft += data.content; // Show tokens as they stream in
+                                setMessages(prev => prev.map(m =>
+                                    m.id === aiMsgId ? { ...m, content: aiContent + draft } : m
+                                ));
+                            } else if (data.response) {
+                                draft = ''; // Final text replaces the streamed draft
                                 aiContent += data.response; // Accumulate content
                                 // Update the specific AI message
                                 setMessages(prev => prev.map(m =>
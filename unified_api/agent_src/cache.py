@@ -0,0 +1,460 @@
+# src/cache.py
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, List, Dict, Tuple
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+
+from .metrics import CACHE_REQUESTS
+
+from .config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MODE,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_SIMILARITY,
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_BACKEND,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_SQLITE_PATH,
+    redis_client,
+    redis_async_client,
+)
+
+logger = logging.getLogger("agent.cache")
+
+
+# ==================== IN-PROCESS LRU ====================
+
+class LRUCache:
+    """Small in-process LRU where every entry also expires after `ttl` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# ==================== SHARED BACKENDS ====================
+# All expose async aget/aset; the synchronous ones run in a worker thread.
+
+class RedisBackend:
+    def __init__(self, client, prefix: str = "search_cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self.client.setex(self.prefix + key, int(ttl), value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str, ttl: float) -> None:
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+
+class AsyncRedisBackend:
+    """Same keys as RedisBackend, on the shared redis.asyncio pool."""
+
+    def __init__(self, client, prefix: str = "search_cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await self.client.get(self.prefix + key)
+
+    async def aset(self, key: str, value: str, ttl: float) -> None:
+        await self.client.setex(self.prefix + key, int(ttl), value)
+
+
+class SqliteBackend:
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl)
+            )
+            # Drop expired rows, then the soonest-to-expire ones beyond the size limit
+            self._conn.execute("DELETE FROM search_cache WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE key NOT IN "
+                "(SELECT key FROM search_cache ORDER BY expires_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str, ttl: float) -> None:
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+
+# ==================== SEARCH CACHE ====================
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and whitespace don't change what Tavily returns."""
+    return _SPACES.sub(" ", _PUNCT.sub(" ", query.lower())).strip()
+
+
+_AMOUNT = re.compile(r"(\d+(?:[.,]\d+)*)(?:\s*([km])(?![a-z]))?", re.IGNORECASE)
+_MULTIPLIERS = {"k": 1e3, "m": 1e6}
+
+
+def budget_bucket(budget: Optional[str]) -> str:
+    """"5k-10k", "$20,000", "1.5M" → micro | small | medium | large (by the top of the range); unknown if no amount."""
+    amounts = [
+        float(number.replace(",", "")) * _MULTIPLIERS.get(unit.lower(), 1)
+        for number, unit in _AMOUNT.findall(budget or "")
+        if number.replace(",", "").replace(".", "", 1).isdigit()
+    ]
+    if not amounts:
+        return "unknown"
+    top = max(amounts)
+    if top <= 1_000:
+        return "micro"
+    if top <= 10_000:
+        return "small"
+    if top <= 50_000:
+        return "medium"
+    return "large"
+
+
+class SearchCache:
+    """
+    Two-tier cache for search results: an in-process LRU in front of an optional
+    shared backend (Redis / SQLite) so sessions on other workers benefit too.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, backend=None, enabled: bool = True):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.backend = backend
+        self.local = LRUCache(max_entries, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, max_results: Optional[int]) -> str:
+        digest = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"{max_results or 'default'}:{digest}"
+
+    async def get(self, query: str, max_results: Optional[int]) -> Optional[List[Dict]]:
+        if not self.enabled:
+            return None
+        key = self.key(query, max_results)
+
+        results = self.local.get(key)
+        if results is None and self.backend is not None:
+            try:
+                raw = await self.backend.aget(key)
+                if raw:
+                    results = json.loads(raw)
+                    self.local.set(key, results)
+            except Exception as e:
+                logger.error(f"Search cache backend read failed: {e}")
+
+        if results is None:
+            self.misses += 1
+            CACHE_REQUESTS.labels(cache="search", result="miss").inc()
+            return None
+        self.hits += 1
+        CACHE_REQUESTS.labels(cache="search", result="hit").inc()
+        return results
+
+    async def set(self, query: str, max_results: Optional[int], results: List[Dict]) -> None:
+        if not self.enabled or not results:
+            return
+        key = self.key(query, max_results)
+        self.local.set(key, results)
+        if self.backend is not None:
+            try:
+                await self.backend.aset(key, json.dumps(results), self.ttl)
+            except Exception as e:
+                logger.error(f"Search cache backend write failed: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__ if self.backend else "memory",
+            "entries": len(self.local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+def build_search_cache() -> SearchCache:
+    backend = None
+    if SEARCH_CACHE_BACKEND == "redis":
+        if redis_async_client is not None:
+            backend = AsyncRedisBackend(redis_async_client)
+        elif redis_client is not None:
+            backend = RedisBackend(redis_client)
+        else:
+            logger.warning("SEARCH_CACHE_BACKEND=redis but Redis is unavailable — using in-memory cache only")
+    elif SEARCH_CACHE_BACKEND == "sqlite":
+        backend = SqliteBackend(SEARCH_CACHE_SQLITE_PATH, SEARCH_CACHE_MAX_ENTRIES)
+
+    return SearchCache(
+        max_entries=SEARCH_CACHE_MAX_ENTRIES,
+        ttl=SEARCH_CACHE_TTL,
+        backend=backend,
+        enabled=SEARCH_CACHE_ENABLED,
+    )
+
+
+search_cache = build_search_cache()
+
+
+# ==================== LLM RESPONSE CACHE ====================
+
+_WORDS = re.compile(r"\w+")
+
+
+def hashed_embedding(text: str, dims: int = 1024) -> Dict[int, float]:
+    """Cheap local embedding: hashed unigrams + bigrams, L2-normalised, stored sparse."""
+    words = _WORDS.findall(text.lower())
+    vec: Dict[int, float] = {}
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        idx = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "little") % dims
+        vec[idx] = vec.get(idx, 0.0) + 1.0
+    norm = sum(v * v for v in vec.values()) ** 0.5 or 1.0
+    return {i: v / norm for i, v in vec.items()}
+
+
+def split_prompt(prompt: str) -> Tuple[str, str]:
+    """
+    (fixed, variable) text of a serialized chat prompt: the system messages, and the rest.
+    The shared system prompt would dominate an embedding of the whole thing — prompts for
+    different products would look alike — so only the variable part is embedded.
+    """
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return "", prompt
+    if not isinstance(messages, list):
+        return "", prompt
+    fixed, variable = [], []
+    for message in messages:
+        kwargs = message.get("kwargs", {}) if isinstance(message, dict) else {}
+        content = kwargs.get("content", "")
+        if not isinstance(content, str):
+            content = json.dumps(content, sort_keys=True)
+        (fixed if kwargs.get("type") == "system" else variable).append(content)
+    return "\n".join(fixed), "\n".join(variable)
+
+
+# Prompt lines whose value changes the answer however alike the rest reads
+_PROFILE_LINE = re.compile(r"^[ \t]*(geography|budget(?: range)?):[ \t]*(.*)$", re.IGNORECASE | re.MULTILINE)
+
+
+def profile_partition(text: str) -> str:
+    """Geography and budget bucket stated in `text` — "France" and "Germany" never share an answer."""
+    parts = []
+    for field, value in _PROFILE_LINE.findall(text):
+        parts.append(budget_bucket(value) if field.lower().startswith("budget") else normalize_query(value))
+    return "\x00".join(parts)
+
+
+def _cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(i, 0.0) for i, v in a.items())
+
+
+class LocalVectorIndex:
+    """Brute-force nearest-neighbour index over sparse vectors, partitioned by model settings, system prompt and profile."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (llm_string, vector)
+
+    def add(self, key: str, partition: str, vector: Dict[int, float]) -> None:
+        self._entries[key] = (partition, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def nearest(self, partition: str, vector: Dict[int, float]) -> tuple:
+        best_key, best_score = None, 0.0
+        for key, (entry_partition, entry_vec) in self._entries.items():
+            if entry_partition != partition:
+                continue
+            score = _cosine(vector, entry_vec)
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain cache for chat generations. Keys are the serialized prompt plus the
+    model's llm_string (model name, temperature, stop...), so a different model or
+    temperature never shares entries. With `similarity_threshold` set, a miss falls
+    back to the most similar cached prompt for the same model settings and system
+    prompt (i.e. the same chain) and the same geography and budget bucket, comparing
+    only the human / history messages.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        enabled: bool = True,
+        similarity_threshold: Optional[float] = None,
+        embed_fn: Callable[[str], Dict[int, float]] = hashed_embedding,
+    ):
+        self.enabled = enabled
+        self.local = LRUCache(max_entries, ttl)
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self.index = LocalVectorIndex(max_entries) if similarity_threshold else None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _semantic_key(self, prompt: str, llm_string: str) -> tuple:
+        """(partition, vector) for the similarity index."""
+        fixed, variable = split_prompt(prompt)
+        raw = f"{llm_string}\x00{fixed}\x00{profile_partition(variable)}"
+        partition = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        return partition, self.embed_fn(variable)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        value = self.local.get(key)
+        if value is not None:
+            self.hits += 1
+            CACHE_REQUESTS.labels(cache="llm", result="hit").inc()
+            return value
+
+        if self.index is not None:
+            near_key, score = self.index.nearest(*self._semantic_key(prompt, llm_string))
+            if near_key is not None and score >= self.similarity_threshold:
+                value = self.local.get(near_key)
+                if value is not None:
+                    self.semantic_hits += 1
+                    CACHE_REQUESTS.labels(cache="llm", result="semantic_hit").inc()
+                    return value
+                self.index.remove(near_key)  # evicted / expired from the LRU
+
+        self.misses += 1
+        CACHE_REQUESTS.labels(cache="llm", result="miss").inc()
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        self.local.set(key, return_val)
+        if self.index is not None:
+            self.index.add(key, *self._semantic_key(prompt, llm_string))
+
+    def clear(self, **kwargs: Any) -> None:
+        self.local.clear()
+        if self.index is not None:
+            self.index.clear()
+
+    # In-memory only — no need for the default executor hop
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear(**kwargs)
+
+    def stats(self) -> dict:
+        total = self.hits + self.semantic_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "mode": "semantic" if self.index is not None else "exact",
+            "entries": len(self.local),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.semantic_hits) / total, 3) if total else 0.0,
+        }
+
+
+llm_cache = LLMResponseCache(
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+    ttl=LLM_CACHE_TTL,
+    enabled=LLM_CACHE_ENABLED,
+    similarity_threshold=LLM_CACHE_SIMILARITY if LLM_CACHE_MODE == "semantic" else None,
+)
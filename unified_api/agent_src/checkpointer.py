@@ -0,0 +1,281 @@
+# src/checkpointer.py
+import time
+import asyncio
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.redis import RedisSaver
+from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+
+from .serde import pack_json_value, is_packed, unpack_json_value
+
+logger = logging.getLogger("agent.checkpointer")
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    MemorySaver that can't grow forever:
+    - keeps only the latest `max_checkpoints_per_thread` checkpoints of each thread
+      (plus the channel blobs and pending writes they still reference)
+    - evicts the least recently used thread once `max_sessions` is exceeded
+    - evicts threads idle for longer than `idle_ttl` seconds
+    """
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = 1000,
+        idle_ttl: float = 2 * 60 * 60,
+        max_checkpoints_per_thread: int = 3,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+        self.evicted_sessions = 0
+
+        self._last_used: "OrderedDict[str, float]" = OrderedDict()  # thread_id -> monotonic, LRU first
+        self._blob_keys = defaultdict(set)     # thread_id -> keys into self.blobs
+        self._write_keys = defaultdict(set)    # thread_id -> keys into self.writes
+        self._versions = {}                    # (thread_id, ns, checkpoint_id) -> channel_versions
+
+    # ── bookkeeping ──────────────────────────────────────────
+    def _touch(self, thread_id: str) -> None:
+        self._last_used[thread_id] = time.monotonic()
+        self._last_used.move_to_end(thread_id)
+
+    def _trim_thread(self, thread_id: str, checkpoint_ns: str) -> None:
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_checkpoints_per_thread:
+            return
+
+        # Checkpoint ids are time-ordered, so the oldest sort first
+        for checkpoint_id in sorted(checkpoints)[:-self.max_checkpoints_per_thread]:
+            del checkpoints[checkpoint_id]
+            self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            write_key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(write_key, None)
+            self._write_keys[thread_id].discard(write_key)
+
+        # Blobs are shared between checkpoints — drop only the ones nobody references anymore
+        referenced = set()
+        for checkpoint_id in checkpoints:
+            versions = self._versions.get((thread_id, checkpoint_ns, checkpoint_id))
+            if versions is None:
+                versions = self.serde.loads_typed(checkpoints[checkpoint_id][0])["channel_versions"]
+            referenced.update((thread_id, checkpoint_ns, ch, v) for ch, v in versions.items())
+
+        for key in [k for k in self._blob_keys[thread_id] if k[1] == checkpoint_ns and k not in referenced]:
+            self.blobs.pop(key, None)
+            self._blob_keys[thread_id].discard(key)
+
+    def _evict(self) -> None:
+        while len(self._last_used) > self.max_sessions:
+            thread_id, _ = self._last_used.popitem(last=False)
+            self.delete_thread(thread_id)
+            self.evicted_sessions += 1
+
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._last_used:
+            thread_id, last_used = next(iter(self._last_used.items()))
+            if last_used >= cutoff:
+                break
+            self.delete_thread(thread_id)
+            self.evicted_sessions += 1
+
+    # ── saver API ────────────────────────────────────────────
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id not in self._last_used:
+            # Don't let lookups of unknown/evicted threads leave empty entries behind
+            return None
+        self._touch(thread_id)
+        return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+
+        self._versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+        self._blob_keys[thread_id].update((thread_id, checkpoint_ns, k, v) for k, v in new_versions.items())
+        self._touch(thread_id)
+        self._trim_thread(thread_id, checkpoint_ns)
+        self._evict()
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        super().put_writes(config, writes, task_id, task_path)
+        thread_id = config["configurable"]["thread_id"]
+        self._write_keys[thread_id].add(
+            (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+        )
+        self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        # Indexed version of MemorySaver.delete_thread, which scans every stored key
+        self.storage.pop(thread_id, None)
+        for key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        for key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        for key in [k for k in self._versions if k[0] == thread_id]:
+            del self._versions[key]
+        self._last_used.pop(thread_id, None)
+
+    # ── gauges ───────────────────────────────────────────────
+    def stats(self) -> dict:
+        """Session / checkpoint counts and an estimate of the serialized bytes held."""
+        checkpoint_bytes = sum(
+            len(cp[1]) + len(meta[1])
+            for namespaces in self.storage.values()
+            for checkpoints in namespaces.values()
+            for cp, meta, _ in checkpoints.values()
+        )
+        blob_bytes = sum(len(blob[1]) for blob in self.blobs.values())
+        write_bytes = sum(
+            len(value[1]) for writes in self.writes.values() for _, _, value, _ in writes.values()
+        )
+        return {
+            "sessions": len(self._last_used),
+            "checkpoints": sum(len(c) for ns in self.storage.values() for c in ns.values()),
+            "blobs": len(self.blobs),
+            "evicted_sessions": self.evicted_sessions,
+            "bytes": checkpoint_bytes + blob_bytes + write_bytes,
+        }
+
+
+class CompactRedisMixin:
+    """
+    Compresses large channel values (report, guide, message list) inside the
+    checkpoint's RedisJSON document. The load paths of the Redis savers run
+    channel values through _recursive_deserialize, which unpacks them again;
+    the sync list() doesn't, so its tuples are unpacked here.
+    """
+
+    codec = None
+    compress_min_bytes = 1024
+
+    def _dump_checkpoint(self, checkpoint: Checkpoint) -> dict:
+        data = super()._dump_checkpoint(checkpoint)
+        if self.codec is not None and data.get("channel_values"):
+            data["channel_values"] = {
+                channel: pack_json_value(value, self.codec, self.compress_min_bytes)
+                for channel, value in data["channel_values"].items()
+            }
+        return data
+
+    def _recursive_deserialize(self, obj: Any) -> Any:
+        if is_packed(obj):
+            obj = unpack_json_value(obj)
+        return super()._recursive_deserialize(obj)
+
+    def _unpack_tuple(self, item: CheckpointTuple) -> CheckpointTuple:
+        values = item.checkpoint.get("channel_values") or {}
+        if not any(is_packed(v) for v in values.values()):
+            return item
+        unpacked = {k: self._recursive_deserialize(v) if is_packed(v) else v for k, v in values.items()}
+        return item._replace(checkpoint={**item.checkpoint, "channel_values": unpacked})
+
+    def list(self, *args, **kwargs):
+        # The sync RedisSaver.list (get_state_history) hands channel values over as stored
+        for item in super().list(*args, **kwargs):
+            yield self._unpack_tuple(item)
+
+
+class CompactRedisSaver(CompactRedisMixin, RedisSaver):
+    def __init__(self, *args, codec=None, compress_min_bytes: int = 1024, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.codec = codec
+        self.compress_min_bytes = compress_min_bytes
+
+
+class LazyAsyncRedisSaver(CompactRedisMixin, AsyncRedisSaver):
+    """
+    AsyncRedisSaver that creates its indexes on first use rather than at import,
+    so the app starts without Redis being reachable and setup runs on the serving loop.
+    If that first setup fails (Redis down), every call goes to `fallback` from then on —
+    the in-memory storage the sync path falls back to at import.
+    """
+
+    def __init__(self, *args, codec=None, compress_min_bytes: int = 1024,
+                 fallback: Optional[Callable[[], BaseCheckpointSaver]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.codec = codec
+        self.compress_min_bytes = compress_min_bytes
+        self.fallback_factory = fallback
+        self.fallback: Optional[BaseCheckpointSaver] = None
+        self._ready = False
+        self._setup_lock: Optional[asyncio.Lock] = None
+
+    async def _ensure_setup(self) -> Optional[BaseCheckpointSaver]:
+        """None once Redis is set up; the fallback saver if it couldn't be."""
+        if self._ready:
+            return self.fallback
+        if self._setup_lock is None:
+            self._setup_lock = asyncio.Lock()
+        async with self._setup_lock:
+            if not self._ready:
+                try:
+                    await self.asetup()
+                    logger.info("Async Redis checkpointer ready.")
+                except Exception as e:
+                    if self.fallback_factory is None:
+                        raise
+                    logger.warning(f"Redis checkpointer setup failed: {e} — falling back to in-memory session storage.")
+                    self.fallback = self.fallback_factory()
+                self._ready = True
+        return self.fallback
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        fallback = await self._ensure_setup()
+        if fallback is not None:
+            return await fallback.aget_tuple(config)
+        return await super().aget_tuple(config)
+
+    async def alist(self, *args, **kwargs):
+        fallback = await self._ensure_setup()
+        items = fallback.alist(*args, **kwargs) if fallback is not None else super().alist(*args, **kwargs)
+        async for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        fallback = await self._ensure_setup()
+        if fallback is not None:
+            return await fallback.aput(config, checkpoint, metadata, new_versions)
+        return await super().aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        fallback = await self._ensure_setup()
+        if fallback is not None:
+            return await fallback.aput_writes(config, writes, task_id, task_path)
+        return await super().aput_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        fallback = await self._ensure_setup()
+        if fallback is not None:
+            return await fallback.adelete_thread(thread_id)
+        return await super().adelete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        # Versions must come from the saver that stores them
+        if self.fallback is not None:
+            return self.fallback.get_next_version(current, channel)
+        return super().get_next_version(current, channel)
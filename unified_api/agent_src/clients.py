@@ -0,0 +1,193 @@
+# src/clients.py
+import asyncio
+import logging
+from typing import Any, Dict, NamedTuple
+
+import httpx
+from langchain_tavily._utilities import TAVILY_API_URL, TavilySearchAPIWrapper
+
+from .config import (
+    HTTP2_ENABLED,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_POOL_TIMEOUT,
+    GROQ_MAX_CONNECTIONS,
+    GROQ_MAX_CONCURRENCY,
+    GROQ_READ_TIMEOUT,
+    TAVILY_MAX_CONNECTIONS,
+    TAVILY_MAX_CONCURRENCY,
+    TAVILY_READ_TIMEOUT,
+)
+
+try:
+    import h2  # noqa: F401 — httpx only speaks HTTP/2 when it's installed
+    HTTP2 = HTTP2_ENABLED
+except ImportError:
+    HTTP2 = False
+
+logger = logging.getLogger("agent.clients")
+
+
+class ProviderLimits(NamedTuple):
+    max_connections: int
+    max_concurrency: int
+    read_timeout: float
+
+
+PROVIDERS: Dict[str, ProviderLimits] = {
+    "groq": ProviderLimits(GROQ_MAX_CONNECTIONS, GROQ_MAX_CONCURRENCY, GROQ_READ_TIMEOUT),
+    "tavily": ProviderLimits(TAVILY_MAX_CONNECTIONS, TAVILY_MAX_CONCURRENCY, TAVILY_READ_TIMEOUT),
+}
+
+
+def provider_timeout(provider: str) -> httpx.Timeout:
+    return httpx.Timeout(
+        PROVIDERS[provider].read_timeout, connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT
+    )
+
+
+def _limits(provider: str) -> httpx.Limits:
+    max_connections = PROVIDERS[provider].max_connections
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+# ==================== CONCURRENCY LIMIT ====================
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees its concurrency slot once read or closed — streamed LLM replies hold it until done."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class ConcurrencyLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Caps the requests a provider has in flight, whatever the protocol —
+    with HTTP/2 many requests share one connection, so the pool size alone doesn't.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_concurrency: int):
+        self.transport = transport
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = None
+        self._loop = None
+
+    def _slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._semaphore = loop, asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        slots = self._slots()
+        await slots.acquire()
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                slots.release()
+
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+# ==================== CLIENT FACTORY ====================
+
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_sync_clients: Dict[str, httpx.Client] = {}
+
+
+def async_client(provider: str) -> httpx.AsyncClient:
+    """The shared, pooled async client for `provider` ("groq" | "tavily"), created on first use."""
+    if provider not in _async_clients:
+        transport = httpx.AsyncHTTPTransport(http2=HTTP2, limits=_limits(provider))
+        _async_clients[provider] = httpx.AsyncClient(
+            transport=ConcurrencyLimitedTransport(transport, PROVIDERS[provider].max_concurrency),
+            timeout=provider_timeout(provider),
+        )
+        logger.info(f"HTTP client for {provider}: {PROVIDERS[provider]}, http2={HTTP2}")
+    return _async_clients[provider]
+
+
+def sync_client(provider: str) -> httpx.Client:
+    """Pooled blocking client for `provider` — for the odd sync call and tools like the Streamlit UI."""
+    if provider not in _sync_clients:
+        _sync_clients[provider] = httpx.Client(
+            http2=HTTP2, limits=_limits(provider), timeout=provider_timeout(provider)
+        )
+    return _sync_clients[provider]
+
+
+async def aclose_clients() -> None:
+    """Close every pooled connection (app shutdown)."""
+    for client in _async_clients.values():
+        await client.aclose()
+    for client in _sync_clients.values():
+        client.close()
+    _async_clients.clear()
+    _sync_clients.clear()
+
+
+def groq_client_kwargs() -> Dict[str, Any]:
+    """ChatGroq(...) arguments that route it through the shared pools."""
+    return {
+        "http_client": sync_client("groq"),
+        "http_async_client": async_client("groq"),
+        "timeout": provider_timeout("groq"),
+    }
+
+
+# ==================== TAVILY ====================
+
+class PooledTavilyAPIWrapper(TavilySearchAPIWrapper):
+    """
+    TavilySearchAPIWrapper on the shared clients. The stock wrapper opens a new
+    aiohttp session — TCP + TLS handshake — for every async search.
+    """
+
+    def _request(self, query: str, params: Dict[str, Any]) -> tuple:
+        payload = {"query": query, **{k: v for k, v in params.items() if v is not None}}
+        headers = {
+            "Authorization": f"Bearer {self.tavily_api_key.get_secret_value()}",
+            "X-Client-Source": "langchain-tavily",
+        }
+        return f"{self.api_base_url or TAVILY_API_URL}/search", payload, headers
+
+    @staticmethod
+    def _check(response: httpx.Response) -> Dict[str, Any]:
+        if response.status_code != 200:
+            raise ValueError(f"Error {response.status_code}: {response.reason_phrase}")
+        return response.json()
+
+    def raw_results(self, query: str, **params: Any) -> Dict[str, Any]:
+        url, payload, headers = self._request(query, params)
+        return self._check(sync_client("tavily").post(url, json=payload, headers=headers))
+
+    async def raw_results_async(self, query: str, **params: Any) -> Dict[str, Any]:
+        url, payload, headers = self._request(query, params)
+        return self._check(await async_client("tavily").post(url, json=payload, headers=headers))
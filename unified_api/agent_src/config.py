@@ -1,6 +1,7 @@
 # src/config.py
 import os
 import redis
+import redis.asyncio
 from dotenv import load_dotenv
 
 from pathlib import Path
@@ -17,7 +18,20 @@ TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 # Use Redis if USE_REDIS is set to true, otherwise use in-memory
 USE_REDIS = os.getenv("USE_REDIS", "false").lower() in ("true", "1", "t")
 
-redis_client = None
+# In-memory fallback: "bounded" caps sessions / checkpoints, "unbounded" is the plain MemorySaver
+MEMORY_CHECKPOINTER = os.getenv("MEMORY_CHECKPOINTER", "bounded").lower()
+MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", 1000))
+MEMORY_SESSION_TTL = int(os.getenv("MEMORY_SESSION_TTL", 2 * 60 * 60))
+MEMORY_MAX_CHECKPOINTS = int(os.getenv("MEMORY_MAX_CHECKPOINTS", 3))
+
+# --- Checkpoint Compression ---
+# Serialized channel values at least this big are compressed (zstd, or zlib if zstandard is missing)
+CHECKPOINT_COMPRESSION = os.getenv("CHECKPOINT_COMPRESSION", "zstd").lower()  # zstd | zlib | none
+CHECKPOINT_COMPRESS_MIN_BYTES = int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", 1024))
+CHECKPOINT_COMPRESS_LEVEL = int(os.getenv("CHECKPOINT_COMPRESS_LEVEL", 3))
+
+redis_client = None         # sync client (RedisSaver / shared caches)
+redis_async_client = None   # asyncio client on a shared pool (AsyncRedisSaver)
 if USE_REDIS:
     # Redis Configuration
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
@@ -25,20 +39,195 @@ if USE_REDIS:
     REDIS_DB = int(os.getenv("REDIS_DB", 0))
     REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
 
-    try:
-        # Create a Redis client instance to be shared
-        redis_client = redis.Redis(
-            host=REDIS_HOST,
-            port=REDIS_PORT,
-            db=REDIS_DB,
-            password=REDIS_PASSWORD,
-            decode_responses=True
+    # Async mode keeps checkpoint I/O off the event loop (default)
+    REDIS_ASYNC = os.getenv("REDIS_ASYNC", "true").lower() in ("true", "1", "t")
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5))
+    REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 2))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
+
+    if REDIS_ASYNC:
+        # Connections are opened lazily on first command — no network I/O at import.
+        # The blocking pool makes callers wait for a free connection instead of failing.
+        redis_async_client = redis.asyncio.Redis(
+            connection_pool=redis.asyncio.BlockingConnectionPool(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                db=REDIS_DB,
+                password=REDIS_PASSWORD,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_POOL_TIMEOUT,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+                decode_responses=True
+            )
         )
-        # Check the connection
-        redis_client.ping()
-        print("Successfully connected to Redis.")
-    except redis.exceptions.ConnectionError as e:
-        print(f"--- WARNING: Redis connection failed: {e} ---")
-        print("--- Falling back to in-memory session storage. ---")
-        USE_REDIS = False
-        redis_client = None
\ No newline at end of file
+    else:
+        try:
+            # Create a Redis client instance to be shared
+            redis_client = redis.Redis(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                db=REDIS_DB,
+                password=REDIS_PASSWORD,
+                decode_responses=True
+            )
+            # Check the connection
+            redis_client.ping()
+            print("Successfully connected to Redis.")
+        except redis.exceptions.ConnectionError as e:
+            print(f"--- WARNING: Redis connection failed: {e} ---")
+            print("--- Falling back to in-memory session storage. ---")
+            USE_REDIS = False
+            redis_client = None
+
+# --- Search Cache Configuration ---
+# In-process LRU always sits in front; SEARCH_CACHE_BACKEND adds a shared second tier
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() in ("true", "1", "t")
+SEARCH_CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory").lower()  # memory | redis | sqlite
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 6 * 60 * 60))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 1000))
+SEARCH_CACHE_SQLITE_PATH = os.getenv("SEARCH_CACHE_SQLITE_PATH", "search_cache.sqlite3")
+
+# --- LLM Response Cache Configuration ---
+# Only chains listed in LLM_CACHE_CHAINS get the cache; "semantic" mode also
+# answers near-identical prompts from a local similarity index.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("true", "1", "t")
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "exact").lower()  # exact | semantic
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 60 * 60))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 500))
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", 0.95))
+LLM_CACHE_CHAINS = [
+    c.strip() for c in os.getenv(
+        "LLM_CACHE_CHAINS",
+        "query_generation,source_selection,product_extraction"
+    ).split(",") if c.strip()
+]
+
+# --- Conversation History Configuration ---
+# Prompts get at most HISTORY_WINDOW_TOKENS of recent messages; once the unsummarized
+# history passes HISTORY_SUMMARIZE_AFTER_TOKENS, older messages are folded into a summary.
+HISTORY_WINDOW_TOKENS = int(os.getenv("HISTORY_WINDOW_TOKENS", 1500))
+HISTORY_SUMMARIZE_AFTER_TOKENS = int(os.getenv("HISTORY_SUMMARIZE_AFTER_TOKENS", 3000))
+HISTORY_MESSAGE_MAX_CHARS = int(os.getenv("HISTORY_MESSAGE_MAX_CHARS", 2000))
+HISTORY_SUMMARY_MAX_CHARS = int(os.getenv("HISTORY_SUMMARY_MAX_CHARS", 1500))
+
+# --- Speculative Guide Prefetch ---
+# Once the report lists its strategies, prepare every strategy's guide in the background
+# so the user's pick is answered at once: "research" prefetches the search query + results,
+# "guide" also writes the full guide (one extra long LLM call per strategy), "off" disables it.
+PREFETCH_GUIDES = os.getenv("PREFETCH_GUIDES", "off").lower()  # off | research | guide
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", 4))  # jobs at once, across all sessions
+PREFETCH_MAX_SESSIONS = int(os.getenv("PREFETCH_MAX_SESSIONS", 200))
+
+# --- Provider HTTP Clients ---
+# One pooled client per provider (Groq, Tavily), reused for every call so connections stay warm.
+# *_MAX_CONCURRENCY caps requests in flight; callers beyond it wait instead of opening more sockets.
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("true", "1", "t")  # h2 comes with httpx[http2]
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", 30))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", 20))
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", 16))
+GROQ_READ_TIMEOUT = float(os.getenv("GROQ_READ_TIMEOUT", 60))
+TAVILY_MAX_CONNECTIONS = int(os.getenv("TAVILY_MAX_CONNECTIONS", 10))
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", 8))
+TAVILY_READ_TIMEOUT = float(os.getenv("TAVILY_READ_TIMEOUT", 30))
+
+# --- LLM Rate Limiting ---
+# Token bucket in front of every Groq request: LLM_RATE_LIMIT_RPM requests per minute on
+# average, bursts of up to LLM_RATE_LIMIT_BURST (0 RPM disables it). Waiting calls are
+# served by priority (lower first) — interactive chat before research and prefetching.
+LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", 300))
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", 10))
+LLM_PRIORITIES = {
+    node.strip(): int(priority)
+    for node, priority in (
+        item.split(":") for item in os.getenv(
+            "LLM_PRIORITIES",
+            "manager:0,correct_product_details:0,extract_initial_product:0,"
+            "write_report:1,guide_strategy:1,summarize_history:1,"
+            "perform_deep_research:2,guide_prefetch:3"
+        ).split(",") if ":" in item
+    )
+}
+LLM_DEFAULT_PRIORITY = int(os.getenv("LLM_DEFAULT_PRIORITY", 2))
+# Identical prompts already in flight share one request (non-streamed chains only)
+LLM_COALESCE_ENABLED = os.getenv("LLM_COALESCE_ENABLED", "true").lower() in ("true", "1", "t")
+
+# --- Model Tiers ---
+# Each chain runs on the "fast" (small) or "large" model; cheap, well-specified steps
+# (one-line queries, field extraction, summaries) don't need the 70B model.
+LLM_MODEL_LARGE = os.getenv("LLM_MODEL_LARGE", "llama-3.3-70b-versatile")
+LLM_MODEL_FAST = os.getenv("LLM_MODEL_FAST", "llama-3.1-8b-instant")
+LLM_CHAIN_TIERS = {
+    chain.strip(): tier.strip().lower()
+    for chain, tier in (
+        item.split(":") for item in os.getenv(
+            "LLM_CHAIN_TIERS",
+            "query_generation:fast,guide_query:fast,product_extraction:fast,history_summary:fast,"
+            "source_selection:large,correction:large,report:large,guide:large,chat:large"
+        ).split(",") if ":" in item
+    )
+}
+
+# --- Research Reuse ---
+# Completed research (queries, curated sources, findings) is indexed by a normalized product
+# profile (industry, goal, audience, geography, budget bucket); a new session whose profile is
+# at least RESEARCH_REUSE_THRESHOLD similar to a fresh entry skips straight to the report.
+RESEARCH_REUSE_ENABLED = os.getenv("RESEARCH_REUSE_ENABLED", "true").lower() in ("true", "1", "t")
+RESEARCH_REUSE_THRESHOLD = float(os.getenv("RESEARCH_REUSE_THRESHOLD", 0.8))
+RESEARCH_REUSE_TTL = int(os.getenv("RESEARCH_REUSE_TTL", 24 * 60 * 60))
+RESEARCH_REUSE_MAX_ENTRIES = int(os.getenv("RESEARCH_REUSE_MAX_ENTRIES", 500))
+
+# --- Research Query Planning ---
+# "template" builds the research queries from the product fields (no LLM hop before searching),
+# "hybrid" also has the LLM suggest queries in parallel with the first searches and searches up to
+# QUERY_REFINE_MAX_EXTRA new ones, "llm" generates them with the LLM before searching.
+QUERY_PLANNER_MODE = os.getenv("QUERY_PLANNER_MODE", "template").lower()  # template | hybrid | llm
+QUERY_REFINE_MAX_EXTRA = int(os.getenv("QUERY_REFINE_MAX_EXTRA", 3))
+
+# --- Research Pipeline ---
+# Search results are deduped and scored as they land; source curation starts once
+# RESEARCH_MIN_CANDIDATES unique results from RESEARCH_MIN_SEARCHES searches are in, or when
+# RESEARCH_SEARCH_DEADLINE seconds have passed — slower searches are dropped, not awaited.
+RESEARCH_MIN_CANDIDATES = int(os.getenv("RESEARCH_MIN_CANDIDATES", 10))
+RESEARCH_MIN_SEARCHES = int(os.getenv("RESEARCH_MIN_SEARCHES", 2))
+RESEARCH_SEARCH_DEADLINE = float(os.getenv("RESEARCH_SEARCH_DEADLINE", 8))
+RESEARCH_CURATION_CANDIDATES = int(os.getenv("RESEARCH_CURATION_CANDIDATES", 20))  # best-scored results sent to curation
+
+# --- Source Ranking ---
+# Research candidates are ranked locally (domain authority, relevance, overlap with the product).
+# "prefilter" sends the best SOURCE_RANKER_TOP_K to the LLM curator, "replace" picks the sources
+# without it, "llm" hands the curator the unranked pool. SOURCE_DOMAIN_WEIGHTS adjusts the built-in
+# authority table ("domain:weight" pairs, -1 avoid … 1 prefer).
+SOURCE_RANKER_MODE = os.getenv("SOURCE_RANKER_MODE", "prefilter").lower()  # prefilter | replace | llm
+SOURCE_RANKER_TOP_K = int(os.getenv("SOURCE_RANKER_TOP_K", 10))
+SOURCE_MAX_PER_DOMAIN = int(os.getenv("SOURCE_MAX_PER_DOMAIN", 2))
+SOURCE_DOMAIN_WEIGHTS = {
+    domain.strip().lower(): float(weight)
+    for domain, weight in (
+        item.split(":") for item in os.getenv("SOURCE_DOMAIN_WEIGHTS", "").split(",") if ":" in item
+    )
+}
+
+# --- Turn Deadlines ---
+# Every /chat turn gets TURN_BUDGET_SECONDS (0 disables); each LLM / search call is bounded by
+# what's left (minus DEADLINE_RESERVE for the fallback) and capped per kind of call. When little
+# is left, nodes degrade instead of overrunning: research below RESEARCH_FULL_BUDGET uses template
+# queries and local source ranking, below RESEARCH_CACHED_BUDGET only cached searches; the report
+# below REPORT_FULL_BUDGET is shortened to 3 strategies. A call that can't get DEADLINE_MIN_CALL_TIMEOUT
+# before the deadline is not made at all — the fallback answers instead.
+TURN_BUDGET_SECONDS = float(os.getenv("TURN_BUDGET_SECONDS", 45))
+TURN_HARD_STOP_GRACE = float(os.getenv("TURN_HARD_STOP_GRACE", 5))  # the stream is cut this long after the budget
+DEADLINE_RESERVE = float(os.getenv("DEADLINE_RESERVE", 1))
+DEADLINE_MIN_CALL_TIMEOUT = float(os.getenv("DEADLINE_MIN_CALL_TIMEOUT", 1))
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", 20))
+LLM_STREAM_TIMEOUT = float(os.getenv("LLM_STREAM_TIMEOUT", 40))  # report / guide / chat
+SEARCH_CALL_TIMEOUT = float(os.getenv("SEARCH_CALL_TIMEOUT", 10))
+RESEARCH_FULL_BUDGET = float(os.getenv("RESEARCH_FULL_BUDGET", 20))
+RESEARCH_CACHED_BUDGET = float(os.getenv("RESEARCH_CACHED_BUDGET", 8))
+REPORT_FULL_BUDGET = float(os.getenv("REPORT_FULL_BUDGET", 15))
+PREFETCH_MAX_WAIT_SHARE = float(os.getenv("PREFETCH_MAX_WAIT_SHARE", 0.5))  # of what's left, waiting on a prefetched guide
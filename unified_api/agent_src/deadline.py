@@ -0,0 +1,71 @@
+# src/deadline.py
+import math
+import time
+import asyncio
+import logging
+from typing import Awaitable, Optional, TypeVar
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ensure_config
+
+from .config import TURN_BUDGET_SECONDS, DEADLINE_RESERVE, DEADLINE_MIN_CALL_TIMEOUT
+
+logger = logging.getLogger("agent.deadline")
+
+T = TypeVar("T")
+
+# configurable key holding the turn's deadline (time.monotonic() seconds) — set by the chat route
+DEADLINE_KEY = "turn_deadline"
+
+
+def start_turn(config: RunnableConfig, budget: float = TURN_BUDGET_SECONDS) -> RunnableConfig:
+    """`config` with a deadline `budget` seconds from now; every node of the turn sees it."""
+    if budget <= 0:
+        return config
+    configurable = {**(config.get("configurable") or {}), DEADLINE_KEY: time.monotonic() + budget}
+    return {**config, "configurable": configurable}
+
+
+def remaining(config: Optional[RunnableConfig] = None) -> float:
+    """Seconds left in the current turn (inf outside a turn, e.g. prefetch jobs and scripts).
+    Without `config`, the run in progress's own config is used."""
+    config = config if config is not None else ensure_config()
+    deadline = (config.get("configurable") or {}).get(DEADLINE_KEY)
+    return math.inf if deadline is None else deadline - time.monotonic()
+
+
+def tight(need: float, config: Optional[RunnableConfig] = None) -> bool:
+    """Less than `need` seconds left — time for the cheaper way."""
+    return remaining(config) < need
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Not enough of the turn left to start the call at all."""
+
+
+def call_timeout(cap: float, config: Optional[RunnableConfig] = None) -> float:
+    """Timeout for one call: at most `cap`, and done DEADLINE_RESERVE before the deadline.
+    0 when less than DEADLINE_MIN_CALL_TIMEOUT fits — the call shouldn't be made."""
+    timeout = min(cap, remaining(config) - DEADLINE_RESERVE)
+    return timeout if timeout >= DEADLINE_MIN_CALL_TIMEOUT else 0.0
+
+
+def expired(cap: float = math.inf, config: Optional[RunnableConfig] = None) -> bool:
+    """No time left for another call — go straight to the fallback."""
+    return call_timeout(cap, config) <= 0
+
+
+async def bounded(awaitable: Awaitable[T], cap: float, config: Optional[RunnableConfig] = None) -> T:
+    """Await `awaitable` within call_timeout(cap) — asyncio.TimeoutError past it, like any other failure.
+    With no time left the call isn't started: DeadlineExceeded (a TimeoutError) straight away."""
+    timeout = call_timeout(cap, config)
+    if timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        logger.warning(f"Call skipped, {remaining(config):.1f}s left in the turn")
+        raise DeadlineExceeded()
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Call timed out after {timeout:.1f}s ({remaining(config):.1f}s left in the turn)")
+        raise
@@ -5,6 +5,7 @@ from langgraph.checkpoint.memory import MemorySaver
 from .nodes import (
     AgentState,
     manager_node,
+    summarize_history,
     gather_product_details,
     process_more_info,
     perform_deep_research,
@@ -15,14 +16,53 @@ from .nodes import (
     reset_and_gather,
     correct_product_details,
 )
-from .config import USE_REDIS, redis_client
-
-# Checkpointer
-if USE_REDIS and redis_client:
-    from langgraph.checkpoint.redis import RedisSaver
-    checkpointer = RedisSaver(redis_client=redis_client)
+from .intents import classify, RESET, CORRECTION
+from .metrics import instrument_node, register_checkpointer
+from .config import (
+    USE_REDIS,
+    redis_client,
+    redis_async_client,
+    MEMORY_CHECKPOINTER,
+    MEMORY_MAX_SESSIONS,
+    MEMORY_SESSION_TTL,
+    MEMORY_MAX_CHECKPOINTS,
+    CHECKPOINT_COMPRESSION,
+    CHECKPOINT_COMPRESS_MIN_BYTES,
+    CHECKPOINT_COMPRESS_LEVEL,
+)
+from .checkpointer import BoundedMemorySaver, LazyAsyncRedisSaver, CompactRedisSaver
+from .serde import CompactSerializer, get_codec
+
+# Checkpointer — large state values (report, guide, history) are stored compressed
+codec = get_codec(CHECKPOINT_COMPRESSION, CHECKPOINT_COMPRESS_LEVEL)
+
+
+def memory_checkpointer():
+    """In-memory session storage — also where Redis falls back to when it can't be reached."""
+    if MEMORY_CHECKPOINTER == "bounded":
+        return BoundedMemorySaver(
+            max_sessions=MEMORY_MAX_SESSIONS,
+            idle_ttl=MEMORY_SESSION_TTL,
+            max_checkpoints_per_thread=MEMORY_MAX_CHECKPOINTS,
+            serde=CompactSerializer(codec=codec, min_bytes=CHECKPOINT_COMPRESS_MIN_BYTES),
+        )
+    return MemorySaver(serde=CompactSerializer(codec=codec, min_bytes=CHECKPOINT_COMPRESS_MIN_BYTES))
+
+
+if USE_REDIS and redis_async_client is not None:
+    # No ping at import: a failed first setup switches it to memory_checkpointer()
+    checkpointer = LazyAsyncRedisSaver(
+        redis_client=redis_async_client, codec=codec, compress_min_bytes=CHECKPOINT_COMPRESS_MIN_BYTES,
+        fallback=memory_checkpointer,
+    )
+elif USE_REDIS and redis_client:
+    checkpointer = CompactRedisSaver(
+        redis_client=redis_client, codec=codec, compress_min_bytes=CHECKPOINT_COMPRESS_MIN_BYTES
+    )
 else:
-    checkpointer = MemorySaver()
+    checkpointer = memory_checkpointer()
+
+register_checkpointer(checkpointer)
 
 
 # ──────────────────────────────
@@ -31,19 +71,22 @@ else:
 workflow = StateGraph(AgentState)
 
 # === NODES ===
-workflow.add_node("manager", manager_node)
-workflow.add_node("gather_product", gather_product_details)
-workflow.add_node("process_more_info", process_more_info)
-workflow.add_node("perform_deep_research", perform_deep_research)
-workflow.add_node("write_report", write_report)
-workflow.add_node("select_strategy", select_strategy)
-workflow.add_node("guide_strategy", guide_strategy)
-workflow.add_node("check_satisfaction", check_satisfaction)
-workflow.add_node("reset_and_gather", reset_and_gather)
-workflow.add_node("correct_product_details", correct_product_details)
+workflow.add_node("summarize_history", instrument_node("summarize_history", summarize_history))
+workflow.add_node("manager", instrument_node("manager", manager_node))
+workflow.add_node("gather_product", instrument_node("gather_product", gather_product_details))
+workflow.add_node("process_more_info", instrument_node("process_more_info", process_more_info))
+workflow.add_node("perform_deep_research", instrument_node("perform_deep_research", perform_deep_research))
+workflow.add_node("write_report", instrument_node("write_report", write_report))
+workflow.add_node("select_strategy", instrument_node("select_strategy", select_strategy))
+workflow.add_node("guide_strategy", instrument_node("guide_strategy", guide_strategy))
+workflow.add_node("check_satisfaction", instrument_node("check_satisfaction", check_satisfaction))
+workflow.add_node("reset_and_gather", instrument_node("reset_and_gather", reset_and_gather))
+workflow.add_node("correct_product_details", instrument_node("correct_product_details", correct_product_details))
 
 # === ENTRY POINT ===
-workflow.set_entry_point("manager")
+# Every turn first trims history (usually a no-op), then the manager decides
+workflow.set_entry_point("summarize_history")
+workflow.add_edge("summarize_history", "manager")
 
 # === MAIN ROUTING FROM MANAGER (smart & safe) ===
 def route_from_manager(state: AgentState) -> str:
@@ -51,12 +94,12 @@ def route_from_manager(state: AgentState) -> str:
     if state["messages"] and state["messages"][-1].type == "ai":
         return END
 
-    msg = state["messages"][-1].content.lower() if state["messages"] else ""
+    intents = classify(state["messages"][-1].content if state["messages"] else "")
 
     # Reset / Correction (handled inside manager_node now, but keep for safety)
-    if any(p in msg for p in ["start over", "restart", "new product", "forget everything"]):
+    if RESET in intents:
         return "reset_and_gather"
-    if any(p in msg for p in ["actually the product", "it's actually", "wait no", "budget is now", "target is"]):
+    if CORRECTION in intents:
         return "correct_product_details"
 
     # Normal flow
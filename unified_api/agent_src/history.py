@@ -0,0 +1,106 @@
+# src/history.py
+import uuid
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, BaseMessageChunk, RemoveMessage
+from langgraph.graph.message import add_messages
+
+from .config import (
+    HISTORY_WINDOW_TOKENS,
+    HISTORY_SUMMARIZE_AFTER_TOKENS,
+    HISTORY_MESSAGE_MAX_CHARS,
+)
+
+
+def append_messages(left, right):
+    """
+    `messages` reducer: add_messages with an O(new) fast path.
+    Nodes return only their new messages, which never carry an id yet, so they can't
+    replace or remove anything — assign ids and append, without add_messages
+    re-converting and re-indexing the whole history on every update.
+    """
+    if not isinstance(right, list):
+        right = [right]
+    if isinstance(left, list) and all(
+        isinstance(m, BaseMessage) and m.id is None and not isinstance(m, (BaseMessageChunk, RemoveMessage))
+        for m in right
+    ):
+        for m in right:
+            m.id = str(uuid.uuid4())
+        return [*left, *right]
+    return add_messages(left, right)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token for English) — good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def clip(text: str, max_chars: int = HISTORY_MESSAGE_MAX_CHARS) -> str:
+    """Long messages (mostly the report) only keep their head in prompts."""
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + " …[truncated]"
+
+
+def clip_message(message: BaseMessage, max_chars: int = HISTORY_MESSAGE_MAX_CHARS) -> BaseMessage:
+    if len(message.content) <= max_chars:
+        return message
+    return message.model_copy(update={"content": clip(message.content, max_chars)})
+
+
+def message_tokens(message: BaseMessage) -> int:
+    return estimate_tokens(clip(message.content))
+
+
+def unsummarized(state) -> Sequence[BaseMessage]:
+    """Messages not yet folded into `conversation_summary`."""
+    return state.get("messages", [])[state.get("summarized_messages") or 0:]
+
+
+def history_window(state, budget: int = HISTORY_WINDOW_TOKENS, exclude_last: bool = False) -> List[BaseMessage]:
+    """
+    The newest messages that fit in `budget` tokens (each clipped), oldest first.
+    `exclude_last` drops the current user message for prompts that pass it separately.
+    """
+    messages = unsummarized(state)
+    if exclude_last:
+        messages = messages[:-1]
+
+    window, used = [], 0
+    for message in reversed(messages):
+        cost = message_tokens(message)
+        if window and used + cost > budget:
+            break
+        window.append(clip_message(message))
+        used += cost
+    window.reverse()
+    return window
+
+
+def history_text(state, budget: int = HISTORY_WINDOW_TOKENS) -> str:
+    """Summary + window as plain "type: content" lines, for prompts that take a transcript."""
+    lines = []
+    if state.get("conversation_summary"):
+        lines.append(f"summary of earlier conversation: {state['conversation_summary']}")
+    lines.extend(f"{m.type}: {m.content}" for m in history_window(state, budget))
+    return "\n".join(lines)
+
+
+def messages_to_fold(state) -> Tuple[List[BaseMessage], int]:
+    """
+    (messages to fold into the summary, new summarized_messages) once the unsummarized
+    history exceeds HISTORY_SUMMARIZE_AFTER_TOKENS — everything older than the window.
+    Returns ([], current count) when no update is due.
+    """
+    done = state.get("summarized_messages") or 0
+    pending = unsummarized(state)
+    if sum(message_tokens(m) for m in pending) <= HISTORY_SUMMARIZE_AFTER_TOKENS:
+        return [], done
+
+    keep = len(history_window(state))
+    fold = list(pending[:len(pending) - keep])
+    return fold, done + len(fold)
+
+
+def summary_prompt_input(previous: Optional[str], fold: Sequence[BaseMessage]) -> str:
+    transcript = "\n".join(f"{m.type}: {clip(m.content, 600)}" for m in fold)
+    return f"Current summary:\n{previous or '(none yet)'}\n\nNew messages:\n{transcript}"
@@ -0,0 +1,135 @@
+# src/intents.py
+import re
+from typing import Dict, FrozenSet, List, Optional
+
+# ==================== INTENT TABLE ====================
+# The single place to add an intent: name -> regex fragments, matched against
+# the lower-cased message. Adding a phrase costs (almost) nothing extra per message —
+# every plain phrase is compiled into the same pattern below and found in one scan.
+
+RESET = "reset"
+CORRECTION = "correction"
+STRATEGY_CHANGE = "strategy_change"
+SELECTION = "selection"
+START = "start"
+GREETING = "greeting"
+AFFIRMATIVE = "affirmative"
+YES = "yes"
+NEGATIVE = "negative"
+FINISHED = "finished"
+
+INTENT_PATTERNS: Dict[str, List[str]] = {
+    RESET: [
+        r"start over", r"restart", r"new product", r"different product",
+        r"forget everything", r"begin again", r"new idea", r"wrong product",
+        r"(?=chang.*product)",  # change / changing ... product; zero-width, "changed my mind" still matches
+        r"reset",
+    ],
+    CORRECTION: [
+        r"actually the product", r"wait no", r"it's actually", r"no it's",
+        r"budget is now", r"target audience is", r"it's for", r"we're in",
+        r"changed my mind", r"actually we target", r"usp is", r"industry is",
+    ],
+    STRATEGY_CHANGE: [
+        r"another one", r"different strategy", r"try number", r"what about #",
+        r"instead", r"not that one", r"show me another",
+        r"\b(?:number|#)(?=\s*\d)",  # leaves the digit for SELECTION
+    ],
+    SELECTION: [r"\b[1-5]\b"],
+    START: [
+        r"market a product", r"launch a product", r"start marketing",
+        r"create a strategy", r"need a strategy", r"help me market",
+        r"marketing strategy", r"go to form", r"fill form",
+    ],
+    GREETING: [r"hi", r"hello", r"hey", r"greetings", r"start"],
+    AFFIRMATIVE: [r"yes", r"yeah", r"yep", r"sure", r"ok", r"okay", r"certainly", r"definitely", r"absolutely"],
+    YES: [r"yes"],
+    NEGATIVE: [r"no"],
+    FINISHED: [r"no", r"nope", r"that's all", r"enough", r"proceed", r"go ahead"],
+}
+
+_REGEX_CHARS = set(".*+?()[]{}|^$\\")
+
+
+def _trie_regex(phrases) -> str:
+    """Alternation factored into a prefix trie ("no(?:pe|t that one| it's)?"), so each position costs ~one branch."""
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and "" not in node else f"(?:{'|'.join(branches)})"
+        # Optional tail is greedy, so the longest phrase wins
+        return f"{body}?" if "" in node else body
+
+    return emit(trie)
+
+
+def _compile(patterns: Dict[str, List[str]]):
+    """
+    Build the scanning pattern.
+    - Plain phrases go into one trie-factored alternation inside a zero-width lookahead, so
+      the scan tries every position and overlapping phrases are all found ("surestart" has
+      "sure" and "restart"). At one position only the longest phrase is reported, so a phrase
+      also carries every intent whose fragment it contains ("start over" is also a "start").
+    - The few fragments that are real regexes are searched on their own.
+    """
+    intents_by_fragment: Dict[str, set] = {}
+    for name, fragments in patterns.items():
+        for fragment in fragments:
+            intents_by_fragment.setdefault(fragment, set()).add(name)
+
+    phrases = {f: names for f, names in intents_by_fragment.items() if not _REGEX_CHARS.intersection(f)}
+    specials = [(re.compile(f, re.DOTALL), frozenset(names)) for f, names in intents_by_fragment.items() if f not in phrases]
+
+    by_text = {}
+    for phrase, names in phrases.items():
+        implied = set(names)
+        for other, other_names in intents_by_fragment.items():
+            if re.search(other, phrase):
+                implied |= other_names
+        by_text[phrase] = frozenset(implied)
+
+    pattern = re.compile(f"(?=({_trie_regex(phrases)}))", re.DOTALL)
+    return pattern, by_text, specials
+
+
+_INTENT_RE, _INTENTS_BY_TEXT, _SPECIALS = _compile(INTENT_PATTERNS)
+
+
+class MessageIntents:
+    """Result of classify(): the set of intents found, plus the first strategy number (1–5) if any."""
+
+    __slots__ = ("names", "selection")
+
+    def __init__(self, names: FrozenSet[str], selection: Optional[int]):
+        self.names = names
+        self.selection = selection
+
+    def __contains__(self, intent: str) -> bool:
+        return intent in self.names
+
+    def __repr__(self) -> str:
+        return f"MessageIntents({sorted(self.names)}, selection={self.selection})"
+
+
+def classify(message: str) -> MessageIntents:
+    """Find every intent in `message`: one scan for the phrases, one search per regex fragment."""
+    text = message.lower()
+    found = set()
+    for match in _INTENT_RE.finditer(text):
+        found |= _INTENTS_BY_TEXT[match.group(1)]
+    selection = None
+    for special, names in _SPECIALS:
+        match = special.search(text)
+        if match:
+            found |= names
+            if SELECTION in names:
+                selection = int(match.group())
+    return MessageIntents(frozenset(found), selection)
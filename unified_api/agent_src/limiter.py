@@ -0,0 +1,232 @@
+# src/limiter.py
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+import contextvars
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.load import dumps
+from langchain_core.rate_limiters import BaseRateLimiter
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import ensure_config
+
+from .config import (
+    LLM_RATE_LIMIT_RPM,
+    LLM_RATE_LIMIT_BURST,
+    LLM_PRIORITIES,
+    LLM_DEFAULT_PRIORITY,
+)
+from .metrics import LLM_QUEUE_WAIT, CACHE_REQUESTS
+
+logger = logging.getLogger("agent.limiter")
+
+
+def current_node() -> str:
+    """Graph node of the run in progress (prefetch jobs label themselves the same way)."""
+    return (ensure_config().get("metadata") or {}).get("langgraph_node", "none")
+
+
+# ==================== RATE LIMITER ====================
+
+class SharedPriority:
+    """
+    Priority of a request several callers wait on (see CoalescingLLM): it starts at the
+    first caller's and is raised, queued waiter included, when a more urgent one joins.
+    """
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self._requeue: Optional[Callable[[int], None]] = None  # set while queued in the bucket
+
+    def raise_to(self, priority: int) -> None:
+        if priority < self.priority:
+            self.priority = priority
+            if self._requeue is not None:
+                self._requeue(priority)
+
+
+# Set in the context a coalesced request runs in
+_shared_priority: contextvars.ContextVar[Optional[SharedPriority]] = contextvars.ContextVar(
+    "llm_shared_priority", default=None
+)
+
+
+class PriorityTokenBucket(BaseRateLimiter):
+    """
+    Token bucket shared by every call to the provider: `requests_per_second` on average,
+    bursts of up to `max_bucket_size`. When the bucket is empty, waiting async calls are
+    served lowest priority number first (FIFO within a priority), the priority coming from
+    the calling graph node — so chat isn't stuck behind a research burst.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        max_bucket_size: int = 10,
+        priorities: Optional[Dict[str, int]] = None,
+        default_priority: int = 2,
+    ):
+        self.requests_per_second = requests_per_second
+        self.max_bucket_size = max(1, max_bucket_size)
+        self.priorities = priorities or {}
+        self.default_priority = default_priority
+
+        self._tokens = float(self.max_bucket_size)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()  # sync callers run in worker threads
+        self._waiters = []             # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop = None
+
+    def priority(self, node: str) -> int:
+        return self.priorities.get(node, self.default_priority)
+
+    def _take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_bucket_size, self._tokens + (now - self._updated) * self.requests_per_second)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def _give_back(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_bucket_size, self._tokens + 1)
+
+    def _until_next_token(self) -> float:
+        with self._lock:
+            return max(0.0, (1 - self._tokens) / self.requests_per_second)
+
+    # ── async: priority queue ────────────────────────────────
+    def _grant(self) -> None:
+        self._timer = None
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():  # cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if not self._take():
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(True)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._waiters and self._timer is None:
+            self._timer = self._loop.call_later(self._until_next_token(), self._grant)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Waiters and timers belong to one loop (benchmarks start several)
+            self._loop, self._waiters, self._timer = loop, [], None
+        if not self._waiters and self._take():
+            return True
+        if not blocking:
+            return False
+
+        node = current_node()
+        shared = _shared_priority.get()
+        start = time.perf_counter()
+        future = loop.create_future()
+        seq = next(self._seq)
+        heapq.heappush(self._waiters, (self.priority(node) if shared is None else shared.priority, seq, future))
+        if shared is not None:
+            shared._requeue = lambda priority: self._requeue(priority, seq, future)
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._give_back()  # granted just as we were cancelled
+            raise
+        finally:
+            if shared is not None:
+                shared._requeue = None
+            LLM_QUEUE_WAIT.labels(node=node).observe(time.perf_counter() - start)
+        return True
+
+    def _requeue(self, priority: int, seq: int, future: asyncio.Future) -> None:
+        # The old entry stays in the heap; whichever is reached second finds the future done
+        if not future.done():
+            heapq.heappush(self._waiters, (priority, seq, future))
+
+    # ── sync: plain token bucket ─────────────────────────────
+    def acquire(self, *, blocking: bool = True) -> bool:
+        if self._take():
+            return True
+        if not blocking:
+            return False
+        while not self._take():
+            time.sleep(max(0.01, self._until_next_token()))
+        return True
+
+
+def build_rate_limiter() -> Optional[PriorityTokenBucket]:
+    if LLM_RATE_LIMIT_RPM <= 0:
+        return None
+    return PriorityTokenBucket(
+        requests_per_second=LLM_RATE_LIMIT_RPM / 60,
+        max_bucket_size=LLM_RATE_LIMIT_BURST,
+        priorities=LLM_PRIORITIES,
+        default_priority=LLM_DEFAULT_PRIORITY,
+    )
+
+
+# ==================== IN-FLIGHT COALESCING ====================
+
+class CoalescingLLM(Runnable):
+    """
+    Wraps a chat model so identical prompts already in flight share one request:
+    the first caller makes it, concurrent duplicates await the same result. While the
+    request is queued in a PriorityTokenBucket it runs at the most urgent caller's priority.
+    Only for non-streamed chains — followers get the answer, not its token stream.
+    """
+
+    def __init__(self, model, inflight: Dict[Any, tuple]):
+        self.model = model
+        self._inflight = inflight  # key -> (task, SharedPriority); shared by every wrapper of the same provider
+
+    def _key(self, input: Any, **kwargs: Any) -> tuple:
+        messages = self.model._convert_input(input).to_messages()
+        return self.model._get_llm_string(**kwargs), dumps(messages)
+
+    def _priority(self) -> int:
+        limiter = getattr(self.model, "rate_limiter", None)
+        return limiter.priority(current_node()) if isinstance(limiter, PriorityTokenBucket) else 0
+
+    def _done(self, key: tuple, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Coalesced LLM request failed: {task.exception()}")
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any):
+        return self.model.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any):
+        key = self._key(input, **kwargs)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            CACHE_REQUESTS.labels(cache="llm_inflight", result="coalesced").inc()
+            task, shared = inflight
+            shared.raise_to(self._priority())
+        else:
+            CACHE_REQUESTS.labels(cache="llm_inflight", result="leader").inc()
+            shared = SharedPriority(self._priority())
+            context = contextvars.copy_context()
+            context.run(_shared_priority.set, shared)
+            task = asyncio.create_task(self.model.ainvoke(input, config, **kwargs), context=context)
+            self._inflight[key] = (task, shared)
+            task.add_done_callback(lambda t: self._done(key, t))
+        # Shielded: one caller going away mustn't cancel the request for the others
+        result = await asyncio.shield(task)
+        return result.model_copy()
+
+
+llm_rate_limiter = build_rate_limiter()
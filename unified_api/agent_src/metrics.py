@@ -0,0 +1,160 @@
+# src/metrics.py
+import time
+import inspect
+import logging
+import functools
+from typing import Any, Dict
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger("agent.metrics")
+
+# LLM and search calls take seconds, not milliseconds — stretch the default buckets
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# ==================== METRICS ====================
+
+NODE_DURATION = Histogram(
+    "agent_node_duration_seconds", "Wall time of one graph node run", ["node"], buckets=LATENCY_BUCKETS
+)
+NODE_ERRORS = Counter("agent_node_errors_total", "Graph node runs that raised", ["node"])
+
+LLM_DURATION = Histogram(
+    "agent_llm_duration_seconds", "Wall time of one LLM call", ["node", "model"], buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter("agent_llm_tokens_total", "Tokens used by LLM calls", ["node", "model", "kind"])
+LLM_ERRORS = Counter("agent_llm_errors_total", "LLM calls that raised", ["node", "model"])
+LLM_QUEUE_WAIT = Histogram(
+    "agent_llm_queue_seconds", "Time an LLM call waited for the rate limiter", ["node"], buckets=LATENCY_BUCKETS
+)
+
+SEARCH_DURATION = Histogram(
+    "agent_search_duration_seconds", "Wall time of one web search (cache misses only)", buckets=LATENCY_BUCKETS
+)
+SEARCH_ERRORS = Counter("agent_search_errors_total", "Web searches that raised")
+
+CACHE_REQUESTS = Counter("agent_cache_requests_total", "Cache lookups", ["cache", "result"])
+FALLBACKS = Counter("agent_fallbacks_total", "Times a node fell back to its degraded path", ["node", "reason"])
+
+
+# ==================== GRAPH NODES ====================
+
+def instrument_node(name: str, fn):
+    """Wrap a node function (sync or async) with duration / error metrics, keeping its signature for LangGraph."""
+    duration = NODE_DURATION.labels(node=name)
+    errors = NODE_ERRORS.labels(node=name)
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_node(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                duration.observe(time.perf_counter() - start)
+        return async_node
+
+    @functools.wraps(fn)
+    def node(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
+    return node
+
+
+# ==================== LLM CALLS ====================
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    Callback attached to the shared LLM: times every call and counts its tokens,
+    labelled with the graph node that made it (from LangGraph's run metadata).
+    """
+
+    # Cheap bookkeeping — run on the event loop instead of hopping to the executor
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or params.get("_type") or "unknown"
+        node = (metadata or {}).get("langgraph_node", "none")
+        self._runs[run_id] = (time.perf_counter(), node, model)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        start, node, model = run
+        LLM_DURATION.labels(node=node, model=model).observe(time.perf_counter() - start)
+
+        prompt_tokens, completion_tokens = _token_usage(response)
+        if prompt_tokens:
+            LLM_TOKENS.labels(node=node, model=model, kind="prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(node=node, model=model, kind="completion").inc(completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        start, node, model = run
+        LLM_DURATION.labels(node=node, model=model).observe(time.perf_counter() - start)
+        LLM_ERRORS.labels(node=node, model=model).inc()
+
+
+def _token_usage(response: LLMResult) -> tuple:
+    """(prompt, completion) tokens — from the message's usage_metadata, else the provider's llm_output."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+llm_metrics = LLMMetricsHandler()
+
+
+# ==================== CHECKPOINTER ====================
+
+class CheckpointerCollector:
+    """Exposes a saver's stats() (sessions, checkpoints, bytes...) as gauges, read at scrape time."""
+
+    def __init__(self, saver):
+        self.saver = saver
+
+    def collect(self):
+        try:
+            stats = self.saver.stats()
+        except Exception as e:
+            logger.error(f"Checkpointer stats failed: {e}")
+            return
+        for key, value in stats.items():
+            gauge = GaugeMetricFamily(f"agent_checkpointer_{key}", f"Checkpointer {key.replace('_', ' ')}")
+            gauge.add_metric([], value)
+            yield gauge
+
+
+def register_checkpointer(saver) -> None:
+    if hasattr(saver, "stats"):
+        REGISTRY.register(CheckpointerCollector(saver))
+
+
+def render_metrics() -> tuple:
+    """(body, content type) for the /metrics endpoint."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
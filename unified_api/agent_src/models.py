@@ -1,5 +1,5 @@
 # src/models.py (New file for Pydantic models)
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from uuid import UUID
 
@@ -10,4 +10,16 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     session_id: UUID
-    is_complete: bool  # True if satisfaction reached or session ended
\ No newline at end of file
+    is_complete: bool  # True if satisfaction reached or session ended
+
+class ReportStrategies(BaseModel):
+    """Strategy names the report writer appends after the Markdown report."""
+    strategies: List[str] = Field(..., min_length=1)
+
+    @field_validator("strategies")
+    @classmethod
+    def clean_names(cls, v: List[str]) -> List[str]:
+        names = [s.strip().strip("*").strip() for s in v if s and s.strip()]
+        if not names:
+            raise ValueError("no strategy names")
+        return names[:5]
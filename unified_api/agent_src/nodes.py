@@ -3,7 +3,7 @@ import re
 import asyncio
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 import logging
-from typing import TypedDict, Annotated, Sequence, Optional, List, Dict
+from typing import TypedDict, Annotated, Sequence, Optional, List, Dict, NamedTuple
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -11,11 +11,34 @@ from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig
 from langchain_tavily import TavilySearch
-from langgraph.graph.message import add_messages
 from langchain_groq import ChatGroq
 
-from .config import GROQ_API_KEY, TAVILY_API_KEY
+from pydantic import ValidationError
+
+from .models import ReportStrategies
+from .config import (
+    GROQ_API_KEY, TAVILY_API_KEY, LLM_CACHE_CHAINS, LLM_COALESCE_ENABLED, HISTORY_SUMMARY_MAX_CHARS,
+    LLM_MODEL_LARGE, LLM_MODEL_FAST, LLM_CHAIN_TIERS,
+    RESEARCH_MIN_CANDIDATES, RESEARCH_MIN_SEARCHES, RESEARCH_SEARCH_DEADLINE, RESEARCH_CURATION_CANDIDATES,
+    LLM_CALL_TIMEOUT, LLM_STREAM_TIMEOUT, SEARCH_CALL_TIMEOUT, DEADLINE_RESERVE,
+    RESEARCH_FULL_BUDGET, RESEARCH_CACHED_BUDGET, REPORT_FULL_BUDGET, PREFETCH_MAX_WAIT_SHARE,
+)
+from .search import run_search, source_domain, ResearchPipeline
+from .cache import search_cache, llm_cache
+from .research_store import research_store
+from .query_planner import query_planner
+from .ranker import source_ranker
+from .deadline import bounded, call_timeout, expired, remaining, tight
+from .metrics import llm_metrics, FALLBACKS
+from .clients import groq_client_kwargs, PooledTavilyAPIWrapper
+from .limiter import llm_rate_limiter, CoalescingLLM
+from .prefetch import guide_prefetcher
+from .history import append_messages, clip, history_text, history_window, messages_to_fold, summary_prompt_input
+from .intents import (
+    classify, RESET, CORRECTION, STRATEGY_CHANGE, START, GREETING, AFFIRMATIVE, YES, NEGATIVE, FINISHED,
+)
 
 # Load env
 env_path = Path(__file__).resolve().parent.parent.parent / '.env'
@@ -24,13 +47,51 @@ load_dotenv(dotenv_path=env_path)
 # logging.basicConfig(level=logging.INFO)  <-- Removed to avoid conflict with main.py
 logger = logging.getLogger("agent.nodes")
 
-# LLM & Tool
-llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.7)
-tavily_tool = TavilySearch(max_results=7)
+# LLM & Tool — both on the shared, pooled HTTP clients (see clients.py)
+def _chat_model(model: str) -> ChatGroq:
+    # Every request goes through the shared rate limiter (priority by node, see limiter.py)
+    return ChatGroq(
+        model=model, temperature=0.7, callbacks=[llm_metrics], rate_limiter=llm_rate_limiter,
+        **groq_client_kwargs(),
+    )
+
+
+# One model per tier — chains pick theirs via LLM_CHAIN_TIERS (see model_for)
+llm = _chat_model(LLM_MODEL_LARGE)
+fast_llm = _chat_model(LLM_MODEL_FAST)
+tavily_tool = TavilySearch(max_results=7, api_wrapper=PooledTavilyAPIWrapper())
+
+
+# Chains tagged with this stream their tokens to the user (see routes/agent.py)
+STREAM_TAG = "user_stream"
+# write_report's machine-readable trailer — never shown to the user
+STRATEGIES_MARKER = "<STRATEGIES>"
+
+
+# Requests in flight, by (model, prompt) — for coalescing identical concurrent prompts
+_llm_inflight = {}
+
+
+def model_for(chain: str):
+    """
+    The model of `chain`'s tier (LLM_CHAIN_TIERS, "large" by default) — with the response
+    cache attached if the chain opted in via LLM_CACHE_CHAINS.
+    """
+    model = fast_llm if LLM_CHAIN_TIERS.get(chain) == "fast" else llm
+    if llm_cache.enabled and chain in LLM_CACHE_CHAINS:
+        model = model.model_copy(update={"cache": llm_cache})
+    return model
+
+
+def llm_for(chain: str):
+    """model_for() for non-streamed chains, with identical concurrent prompts coalesced."""
+    model = model_for(chain)
+    return CoalescingLLM(model, _llm_inflight) if LLM_COALESCE_ENABLED else model
 
 # State
 class AgentState(TypedDict):
-    messages: Annotated[Sequence[BaseMessage], add_messages]
+    # Nodes return only their new messages — the reducer appends them
+    messages: Annotated[Sequence[BaseMessage], append_messages]
 
     # Product fields
     product_name: Optional[str]
@@ -55,9 +116,61 @@ class AgentState(TypedDict):
     guided: Optional[bool]
     satisfaction: Optional[bool]
 
+    # Conversation memory: prompts see the summary plus a token-budgeted window of recent messages
+    conversation_summary: Optional[str]
+    summarized_messages: Optional[int]  # leading messages already folded into the summary
+
 
 # ==================== NODES ====================
 
+async def summarize_history(state: AgentState) -> dict:
+    """Entry node: once history outgrows its budget, fold the messages older than the window into the summary."""
+    fold, upto = messages_to_fold(state)
+    if not fold:
+        return {}
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You keep the running summary of a chat between a marketing assistant and a user. "
+                   "Merge the new messages into the current summary. Keep product facts, corrections, "
+                   "strategies offered and chosen, and open questions. Drop greetings and filler. "
+                   "Max 150 words, plain text."),
+        ("human", "{input}")
+    ])
+    try:
+        summary = await bounded((prompt | llm_for("history_summary") | StrOutputParser()).ainvoke(
+            {"input": summary_prompt_input(state.get("conversation_summary"), fold)}
+        ), LLM_CALL_TIMEOUT)
+    except Exception as e:
+        # The window still caps prompt size — just retry on a later turn
+        logger.error(f"History summary failed: {e}")
+        FALLBACKS.labels(node="summarize_history", reason="summary").inc()
+        return {}
+
+    logger.info(f"Folded {len(fold)} messages into the conversation summary")
+    return {"conversation_summary": clip(summary.strip(), HISTORY_SUMMARY_MAX_CHARS), "summarized_messages": upto}
+
+
+_QUERY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a world-class marketing researcher. Generate exactly 3 different, powerful search queries to find real, proven marketing strategies for this product.\n"
+               "1. Focus: Industry + Goal + Audience\n"
+               "2. Focus: USP + Product type + Goal\n"
+               "3. Focus: Geography + Budget/Timeline + Trends\n"
+               "Output only the 3 queries, one per line. No numbering, no extra text."),
+    ("human", "{ctx}")
+])
+
+
+async def _generate_queries(ctx: str) -> List[str]:
+    query_chain = _QUERY_PROMPT | llm_for("query_generation") | StrOutputParser()
+    queries = query_planner.parse(await bounded(query_chain.ainvoke({"ctx": ctx}), LLM_CALL_TIMEOUT))
+    if not queries:
+        raise ValueError("no queries in the reply")
+    if len(queries) < 3:
+        queries = queries + [queries[0]] * (3 - len(queries))  # fallback
+        FALLBACKS.labels(node="perform_deep_research", reason="too_few_queries").inc()
+    return queries
+
+
 async def perform_deep_research(state: AgentState) -> dict:
     logger.info("--- Node: perform_deep_research ---")
     
@@ -71,59 +184,90 @@ Geography: {state.get('geography', '')}
 Budget: {state.get('budget_range', '')}
 Timeline: {state.get('timeline', '')}"""
 
+    # A similar product was researched recently → reuse it and go straight to the report.
+    # Not on a repeat run for this session (the satisfaction loop wants fresh research).
+    if not state.get("research_queries_used"):
+        reused = research_store.lookup(state)
+        if reused is not None:
+            await adispatch_custom_event("progress", {"step": "Found fresh research for a very similar product — reusing it!"})
+            return reused
+
     # Send "searching..." message
     await adispatch_custom_event("progress", {"step": "searching..."})
 
-    # Generate 3 queries
-    query_prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a world-class marketing researcher. Generate exactly 3 different, powerful search queries to find real, proven marketing strategies for this product.\n"
-                   "1. Focus: Industry + Goal + Audience\n"
-                   "2. Focus: USP + Product type + Goal\n"
-                   "3. Focus: Geography + Budget/Timeline + Trends\n"
-                   "Output only the 3 queries, one per line. No numbering, no extra text."),
-        ("human", "{ctx}")
-    ])
-
-    try:
-        query_chain = query_prompt | llm | StrOutputParser()
-        raw_queries = await query_chain.ainvoke({"ctx": ctx})
-        queries = [q.strip() for q in raw_queries.split("\n") if q.strip()][:3]
-        if len(queries) < 3:
-            queries = queries + [queries[0]] * (3 - len(queries))  # fallback
-    except Exception as e:
-        logger.error(f"Query generation failed: {e}")
-        queries = [
-            f"{state.get('industry', 'marketing')} strategies for {state.get('product_name', 'product')}",
-            f"how to market {state.get('unique_selling_proposition', 'innovative')} products",
-            f"best marketing campaigns {state.get('geography', '')} 2025"
-        ]
+    # Short on time: template queries and local ranking only ("fast"), or only cached searches too.
+    # Fallback / degraded results are never stored for reuse.
+    left = remaining()
+    mode = "cached" if left < RESEARCH_CACHED_BUDGET else "fast" if left < RESEARCH_FULL_BUDGET else "full"
+    degraded = mode != "full"
+    if degraded:
+        logger.warning(f"Research in {mode} mode, {left:.1f}s left in the turn")
+        FALLBACKS.labels(node="perform_deep_research", reason=f"deadline_{mode}").inc()
+
+    # Template queries need no LLM hop; "llm" mode generates them first (templates on failure)
+    if query_planner.uses_templates or degraded:
+        queries = query_planner.plan(state)
+    else:
+        try:
+            queries = await _generate_queries(ctx)
+        except Exception as e:
+            logger.error(f"Query generation failed: {e}")
+            FALLBACKS.labels(node="perform_deep_research", reason="query_generation").inc()
+            degraded = True
+            queries = query_planner.plan(state)
 
     logger.info(f"Research queries: {queries}")
 
-    all_results = []
-    seen_urls = set()
-
+    # Results are deduped and scored as they land; curation starts once enough are in
+    # ...and searching stops in time to leave the report its share of the turn (never past the deadline)
+    search_deadline = min(call_timeout(RESEARCH_SEARCH_DEADLINE), max(1.0, left - REPORT_FULL_BUDGET - DEADLINE_RESERVE))
+    pipeline = ResearchPipeline(RESEARCH_MIN_CANDIDATES, RESEARCH_MIN_SEARCHES, search_deadline)
     for query in queries:
         await adispatch_custom_event("progress", {"step": f"Searching: {query[:70]}..."})
-        try:
-            results = tavily_tool.invoke({"query": query})
-            if isinstance(results, dict):
-                results = results.get("results", [results])
-            
-            for item in results:
-                url = item.get("url")
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
-                    all_results.append({
-                        "title": item.get("title", "No title"),
-                        "url": url,
-                        "snippet": item.get("content", "")[:1000]
-                    })
-        except Exception as e:
-            logger.error(f"Tavily failed on '{query}': {e}")
+    pipeline.search(tavily_tool, list(queries), cache=search_cache, cache_only=mode == "cached")
+
+    if query_planner.refines and not degraded:
+        # The LLM's suggestions are searched as they arrive, alongside the template searches
+        async def refine():
+            try:
+                extra = query_planner.extra(queries, await _generate_queries(ctx))
+            except Exception as e:
+                logger.warning(f"Query refinement failed: {e}")
+                FALLBACKS.labels(node="perform_deep_research", reason="query_refinement").inc()
+                return
+            logger.info(f"Refined research queries: {extra}")
+            queries.extend(extra)
+            await pipeline.feed(tavily_tool, extra, cache=search_cache)
+
+        pipeline.start(refine())
+
+    try:
+        async for query, results, error in pipeline.stream():
+            if error:
+                logger.error(f"Tavily failed on '{query}': {error}")
+                await adispatch_custom_event("progress", {"step": f"Search failed: {query[:70]}"})
+                continue
+            await adispatch_custom_event("progress", {"step": f"Found {len(results)} results for: {query[:70]}..."})
+    finally:
+        await pipeline.aclose()
+    if pipeline.dropped:
+        logger.info(f"Curating after {pipeline.searches_done} searches; the slower ones were dropped")
+    if pipeline.timed_out:
+        FALLBACKS.labels(node="perform_deep_research", reason="search_deadline").inc()
+        degraded = True
+
+    # Rank locally: the curator only sees the best few ("replace" mode skips it altogether,
+    # and so does a turn with no time left for the call)
+    curate_locally = source_ranker.mode == "replace" or degraded or expired(LLM_CALL_TIMEOUT)
+    if source_ranker.mode == "llm" and not degraded:
+        all_results = pipeline.top(RESEARCH_CURATION_CANDIDATES)
+    else:
+        all_results = source_ranker.rank(pipeline.candidates, state)
+        if not curate_locally:
+            all_results = all_results[:source_ranker.top_k]
 
     # Let LLM pick the best 5–7 authoritative sources
-    results_text = "\n".join([f"{i+1}. {r['title']} — {r['url']}" for i, r in enumerate(all_results[:20])])
+    results_text = "\n".join([f"{i+1}. {r['title']} — {r['url']}" for i, r in enumerate(all_results)])
 
     select_prompt = ChatPromptTemplate.from_messages([
         ("system", "You are a strict curator. From the search results below, select ONLY the 5–7 most authoritative, relevant, and high-quality sources for marketing strategies.\n"
@@ -140,31 +284,95 @@ Timeline: {state.get('timeline', '')}"""
     ])
 
     try:
-        chain = select_prompt | llm | JsonOutputParser()
-        selection = await chain.ainvoke({"ctx": ctx, "results_text": results_text or "No results"})
+        if curate_locally:
+            sources, summary = source_ranker.select(all_results, state)
+        else:
+            chain = select_prompt | llm_for("source_selection") | JsonOutputParser()
+            selection = await bounded(chain.ainvoke({"ctx": ctx, "results_text": results_text or "No results"}), LLM_CALL_TIMEOUT)
 
-        sources = selection.get("selected_sources", [])[:7]
-        for s in sources:
-            url = s.get("url", "")
-            s["domain"] = url.split("/")[2].replace("www.", "") if url else "unknown"
+            sources = selection.get("selected_sources", [])[:7]
+            for s in sources:
+                s["domain"] = source_domain(s.get("url", ""))
 
-        summary = selection.get("summary_of_findings", "Research completed successfully.")
+            summary = selection.get("summary_of_findings", "Research completed successfully.")
 
     except Exception as e:
         logger.error(f"Source selection failed: {e}")
-        sources = [{"rank": i+1, "title": r["title"], "url": r["url"], "domain": "fallback", "why_relevant": "Selected during fallback"} 
+        FALLBACKS.labels(node="perform_deep_research", reason="source_selection").inc()
+        degraded = True
+        sources = [{"rank": i+1, "title": r["title"], "url": r["url"], "domain": source_domain(r["url"]), "why_relevant": "Selected during fallback"} 
                   for i, r in enumerate(all_results[:5])]
         summary = "Solid strategies found (fallback mode)."
 
     await adispatch_custom_event("progress", {"step": f"Curated {len(sources)} premium sources!"})
 
-    return {
+    research = {
         "research_queries_used": queries,
         "selected_sources": sources,
         "summary_of_findings": summary
     }
+    if not degraded:
+        research_store.add(state, research)
+    return research
+
+_STRATEGIES_BLOCK = re.compile(re.escape(STRATEGIES_MARKER) + r"(.*?)(?:</STRATEGIES>|$)", re.DOTALL)
+_CODE_FENCE = re.compile(r"```(?:json)?")
+_APPROACH_HEADING = re.compile(r"\*\*\s*Approach\s*\d+\s*[:.\-–]\s*(.+?)\s*\*\*", re.IGNORECASE)
+
+
+def split_report(raw: str) -> tuple:
+    """
+    Split the report writer's output into (report, strategy names).
+    Names come from the <STRATEGIES> JSON block; if it is missing or invalid,
+    fall back to the **Approach X: Name** headings in the report itself.
+    """
+    match = _STRATEGIES_BLOCK.search(raw)
+    report = raw[:match.start()].rstrip() if match else raw.strip()
+
+    if match:
+        block = _CODE_FENCE.sub("", match.group(1)).strip()
+        if block.startswith("["):
+            block = f'{{"strategies": {block}}}'
+        try:
+            return report, ReportStrategies.model_validate_json(block).strategies
+        except ValidationError as e:
+            logger.warning(f"Invalid <STRATEGIES> block, falling back to headings: {e}")
+
+    FALLBACKS.labels(node="write_report", reason="strategy_headings").inc()
+    return report, [name.strip() for name in _APPROACH_HEADING.findall(report)][:5]
+
+
+def _report_prompt(count: int, brief: bool) -> ChatPromptTemplate:
+    names = ", ".join(f'"Name {i}"' for i in range(1, count + 1))
+    style = "Keep each explanation to two sentences. " if brief else ""
+    return ChatPromptTemplate.from_messages([
+        ("system", f"You are Emily, a warm expert marketer. Write a beautiful report with exactly {count} unique strategies. "
+                   "Each: **Approach X: Name**\nExplanation in simple language\n*Reference: [Title](URL)*\n\n"
+                   f"{style}End with a motivating conclusion.\n\n"
+                   f"Then, on its own final line, list the {count} strategy names as JSON inside tags, exactly like:\n"
+                   f"<STRATEGIES>{{{{\"strategies\": [{names}]}}}}</STRATEGIES>"),
+        ("human", "Context:\n{ctx}\nSummary: {summary}\nSources:\n{sources_str}")
+    ])
+
+
+_REPORT_PROMPT = _report_prompt(5, brief=False)
+_SHORT_REPORT_PROMPT = _report_prompt(3, brief=True)
+
+
+def _fallback_report(sources: List[Dict]) -> tuple:
+    """No time (or no model) for the report: one approach per top source, so a strategy can still be picked."""
+    picks = sources[:3]
+    if not picks:
+        return "I ran out of time putting your report together — send me any message and I'll pick it back up!", []
+    body = "\n\n".join(
+        f"**Approach {i + 1}: {s['title']}**\nA proven play from {s.get('domain') or source_domain(s['url'])} — "
+        f"pick it and I'll walk you through it step by step.\n*Reference: [{s['title']}]({s['url']})*"
+        for i, s in enumerate(picks)
+    )
+    return f"Here's the short version — the strongest plays I found:\n\n{body}", [s["title"] for s in picks]
+
 
-async def write_report(state: AgentState) -> dict:
+async def write_report(state: AgentState, config: RunnableConfig) -> dict:
     logger.info("--- Node: write_report ---")
     sources = state.get("selected_sources", [])
     summary = state.get("summary_of_findings", "")
@@ -173,29 +381,47 @@ async def write_report(state: AgentState) -> dict:
 
     sources_str = "\n".join([f"{i+1}. [{s['title']}]({s['url']})" for i, s in enumerate(sources)])
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are Emily, a warm expert marketer. Write a beautiful report with exactly 5 unique strategies. "
-                   "Each: **Approach X: Name**\nExplanation in simple language\n*Reference: [Title](URL)*\n\n"
-                   "End with a motivating conclusion."),
-        ("human", "Context:\n{ctx}\nSummary: {summary}\nSources:\n{sources_str}")
-    ])
-    
-    report = await (prompt | llm | StrOutputParser()).ainvoke({"ctx": ctx, "summary": summary, "sources_str": sources_str})
-
-    # Extract strategy titles for selection
-    extract = ChatPromptTemplate.from_messages([
-        ("system", "Extract exactly 5 strategy names as a numbered list."),
-        ("human", report)
-    ])
-    strategies = [s.strip()[s.strip().find(" "):].strip() for s in (await (extract | llm | StrOutputParser()).ainvoke({})).split("\n") if s.strip() and any(c.isdigit() for c in s)]
+    # Short on time → 3 brief strategies instead of 5
+    prompt = _REPORT_PROMPT
+    if tight(REPORT_FULL_BUDGET, config):
+        logger.warning(f"Shortened report, {remaining(config):.1f}s left in the turn")
+        FALLBACKS.labels(node="write_report", reason="deadline_short").inc()
+        prompt = _SHORT_REPORT_PROMPT
+
+    # One round-trip for both the report and the strategy names — none at all once the turn is spent
+    if expired(LLM_STREAM_TIMEOUT, config):
+        logger.warning(f"No time left for the report, {remaining(config):.1f}s left in the turn")
+        FALLBACKS.labels(node="write_report", reason="deadline_fallback").inc()
+        report, strategies = _fallback_report(sources)
+    else:
+        try:
+            raw = await bounded(
+                (prompt | model_for("report") | StrOutputParser()).with_config(tags=[STREAM_TAG]).ainvoke(
+                    {"ctx": ctx, "summary": summary, "sources_str": sources_str}
+                ),
+                LLM_STREAM_TIMEOUT, config,
+            )
+            report, strategies = split_report(raw)
+        except Exception as e:
+            logger.error(f"Report failed: {e}")
+            FALLBACKS.labels(node="write_report", reason="report").inc()
+            report, strategies = _fallback_report(sources)
 
     report += "\n\n**References**\n" + "\n".join([f"- [{s['title']}]({s['url']})" for s in sources])
 
     await adispatch_custom_event("progress", {"step": "Report ready!"})
-    
+
+    # The user picks one of these next — get every guide going while they read
+    if guide_prefetcher.enabled and strategies:
+        product = state.get("product_name")
+        guide_prefetcher.start(_session_id(config), {
+            (product, strategy): (lambda strategy=strategy: prefetch_guide(product, strategy))
+            for strategy in strategies
+        })
+
     return {
         "messages": [AIMessage(content=report)],
-        "strategies": strategies[:5]
+        "strategies": strategies
     }
 
 
@@ -204,8 +430,7 @@ def gather_product_details(state: AgentState) -> dict:
 
 
 def process_more_info(state: AgentState) -> dict:
-    user_msg = state["messages"][-1].content.lower()
-    if any(x in user_msg for x in ["no", "nope", "that's all", "enough", "proceed", "go ahead"]):
+    if FINISHED in classify(state["messages"][-1].content):
         return {
             "asking_more_info": False,
             # "messages": [AIMessage(content="Awesome! Researching the best strategies for you right now... hold tight! 🔍")]
@@ -222,29 +447,98 @@ def select_strategy(state: AgentState) -> dict:
     return {"messages": [AIMessage(content=msg)]}
 
 
-async def guide_strategy(state: AgentState) -> dict:
-    strategy = state["selected_strategy"]
-    product = state["product_name"]
+# ── strategy guide ──────────────────────────────────────
+class GuideResearch(NamedTuple):
+    search_q: str
+    results: List[Dict]
+    guide: Optional[str] = None  # only when PREFETCH_GUIDES=guide
 
-    # Send searching message
-    await adispatch_custom_event("progress", {"step": "searching about the details of that marketing strategy..."})
 
-    search_q = await (ChatPromptTemplate.from_messages([
-        ("system", "Create one perfect search query for a step-by-step guide on this strategy. Output ONLY the query."),
-        ("human", "Product: {product}\nStrategy: {strategy}")
-    ]) | llm | StrOutputParser()).ainvoke({"product": product, "strategy": strategy})
+# Background prefetches run outside the graph — label their LLM calls for the metrics
+_PREFETCH_RUN = {"metadata": {"langgraph_node": "guide_prefetch"}}
 
-    results = tavily_tool.invoke({"query": search_q})
-    if isinstance(results, dict):
-        results = results.get("results", [results])
-        
-    context = "\n".join([f"{r['title']}: {r['content'][:500]}" for r in results[:4]])
 
-    prompt = ChatPromptTemplate.from_messages([
+def _session_id(config: Optional[RunnableConfig]) -> Optional[str]:
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+
+def _guide_chain():
+    return ChatPromptTemplate.from_messages([
         ("system", "Write a clear, friendly step-by-step guide with required documents. Use Markdown."),
         ("human", "Product: {product}\nStrategy: {strategy}\nResearch: {context}")
-    ])
-    guide = await (prompt | llm | StrOutputParser()).ainvoke({"product": product, "strategy": strategy, "context": context})
+    ]) | model_for("guide") | StrOutputParser()
+
+
+def _guide_context(results: List[Dict]) -> str:
+    return "\n".join([f"{r['title']}: {r['content'][:500]}" for r in results[:4]])
+
+
+async def research_guide(product: str, strategy: str, config: Optional[RunnableConfig] = None) -> GuideResearch:
+    """Search query for the strategy's guide, and its search results."""
+    try:
+        search_q = await bounded((ChatPromptTemplate.from_messages([
+            ("system", "Create one perfect search query for a step-by-step guide on this strategy. Output ONLY the query."),
+            ("human", "Product: {product}\nStrategy: {strategy}")
+        ]) | llm_for("guide_query") | StrOutputParser()).ainvoke({"product": product, "strategy": strategy}, config),
+            LLM_CALL_TIMEOUT, config)
+    except Exception as e:
+        logger.error(f"Guide query failed: {e}")
+        FALLBACKS.labels(node="guide_strategy", reason="guide_query").inc()
+        search_q = f"step by step guide {strategy} marketing"
+
+    try:
+        results = await bounded(run_search(tavily_tool, search_q, cache=search_cache), SEARCH_CALL_TIMEOUT, config)
+    except Exception as e:
+        logger.error(f"Guide search failed on '{search_q}': {e}")
+        FALLBACKS.labels(node="guide_strategy", reason="guide_search").inc()
+        results = []
+    return GuideResearch(search_q, results)
+
+
+async def prefetch_guide(product: str, strategy: str) -> GuideResearch:
+    """Speculative guide_strategy work for one strategy, run by guide_prefetcher."""
+    research = await research_guide(product, strategy, _PREFETCH_RUN)
+    if guide_prefetcher.mode != "guide":
+        return research
+    guide = await _guide_chain().ainvoke(
+        {"product": product, "strategy": strategy, "context": _guide_context(research.results)}, _PREFETCH_RUN
+    )
+    return research._replace(guide=guide)
+
+
+async def guide_strategy(state: AgentState, config: RunnableConfig) -> dict:
+    strategy = state["selected_strategy"]
+    product = state["product_name"]
+
+    # A finished prefetch is used however little time is left; one still running is waited
+    # for only for a share of what's left — the live call needs the rest
+    research = guide_prefetcher.take_ready(_session_id(config), (product, strategy))
+    if research is None:
+        wait = min(LLM_STREAM_TIMEOUT, remaining(config) * PREFETCH_MAX_WAIT_SHARE)
+        try:
+            research = await bounded(guide_prefetcher.take(_session_id(config), (product, strategy)), wait, config)
+        except asyncio.TimeoutError:
+            logger.info(f"Prefetch for '{strategy}' not ready in {wait:.1f}s, guiding live")
+            research = None  # the prefetch keeps running for a retry
+    if research is not None and research.guide:
+        logger.info(f"Guide for '{strategy}' served from prefetch")
+        return {"messages": [AIMessage(content=research.guide)], "guided": True}
+
+    if research is None:
+        # Send searching message
+        await adispatch_custom_event("progress", {"step": "searching about the details of that marketing strategy..."})
+        research = await research_guide(product, strategy)
+
+    try:
+        guide = await bounded(_guide_chain().with_config(tags=[STREAM_TAG]).ainvoke(
+            {"product": product, "strategy": strategy, "context": _guide_context(research.results)}
+        ), LLM_STREAM_TIMEOUT, config)
+    except Exception as e:
+        logger.error(f"Guide failed: {e}")
+        FALLBACKS.labels(node="guide_strategy", reason="guide").inc()
+        links = "\n".join(f"- [{r['title']}]({r['url']})" for r in research.results[:4])
+        guide = f"I couldn't finish the full **{strategy}** guide in time — these walk through it step by step:\n\n{links}" \
+            if links else f"I couldn't finish the **{strategy}** guide in time — ask me again and I'll pick it back up!"
 
     return {
         "messages": [AIMessage(content=guide)],
@@ -256,7 +550,9 @@ def check_satisfaction(state: AgentState) -> dict:
     return {"messages": [AIMessage(content="Good to hear that! Is there anything else I can help you with?\n<BUTTONS>Yes,No</BUTTONS>")]}
 
 
-def reset_and_gather(state: AgentState) -> dict:
+def reset_and_gather(state: AgentState, config: RunnableConfig) -> dict:
+    # Guides for the old product's strategies are of no use anymore
+    guide_prefetcher.cancel(_session_id(config))
     return {
         "product_name": None, "product_description": None, "target_audience": None, "primary_goal": None,
         "budget_range": None, "timeline": None, "industry": None, "unique_selling_proposition": None,
@@ -265,18 +561,20 @@ def reset_and_gather(state: AgentState) -> dict:
         "strategies": None, "selected_strategy": None, "guided": None, "satisfaction": None,
         "asking_more_info": False,
         "conversation_phase": "gathering",
-        "messages": state["messages"] + [AIMessage(content="Totally cool! Starting fresh — tell me about your new product! 🚀\n\n<SHOW_PRODUCT_FORM>")]
+        # The old product's conversation shouldn't leak into the new one's prompts
+        "conversation_summary": None, "summarized_messages": len(state["messages"]),
+        "messages": [AIMessage(content="Totally cool! Starting fresh — tell me about your new product! 🚀\n\n<SHOW_PRODUCT_FORM>")]
     }
 
 
 async def correct_product_details(state: AgentState) -> dict:
-    conv = "\n".join([f"{m.type}: {m.content}" for m in state["messages"][-15:]])
+    conv = history_text(state)
     
     try:
-        new_data = await (ChatPromptTemplate.from_messages([
+        new_data = await bounded((ChatPromptTemplate.from_messages([
             ("system", "User is correcting product details. Re-extract ALL fields from latest messages. Output JSON."),
-            ("human", conv)
-        ]) | llm | JsonOutputParser()).ainvoke({})
+            ("human", "{conv}")
+        ]) | llm_for("correction") | JsonOutputParser()).ainvoke({"conv": conv}), LLM_CALL_TIMEOUT)
         
         channels = new_data.get("current_marketing_channels", [])
         if isinstance(channels, str):
@@ -289,13 +587,14 @@ async def correct_product_details(state: AgentState) -> dict:
             "strategies": None,
             "selected_strategy": None,
             "guided": None,
-            "messages": state["messages"] + [AIMessage(content="Thanks for the update! Researching fresh strategies with the new info... 🔄")]
+            "messages": [AIMessage(content="Thanks for the update! Researching fresh strategies with the new info... 🔄")]
         }
     except:
-        return {"messages": state["messages"] + [AIMessage(content="Got the changes! Updating everything now...")]}
+        FALLBACKS.labels(node="correct_product_details", reason="extraction").inc()
+        return {"messages": [AIMessage(content="Got the changes! Updating everything now...")]}
 
 async def extract_initial_product(state: AgentState) -> dict:
-    conv = "\n".join([f"{m.type}: {m.content}" for m in state["messages"]])
+    conv = history_text(state)
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", """Extract product details from the conversation — be extremely forgiving.
@@ -303,7 +602,7 @@ Even if user says "heyy" or "I have a product", extract what you can.
 Output ONLY VALID JSON (no markdown formatting, no ```json wrappers).
 Keys (use null if missing):
 
-{
+{{
   "product_name": str or null,
   "product_description": str or null,
   "target_audience": str or null,
@@ -314,12 +613,12 @@ Keys (use null if missing):
   "unique_selling_proposition": str or null,
   "current_marketing_channels": list or null,
   "geography": str or null
-}"""),
+}}"""),
         ("human", "{conv}")
     ])
 
     try:
-        result = await (prompt | llm | JsonOutputParser()).ainvoke({"conv": conv})
+        result = await bounded((prompt | llm_for("product_extraction") | JsonOutputParser()).ainvoke({"conv": conv}), LLM_CALL_TIMEOUT)
         
         channels = result.get("current_marketing_channels")
         if isinstance(channels, str):
@@ -342,6 +641,7 @@ Keys (use null if missing):
         }
     except Exception as e:
         logger.error(f"Extraction failed: {e}")
+        FALLBACKS.labels(node="manager", reason="product_extraction").inc()
         return {
             "product_name": "Your Product",
             "product_description": "Something cool you're working on",
@@ -350,7 +650,7 @@ Keys (use null if missing):
         }
 
 
-async def manager_node(state: AgentState) -> dict:
+async def manager_node(state: AgentState, config: RunnableConfig) -> dict:
     """
     The brain of the agent. Acts like Grok:
     - Answers ANY question instantly and naturally
@@ -367,98 +667,79 @@ async def manager_node(state: AgentState) -> dict:
         return {}
 
     user_msg = messages[-1].content
-    user_lower = user_msg.lower()
-    
+    # One scan finds every intent below
+    intents = classify(user_msg)
+
     # Current phase
     phase = state.get("conversation_phase", "greeting")
 
     # ── 1. FULL RESET DETECTION ───────────────────────────────
-    # ── 1. FULL RESET DETECTION ───────────────────────────────
-    reset_patterns = [
-        r"start over", r"restart", r"new product", r"different product",
-        r"forget everything", r"begin again", r"new idea", r"wrong product",
-        r"change.*product", r"changing.*product", r"reset",
-        r"chang.*product" # Catch typos like "chainging"
-    ]
-    if any(re.search(p, user_lower) for p in reset_patterns):
-        return reset_and_gather(state)
+    if RESET in intents:
+        return reset_and_gather(state, config)
 
     # ── 2. PRODUCT CORRECTION / UPDATE ────────────────────────
-    correction_phrases = [
-        "actually the product", "wait no", "it's actually", "no it's",
-        "budget is now", "target audience is", "it's for", "we're in",
-        "changed my mind", "actually we target", "usp is", "industry is"
-    ]
-    if any(p in user_lower for p in correction_phrases):
+    if CORRECTION in intents:
         return await correct_product_details(state)
 
     # ── 3. STRATEGY CHANGE (after guide was given) ─────────────
     if state.get("guided") and state.get("selected_strategy"):
-        change_phrases = ["another one", "different strategy", "try number", "what about #", "instead", "not that one", "show me another"]
-        if any(p in user_lower for p in change_phrases) or re.search(r"\b(number|#)\s*\d+", user_msg):
+        if STRATEGY_CHANGE in intents:
             return {
                 "selected_strategy": None,
                 "guided": None,
-                "messages": messages + [AIMessage(content="No problem at all! Which strategy would you like to explore instead? Just say the number or describe what you're feeling!")]
+                "messages": [AIMessage(content="No problem at all! Which strategy would you like to explore instead? Just say the number or describe what you're feeling!")]
             }
 
     # ── 4. STRATEGY SELECTION (Initial) ───────────────────────
     if state.get("strategies") and not state.get("selected_strategy"):
         # Check for number 1-5
-        match = re.search(r"\b([1-5])\b", user_msg)
-        if match:
-            idx = int(match.group(1)) - 1
+        if intents.selection:
+            idx = intents.selection - 1
             if 0 <= idx < len(state["strategies"]):
                 return {"selected_strategy": state["strategies"][idx]}
 
     # ── 1.5 START MARKETING INTENT DETECTION ──────────────────
-    start_patterns = [
-        r"market a product", r"launch a product", r"start marketing",
-        r"create a strategy", r"need a strategy", r"help me market",
-        r"marketing strategy", r"go to form", r"fill form"
-    ]
-    if any(re.search(p, user_lower) for p in start_patterns):
+    if START in intents:
         return {
             "conversation_phase": "gathering",
-            "messages": messages + [AIMessage(content="Awesome! Let's get down to business. Fill in the details below so I can build your strategy:\n\n<SHOW_PRODUCT_FORM>")]
+            "messages": [AIMessage(content="Awesome! Let's get down to business. Fill in the details below so I can build your strategy:\n\n<SHOW_PRODUCT_FORM>")]
         }
 
     # ── 4. NEW FLOW LOGIC ─────────────────────────────────────
     
     # Handle "Hi" / Greeting -> Ask Readiness
-    if phase == "greeting" and any(w in user_lower for w in ["hi", "hello", "hey", "greetings", "start"]):
+    if phase == "greeting" and GREETING in intents:
         return {
             "conversation_phase": "readiness",
-            "messages": messages + [AIMessage(content="Welcome! Good to see you here! I'm your helpful assistant who gives marketing strategies. Are you ready with your product details?\n<BUTTONS>Yes,No</BUTTONS>")]
+            "messages": [AIMessage(content="Welcome! Good to see you here! I'm your helpful assistant who gives marketing strategies. Are you ready with your product details?\n<BUTTONS>Yes,No</BUTTONS>")]
         }
 
     # Handle Readiness Response
     if phase == "readiness":
-        affirmative = ["yes", "yeah", "yep", "sure", "ok", "okay", "certainly", "definitely", "absolutely"]
-        if any(w in user_lower for w in affirmative):
+        if AFFIRMATIVE in intents:
             # User is ready -> Trigger form
             return {
                 "conversation_phase": "gathering",
-                "messages": messages + [AIMessage(content="Great! Please fill your details:\n\n<SHOW_PRODUCT_FORM>")]
+                "messages": [AIMessage(content="Great! Please fill your details:\n\n<SHOW_PRODUCT_FORM>")]
             }
-        elif "no" in user_lower:
+        elif NEGATIVE in intents:
             # User is not ready -> Ask about other topics
             return {
                 "conversation_phase": "exploring",
-                "messages": messages + [AIMessage(content="Okay! Would you like to know about something related to #product or #marketing approach?\n<BUTTONS>Yes,No</BUTTONS>")]
+                "messages": [AIMessage(content="Okay! Would you like to know about something related to #product or #marketing approach?\n<BUTTONS>Yes,No</BUTTONS>")]
             }
 
     # Handle "Exploring" Response
     if phase == "exploring":
-        if "yes" in user_lower:
+        if YES in intents:
              return {
                  "conversation_phase": "general_chat",
-                 "messages": messages + [AIMessage(content="Sure! What would you like to know? Ask me anything about marketing or product strategy.")]
+                 "messages": [AIMessage(content="Sure! What would you like to know? Ask me anything about marketing or product strategy.")]
              }
-        elif "no" in user_lower:
+        elif NEGATIVE in intents:
              return {
                  "conversation_phase": "readiness",
-                 "messages": messages + [AIMessage(content="Alright! Let me know when you're ready to start. Just say 'Hi' or 'Ready'.")]
+                 "messages": [AIMessage(content="Alright! Let me know when you're ready to start. Just say 'Hi' or 'Ready'.")]
              }
 
     # ── 4.5 TRANSITION TO RESEARCH ─────────────────────────────
@@ -490,29 +771,34 @@ Product: {product_name}
 Goal: {primary_goal}
 Audience: {target_audience}
 Budget: {budget_range}
-USP: {unique_selling_proposition}"""),
+USP: {unique_selling_proposition}
+
+Earlier in this conversation: {conversation_summary}"""),
         ("placeholder", "{history}"),
         ("human", "{user_msg}")
     ])
 
-    chain = prompt | llm | StrOutputParser()
+    chain = (prompt | model_for("chat") | StrOutputParser()).with_config(tags=[STREAM_TAG])
 
     try:
         # full_history = "\n".join([f"{m.type}: {m.content}" for m in messages[-10:]])  # last 10 for context
-        response = await chain.ainvoke({
-            "history": messages[-10:],
+        response = await bounded(chain.ainvoke({
+            # The current message goes in separately below
+            "history": history_window(state, exclude_last=True),
+            "conversation_summary": state.get("conversation_summary") or "nothing notable yet",
             "user_msg": user_msg,
             "product_name": state.get("product_name", "your product"),
             "primary_goal": state.get("primary_goal", "growth"),
             "target_audience": state.get("target_audience", "your audience"),
             "budget_range": state.get("budget_range", "your budget"),
             "unique_selling_proposition": state.get("unique_selling_proposition", "what makes it special")
-        })
+        }), LLM_STREAM_TIMEOUT, config)
     except Exception as e:
         logger.error(f"Manager response failed: {e}")
+        FALLBACKS.labels(node="manager", reason="chat_response").inc()
         response = "Haha, you got me for a sec! Anyway — what’s on your mind about your product?"
 
     # Always return as AI message — keeps flow alive
     return {
-        "messages": messages + [AIMessage(content=response)]
+        "messages": [AIMessage(content=response)]
     }
\ No newline at end of file
@@ -0,0 +1,129 @@
+# src/prefetch.py
+import asyncio
+import logging
+import contextvars
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from .config import PREFETCH_GUIDES, PREFETCH_CONCURRENCY, PREFETCH_MAX_SESSIONS
+from .metrics import CACHE_REQUESTS
+
+logger = logging.getLogger("agent.prefetch")
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    # Results nobody takes must not end up as "exception was never retrieved" noise
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Prefetch job failed: {task.exception()}")
+
+
+class SpeculativePrefetcher:
+    """
+    Runs speculative background jobs per session (e.g. the research for every strategy
+    the user might pick) and hands their results to the node that needs them later.
+
+    - at most `concurrency` jobs run at once across all sessions
+    - starting a new batch for a session cancels its previous one; `cancel` drops it on reset
+    - only the newest `max_sessions` sessions keep their jobs / results
+    - jobs run in a fresh context, so they never stream into the current turn's events
+    """
+
+    def __init__(self, mode: str = "off", concurrency: int = 4, max_sessions: int = 200):
+        self.mode = mode
+        self.concurrency = max(1, concurrency)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[Hashable, asyncio.Task]]" = OrderedDict()
+        self._running = set()   # tasks that got a slot — the rest are still queued
+        self._semaphore = None
+        self._loop = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Bound to the serving loop on first use (benchmarks run several loops)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._semaphore = loop, asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def _run(self, job: Callable[[], Awaitable[Any]]) -> Any:
+        async with self._slots():
+            task = asyncio.current_task()
+            self._running.add(task)
+            try:
+                return await job()
+            finally:
+                self._running.discard(task)
+
+    def start(self, session_id: str, jobs: Dict[Hashable, Callable[[], Awaitable[Any]]]) -> None:
+        """Replace the session's jobs with `jobs` (key -> coroutine factory), started in order."""
+        self.cancel(session_id)
+        if not jobs:
+            return
+        tasks = {}
+        for key, job in jobs.items():
+            tasks[key] = asyncio.create_task(self._run(job), context=contextvars.Context())
+            tasks[key].add_done_callback(_retrieve)
+        self._sessions[session_id] = tasks
+        while len(self._sessions) > self.max_sessions:
+            self.cancel(next(iter(self._sessions)))
+        logger.info(f"Prefetching {len(jobs)} job(s) for session {session_id}")
+
+    async def take(self, session_id: Optional[str], key: Hashable) -> Optional[Any]:
+        """
+        The job's result — waiting for it if it's already running. Returns None when there is
+        nothing usable (no job, failed, or still queued behind others: then the caller is
+        faster doing the work itself, and the queued job is dropped).
+        """
+        task = self._sessions.get(session_id, {}).get(key)
+        if task is None or task.cancelled():
+            CACHE_REQUESTS.labels(cache="prefetch", result="miss").inc()
+            return None
+
+        if not task.done() and task not in self._running:
+            task.cancel()
+            del self._sessions[session_id][key]
+            CACHE_REQUESTS.labels(cache="prefetch", result="queued").inc()
+            return None
+
+        try:
+            # Shielded: a cancelled turn shouldn't throw away a result a retry could use
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            result = None
+        except Exception:
+            result = None  # already logged by _retrieve
+
+        CACHE_REQUESTS.labels(cache="prefetch", result="hit" if result is not None else "miss").inc()
+        return result
+
+    def take_ready(self, session_id: Optional[str], key: Hashable) -> Optional[Any]:
+        """The job's result if it has already finished successfully; None without waiting otherwise."""
+        task = self._sessions.get(session_id, {}).get(key)
+        if task is None or not task.done() or task.cancelled() or task.exception() is not None:
+            return None
+        result = task.result()
+        if result is not None:
+            CACHE_REQUESTS.labels(cache="prefetch", result="hit").inc()
+        return result
+
+    def cancel(self, session_id: Optional[str]) -> None:
+        tasks = self._sessions.pop(session_id, None)
+        if not tasks:
+            return
+        pending = [t for t in tasks.values() if not t.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.info(f"Cancelled {len(pending)} prefetch job(s) for session {session_id}")
+
+
+guide_prefetcher = SpeculativePrefetcher(
+    mode=PREFETCH_GUIDES,
+    concurrency=PREFETCH_CONCURRENCY,
+    max_sessions=PREFETCH_MAX_SESSIONS,
+)
@@ -0,0 +1,91 @@
+# src/query_planner.py
+import re
+import logging
+from datetime import datetime
+from typing import List, Sequence
+
+from .cache import normalize_query
+from .config import QUERY_PLANNER_MODE, QUERY_REFINE_MAX_EXTRA
+
+logger = logging.getLogger("agent.query_planner")
+
+QUERY_MAX_WORDS = 16
+_NUMBERING = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def _field(state, name: str, max_words: int = 8) -> str:
+    value = state.get(name) or ""
+    if isinstance(value, list):
+        value = ", ".join(str(v) for v in value)
+    return " ".join(str(value).split()[:max_words]).strip(" .,;")
+
+
+def _join(*parts: str) -> str:
+    return " ".join(" ".join(p for p in parts if p).split()[:QUERY_MAX_WORDS])
+
+
+def dedupe_queries(queries: Sequence[str]) -> List[str]:
+    seen, unique = set(), []
+    for query in queries:
+        key = normalize_query(query)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return unique
+
+
+class QueryPlanner:
+    """
+    Search queries for perform_deep_research. The research prompt fixes their shape —
+    industry + goal + audience, USP + product type + goal, geography + budget/timeline +
+    trends — so "template" fills those in from the profile without an LLM round-trip.
+    "hybrid" searches the templates at once and asks the LLM for queries alongside,
+    searching whichever of its queries are new as soon as they arrive; "llm" asks first.
+    """
+
+    MODES = ("template", "hybrid", "llm")
+
+    def __init__(self, mode: str = "template", max_extra: int = 3):
+        if mode not in self.MODES:
+            logger.warning(f"Unknown query planner mode '{mode}', using templates")
+            mode = "template"
+        self.mode = mode
+        self.max_extra = max_extra
+
+    @property
+    def uses_templates(self) -> bool:
+        return self.mode != "llm"
+
+    @property
+    def refines(self) -> bool:
+        return self.mode == "hybrid"
+
+    def plan(self, state) -> List[str]:
+        industry = _field(state, "industry")
+        goal = _field(state, "primary_goal")
+        audience = _field(state, "target_audience")
+        budget = _field(state, "budget_range", 4)
+        timeline = _field(state, "timeline", 4)
+        usp = _field(state, "unique_selling_proposition")
+        queries = [
+            _join(industry, "marketing strategies", goal and f"for {goal}", audience and f"targeting {audience}"),
+            _join("how to market", _field(state, "product_description", 6) or "a new product",
+                  usp and f"({usp})", goal and f"for {goal}"),
+            _join(_field(state, "geography"), "marketing trends", str(datetime.now().year),
+                  budget and f"{budget} budget", timeline and f"{timeline} campaign"),
+        ]
+        return dedupe_queries(queries)
+
+    @staticmethod
+    def parse(raw: str) -> List[str]:
+        """One query per line; stray numbering / bullets / quotes stripped."""
+        lines = (_NUMBERING.sub("", line).strip().strip('"') for line in raw.splitlines())
+        return [line for line in lines if line][:3]
+
+    def extra(self, planned: Sequence[str], refined: Sequence[str]) -> List[str]:
+        """The LLM's queries that aren't already planned, at most max_extra."""
+        known = {normalize_query(q) for q in planned}
+        return [q for q in dedupe_queries(refined) if normalize_query(q) not in known][:self.max_extra]
+
+
+query_planner = QueryPlanner(QUERY_PLANNER_MODE, QUERY_REFINE_MAX_EXTRA)
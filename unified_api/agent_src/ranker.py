@@ -0,0 +1,131 @@
+# src/ranker.py
+import re
+import logging
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from .search import source_domain
+from .research_store import terms
+from .config import SOURCE_RANKER_MODE, SOURCE_RANKER_TOP_K, SOURCE_MAX_PER_DOMAIN, SOURCE_DOMAIN_WEIGHTS
+
+logger = logging.getLogger("agent.ranker")
+
+# Authority per domain (subdomains included): >0 preferred, <0 avoided, unlisted 0.
+# SOURCE_DOMAIN_WEIGHTS overrides / extends it.
+DOMAIN_WEIGHTS = {
+    "hubspot.com": 1.0, "hbr.org": 1.0, "neilpatel.com": 0.9, "backlinko.com": 0.9,
+    "contentmarketinginstitute.com": 0.8, "growthhackers.com": 0.8, "wordstream.com": 0.8,
+    "thinkwithgoogle.com": 0.8, "mckinsey.com": 0.8, "semrush.com": 0.7, "ahrefs.com": 0.7,
+    "moz.com": 0.7, "sproutsocial.com": 0.6, "marketingweek.com": 0.6, "forbes.com": 0.3,
+    "medium.com": -0.3, "facebook.com": -0.8, "twitter.com": -0.8, "x.com": -0.8,
+    "reddit.com": -1.0, "quora.com": -1.0, "youtube.com": -1.0, "tiktok.com": -1.0, "pinterest.com": -1.0,
+}
+
+# Feature columns and how much each counts
+FEATURES = ("domain", "relevance", "overlap", "listicle", "low_value_path", "homepage")
+FEATURE_WEIGHTS = np.array([1.0, 0.6, 1.2, -0.4, -0.5, -0.3])
+
+_LISTICLE = re.compile(r"\b(?:top|best)\s+\d+\b|\b\d+\s+(?:best|ways|tips|ideas|hacks)\b", re.IGNORECASE)
+_LOW_VALUE_PATH = re.compile(r"/(?:tag|tags|category|forum|forums|questions|watch|r|video|videos|search)(?:/|$)", re.IGNORECASE)
+_CONTEXT_FIELDS = ("industry", "target_audience", "primary_goal", "unique_selling_proposition", "product_description", "geography")
+
+
+def context_terms(state) -> frozenset:
+    """Terms describing the product — the vocabulary a relevant source shares."""
+    text = " ".join(
+        ", ".join(v) if isinstance(v, list) else str(v)
+        for v in (state.get(name) for name in _CONTEXT_FIELDS) if v
+    )
+    return terms(text)
+
+
+class SourceRanker:
+    """
+    Scores research candidates locally: domain authority, the provider's relevance score,
+    term overlap of title + snippet with the product, and penalties for listicles, forum /
+    video / tag pages and bare homepages. "prefilter" sends only the best SOURCE_RANKER_TOP_K
+    to the curation prompt, "replace" picks the sources itself, "llm" leaves it to the LLM.
+    """
+
+    MODES = ("prefilter", "replace", "llm")
+
+    def __init__(self, mode: str = "prefilter", top_k: int = 10, max_per_domain: int = 2,
+                 domain_weights: Optional[Dict[str, float]] = None):
+        if mode not in self.MODES:
+            logger.warning(f"Unknown source ranker mode '{mode}', using prefilter")
+            mode = "prefilter"
+        self.mode = mode
+        self.top_k = top_k
+        self.max_per_domain = max_per_domain
+        self.domain_weights = {**DOMAIN_WEIGHTS, **(domain_weights or {})}
+
+    def domain_weight(self, domain: str) -> float:
+        # blog.hubspot.com → hubspot.com → com
+        parts = domain.split(".")
+        for i in range(len(parts) - 1):
+            weight = self.domain_weights.get(".".join(parts[i:]))
+            if weight is not None:
+                return weight
+        return 0.0
+
+    def features(self, candidates: Sequence[Dict], context: frozenset) -> np.ndarray:
+        rows = []
+        for c in candidates:
+            url = c.get("url", "")
+            path = urlsplit(url).path.strip("/")
+            words = terms(f"{c.get('title', '')} {c.get('snippet', '')}")
+            rows.append((
+                self.domain_weight(source_domain(url)),
+                float(c.get("relevance", 0.5)),
+                len(words & context) / len(context) if context else 0.0,
+                bool(_LISTICLE.search(c.get("title", ""))),
+                bool(_LOW_VALUE_PATH.search("/" + path)),
+                not path,
+            ))
+        return np.array(rows, dtype=float).reshape(len(rows), len(FEATURES))
+
+    def rank(self, candidates: Sequence[Dict], state) -> List[Dict]:
+        """Candidates best first, each with its "score"; at most max_per_domain per domain lead the list."""
+        if not candidates:
+            return []
+        scores = self.features(candidates, context_terms(state)) @ FEATURE_WEIGHTS
+        ranked, overflow, per_domain = [], [], {}
+        for i in np.argsort(-scores, kind="stable"):
+            candidate = {**candidates[i], "score": round(float(scores[i]), 4)}
+            domain = source_domain(candidate.get("url", ""))
+            per_domain[domain] = per_domain.get(domain, 0) + 1
+            (ranked if per_domain[domain] <= self.max_per_domain else overflow).append(candidate)
+        return ranked + overflow
+
+    def select(self, ranked: Sequence[Dict], state, count: int = 7, minimum: int = 5) -> tuple:
+        """(selected_sources, summary_of_findings) without the LLM — for "replace" mode."""
+        context = context_terms(state)
+        picked = [c for c in ranked if c.get("score", 0) > 0][:count]
+        if len(picked) < minimum:
+            picked = list(ranked[:minimum])
+        sources = []
+        for c in picked:
+            title, url = c.get("title", ""), c.get("url", "")
+            domain = source_domain(url)
+            shared = sorted(terms(f"{title} {c.get('snippet', '')}") & context)
+            if self.domain_weight(domain) >= 0.5:
+                why = "Authoritative marketing source"
+            elif shared:
+                why = f"Covers {', '.join(shared[:3])}"
+            else:
+                why = "Top search result"
+            sources.append({"rank": len(sources) + 1, "title": title, "url": url, "domain": domain, "why_relevant": why})
+        domains = ", ".join(dict.fromkeys(s["domain"] for s in sources[:3]))
+        if not sources:
+            return [], "No strong sources found."
+        return sources, f"Leading sources ({domains}) cover: " + "; ".join(s["title"] for s in sources[:3]) + "."
+
+
+source_ranker = SourceRanker(
+    mode=SOURCE_RANKER_MODE,
+    top_k=SOURCE_RANKER_TOP_K,
+    max_per_domain=SOURCE_MAX_PER_DOMAIN,
+    domain_weights=SOURCE_DOMAIN_WEIGHTS,
+)
@@ -0,0 +1,188 @@
+# src/research_store.py
+import re
+import hashlib
+import logging
+from typing import Dict, FrozenSet, NamedTuple, Optional
+
+from .cache import LRUCache, budget_bucket, normalize_query
+from .metrics import CACHE_REQUESTS
+from .config import (
+    RESEARCH_REUSE_ENABLED,
+    RESEARCH_REUSE_THRESHOLD,
+    RESEARCH_REUSE_TTL,
+    RESEARCH_REUSE_MAX_ENTRIES,
+)
+
+logger = logging.getLogger("agent.research_store")
+
+# How much each profile field counts towards similarity; the budget bucket must match exactly
+# (a different geography or audience alone keeps a profile below the default threshold)
+PROFILE_WEIGHTS = {"industry": 0.3, "target_audience": 0.25, "primary_goal": 0.2, "geography": 0.25}
+# Profiles with fewer filled-in fields say too little to share research
+MIN_PROFILE_FIELDS = 2
+# Share of a field's weight when both profiles leave it empty (two sparse profiles aren't alike)
+OPEN_FIELD_WEIGHT = 0.5
+# Stored queries / findings mention the product that was researched — swapped for the new one on reuse
+PRODUCT_PLACEHOLDER = "{product}"
+
+_STOPWORDS = {"a", "an", "and", "the", "of", "for", "in", "on", "to", "with", "our", "my", "who", "that", "by", "at"}
+_SUFFIXES = ("ation", "ing", "ers", "er", "ate", "ed", "s")
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping — "generate leads" and "lead generation" share their terms."""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(text: str) -> FrozenSet[str]:
+    return frozenset(_stem(w) for w in normalize_query(text).split() if w not in _STOPWORDS)
+
+
+class ProductProfile(NamedTuple):
+    fields: Dict[str, str]   # normalized text per PROFILE_WEIGHTS field ("" if missing)
+    budget: str
+
+    @classmethod
+    def of(cls, state) -> "ProductProfile":
+        fields = {}
+        for name in PROFILE_WEIGHTS:
+            value = state.get(name) or ""
+            fields[name] = normalize_query(", ".join(value) if isinstance(value, list) else str(value))
+        return cls(fields, budget_bucket(state.get("budget_range")))
+
+    @property
+    def informative(self) -> bool:
+        return sum(bool(v) for v in self.fields.values()) >= MIN_PROFILE_FIELDS
+
+    @property
+    def key(self) -> str:
+        raw = "\x00".join([self.budget] + [self.fields[name] for name in PROFILE_WEIGHTS])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def terms(self) -> Dict[str, FrozenSet[str]]:
+        return {name: terms(text) for name, text in self.fields.items() if text}
+
+
+def _similarity(a: Dict[str, FrozenSet[str]], b: Dict[str, FrozenSet[str]]) -> float:
+    """Weighted per-field cosine of the term sets."""
+    score = 0.0
+    for name, weight in PROFILE_WEIGHTS.items():
+        if name not in a and name not in b:
+            score += weight * OPEN_FIELD_WEIGHT   # both left it open: weak evidence only
+        elif a.get(name) and b.get(name):
+            score += weight * len(a[name] & b[name]) / (len(a[name]) * len(b[name])) ** 0.5
+    return score
+
+
+def _mask(text: str, product: Optional[str]) -> str:
+    # Whole words only: product "Go" mustn't turn "Google Ads" into "{product}ogle Ads"
+    if not product:
+        return text
+    return re.sub(rf"(?<!\w){re.escape(product)}(?!\w)", PRODUCT_PLACEHOLDER, text, flags=re.IGNORECASE)
+
+
+def _unmask(text: str, product: Optional[str]) -> str:
+    return text.replace(PRODUCT_PLACEHOLDER, product or "your product")
+
+
+class ResearchStore:
+    """
+    In-process index of completed research by product profile. Lookup tries the exact
+    profile first, then the most similar fresh profile in the same budget bucket.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, threshold: float, enabled: bool = True):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.local = LRUCache(max_entries, ttl)     # profile key -> research
+        self._profiles: Dict[str, tuple] = {}       # profile key -> (budget bucket, field terms)
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _nearest(self, profile: ProductProfile) -> tuple:
+        profile_terms = profile.terms()
+        best_key, best_score = None, 0.0
+        for key, (budget, entry_terms) in self._profiles.items():
+            if budget != profile.budget:
+                continue
+            score = _similarity(profile_terms, entry_terms)
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def lookup(self, state) -> Optional[dict]:
+        """Research state update for `state`'s product, or None when nothing close enough is fresh."""
+        if not self.enabled:
+            return None
+        profile = ProductProfile.of(state)
+        if not profile.informative:
+            return None
+
+        entry = self.local.get(profile.key)
+        result = "hit"
+        if entry is None:
+            key, score = self._nearest(profile)
+            if key is not None and score >= self.threshold:
+                entry = self.local.get(key)
+                if entry is None:
+                    self._profiles.pop(key, None)  # expired / evicted
+                else:
+                    result = "similar_hit"
+                    logger.info(f"Reusing research for a profile {score:.2f} similar")
+
+        if entry is None:
+            self.misses += 1
+            CACHE_REQUESTS.labels(cache="research", result="miss").inc()
+            return None
+        if result == "hit":
+            self.hits += 1
+        else:
+            self.similar_hits += 1
+        CACHE_REQUESTS.labels(cache="research", result=result).inc()
+
+        product = state.get("product_name")
+        return {
+            "research_queries_used": [_unmask(q, product) for q in entry["queries"]],
+            "selected_sources": [dict(s) for s in entry["sources"]],
+            "summary_of_findings": _unmask(entry["summary"], product),
+        }
+
+    def add(self, state, research: dict) -> None:
+        if not self.enabled:
+            return
+        profile = ProductProfile.of(state)
+        if not profile.informative or not research.get("selected_sources"):
+            return
+        product = state.get("product_name")
+        self.local.set(profile.key, {
+            "queries": [_mask(q, product) for q in research.get("research_queries_used") or []],
+            "sources": [dict(s) for s in research["selected_sources"]],
+            "summary": _mask(research.get("summary_of_findings") or "", product),
+        })
+        self._profiles[profile.key] = (profile.budget, profile.terms())
+        # The LRU may have dropped entries — keep the index from outgrowing it
+        if len(self._profiles) > 2 * self.local.max_entries:
+            self._profiles = {k: v for k, v in self._profiles.items() if self.local.get(k) is not None}
+
+    def stats(self) -> dict:
+        total = self.hits + self.similar_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.local),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.similar_hits) / total, 3) if total else 0.0,
+        }
+
+
+research_store = ResearchStore(
+    max_entries=RESEARCH_REUSE_MAX_ENTRIES,
+    ttl=RESEARCH_REUSE_TTL,
+    threshold=RESEARCH_REUSE_THRESHOLD,
+    enabled=RESEARCH_REUSE_ENABLED,
+)
@@ -0,0 +1,196 @@
+# src/search.py
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Dict, Optional, Sequence, AsyncIterator, Tuple
+from urllib.parse import urlsplit
+
+from .metrics import SEARCH_DURATION, SEARCH_ERRORS
+
+logger = logging.getLogger("agent.search")
+
+
+def normalize_results(results) -> List[Dict]:
+    """Tavily returns either a list of hits or a dict wrapping them — always hand back a list."""
+    if isinstance(results, dict):
+        results = results.get("results", [results])
+    return list(results or [])
+
+
+async def run_search(tool, query: str, cache=None, bypass_cache: bool = False, cache_only: bool = False) -> List[Dict]:
+    """Run one search without blocking the event loop, answering from `cache` when possible
+    (`cache_only`: nothing if it isn't cached — for when there's no time left to search)."""
+    max_results = getattr(tool, "max_results", None)
+    if cache is not None and not bypass_cache:
+        cached = await cache.get(query, max_results)
+        if cached is not None:
+            logger.info(f"Search cache hit: {query[:70]}")
+            return cached
+    if cache_only:
+        return []
+
+    start = time.perf_counter()
+    try:
+        results = normalize_results(await tool.ainvoke({"query": query}))
+    except Exception:
+        SEARCH_ERRORS.inc()
+        raise
+    finally:
+        SEARCH_DURATION.observe(time.perf_counter() - start)
+    if cache is not None:
+        await cache.set(query, max_results, results)
+    return results
+
+
+async def search_many(tool, queries: Sequence[str], cache=None, bypass_cache: bool = False,
+                      cache_only: bool = False) -> AsyncIterator[Tuple[int, str, List[Dict], Exception]]:
+    """
+    Fan out all queries at once and yield (index, query, results, error) as each one completes.
+    A failed search yields an empty result list plus the exception instead of aborting the others.
+    """
+    async def _one(idx: int, query: str):
+        try:
+            return idx, query, await run_search(tool, query, cache, bypass_cache, cache_only), None
+        except Exception as e:
+            return idx, query, [], e
+
+    tasks = [asyncio.create_task(_one(i, q)) for i, q in enumerate(queries)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Caller stopped early (or was cancelled) → don't leave searches running
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+
+# ==================== RESEARCH PIPELINE ====================
+
+def canonical_url(url: str) -> str:
+    """Dedup key: scheme, "www.", fragment and trailing slash don't make a different page."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    host = host[4:] if host.startswith("www.") else host
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+
+def source_domain(url: str) -> str:
+    """"https://www.blog.HubSpot.com:443/x" → "blog.hubspot.com"; "unknown" if there's no host."""
+    host = (urlsplit(url.strip()).hostname or "") if url else ""
+    return (host[4:] if host.startswith("www.") else host) or "unknown"
+
+
+def result_score(item: Dict, rank: int) -> float:
+    """Cheap local ranking: the provider's relevance score, nudged by the hit's rank in its query."""
+    try:
+        relevance = float(item.get("score", 0.5))
+    except (TypeError, ValueError):
+        relevance = 0.5
+    return relevance + 0.1 / (rank + 1)
+
+
+_DONE = object()
+
+
+class ResearchPipeline:
+    """
+    Search results flow through a queue as each search lands: dedupe by URL → local score →
+    candidate pool. `stream()` yields every search as it arrives and stops as soon as the pool
+    is sufficient (min_candidates from at least min_searches searches), every search is in,
+    or the deadline passes — slow searches are then cancelled instead of awaited.
+    """
+
+    def __init__(
+        self,
+        min_candidates: int,
+        min_searches: int,
+        deadline: float,
+        scorer: Callable[[Dict, int], float] = result_score,
+    ):
+        self.min_candidates = min_candidates
+        self.min_searches = min_searches
+        self.deadline = deadline
+        self.scorer = scorer
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.candidates: List[Dict] = []
+        self.searches_done = 0
+        self.timed_out = False   # the deadline passed before the pool was sufficient
+        self.dropped = False     # searches were still running when curation started
+        self._seen = set()
+        self._producers: List[asyncio.Task] = []
+        self._finished = 0
+        self._started = time.perf_counter()
+
+    # ── producers ─────────────────────────────────────────────
+    def start(self, producer: Awaitable) -> None:
+        """Run `producer` (it calls feed()) in the background; the stream waits for it unless cut off."""
+        async def run():
+            try:
+                await producer
+            finally:
+                self.queue.put_nowait(_DONE)
+        self._producers.append(asyncio.create_task(run()))
+
+    async def feed(self, tool, queries: Sequence[str], cache=None, cache_only: bool = False) -> None:
+        async for _, query, results, error in search_many(tool, queries, cache=cache, cache_only=cache_only):
+            self.queue.put_nowait((query, results, error))
+
+    def search(self, tool, queries: Sequence[str], cache=None, cache_only: bool = False) -> None:
+        self.start(self.feed(tool, queries, cache, cache_only))
+
+    # ── consumer ──────────────────────────────────────────────
+    def _add(self, results: List[Dict]) -> None:
+        for rank, item in enumerate(results):
+            url = item.get("url")
+            key = canonical_url(url) if url else None
+            if not key or key in self._seen:
+                continue
+            self._seen.add(key)
+            self.candidates.append({
+                "title": item.get("title", "No title"),
+                "url": url,
+                "snippet": item.get("content", "")[:1000],
+                "relevance": item.get("score", 0.5),
+                "score": self.scorer(item, rank),
+            })
+
+    @property
+    def sufficient(self) -> bool:
+        return len(self.candidates) >= self.min_candidates and self.searches_done >= self.min_searches
+
+    async def stream(self) -> AsyncIterator[Tuple[str, List[Dict], Optional[Exception]]]:
+        """(query, results, error) per search as it lands, until the pool is sufficient, all are in, or time's up."""
+        try:
+            while self._finished < len(self._producers) and not self.sufficient:
+                remaining = self._started + self.deadline - time.perf_counter()
+                try:
+                    item = self.queue.get_nowait() if not self.queue.empty() else \
+                        await asyncio.wait_for(self.queue.get(), max(0.0, remaining))
+                except asyncio.TimeoutError:
+                    self.timed_out = True
+                    logger.warning(f"Research deadline ({self.deadline}s) hit after {self.searches_done} searches")
+                    break
+                if item is _DONE:
+                    self._finished += 1
+                    continue
+                query, results, error = item
+                self.searches_done += 1
+                self._add(results)
+                yield query, results, error
+        finally:
+            await self.aclose()
+
+    def top(self, k: int) -> List[Dict]:
+        """Best k candidates by local score (arrival order breaks ties)."""
+        return sorted(self.candidates, key=lambda c: -c["score"])[:k]
+
+    async def aclose(self) -> None:
+        """Cancel the searches still running — curation goes ahead without them."""
+        pending = [t for t in self._producers if not t.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            self.dropped = True
+            await asyncio.gather(*pending, return_exceptions=True)
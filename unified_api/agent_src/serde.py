@@ -0,0 +1,136 @@
+# src/serde.py
+import zlib
+import base64
+import logging
+from typing import Any, Optional, Tuple
+
+import orjson
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+except ImportError:  # zlib is always there
+    zstandard = None
+
+logger = logging.getLogger("agent.serde")
+
+
+# ==================== CODECS ====================
+
+class ZstdCodec:
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+class ZlibCodec:
+    name = "zlib"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+def get_codec(name: str, level: Optional[int] = None):
+    """Codec for `name` ("zstd" | "zlib" | "none"); zstd falls back to zlib when zstandard isn't installed."""
+    if name in ("none", "", None):
+        return None
+    if name == "zstd":
+        if zstandard is not None:
+            return ZstdCodec(level if level is not None else 3)
+        logger.warning("zstandard is not installed — compressing checkpoints with zlib instead")
+        name = "zlib"
+    if name == "zlib":
+        return ZlibCodec(level if level is not None else 6)
+    raise ValueError(f"Unknown checkpoint compression: {name}")
+
+
+# Decoding must work whatever codec wrote the data
+_DECODERS = {"zlib": ZlibCodec()}
+if zstandard is not None:
+    _DECODERS["zstd"] = ZstdCodec()
+
+
+def _decompress(codec_name: str, data: bytes) -> bytes:
+    try:
+        return _DECODERS[codec_name].decompress(data)
+    except KeyError:
+        raise ValueError(f"Checkpoint was written with '{codec_name}', which isn't available here")
+
+
+# ==================== SERIALIZER ====================
+
+class CompactSerializer(SerializerProtocol):
+    """
+    Wraps the checkpointer's serializer (msgpack by default) and compresses any
+    payload of at least `min_bytes`. The codec is appended to the type tag
+    ("msgpack+zstd"), so small values and data written before compression was
+    enabled load unchanged.
+    """
+
+    def __init__(self, inner: Optional[SerializerProtocol] = None, codec=None, min_bytes: int = 1024):
+        self.inner = inner or JsonPlusSerializer()
+        self.codec = codec
+        self.min_bytes = min_bytes
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if self.codec is None or len(data) < self.min_bytes:
+            return type_, data
+        packed = self.codec.compress(data)
+        if len(packed) >= len(data):
+            return type_, data
+        return f"{type_}+{self.codec.name}", packed
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if "+" in type_:
+            type_, codec_name = type_.rsplit("+", 1)
+            payload = _decompress(codec_name, payload)
+        return self.inner.loads_typed((type_, payload))
+
+    def __getattr__(self, name):
+        # Savers sometimes reach for serializer-specific helpers (e.g. the reviver)
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+
+# ==================== JSON DOCUMENTS (Redis) ====================
+# The Redis saver keeps channel values inline in a RedisJSON document, so big
+# values are swapped for a JSON-safe marker holding the compressed bytes.
+
+COMPACT_MARKER = "__compact__"
+
+
+def pack_json_value(value: Any, codec, min_bytes: int) -> Any:
+    if codec is None or isinstance(value, (bool, int, float)) or value is None:
+        return value
+    raw = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    if len(raw) < min_bytes:
+        return value
+    packed = codec.compress(raw)
+    if len(packed) >= len(raw):
+        return value
+    return {COMPACT_MARKER: codec.name, "data": base64.b64encode(packed).decode()}
+
+
+def is_packed(value: Any) -> bool:
+    return isinstance(value, dict) and COMPACT_MARKER in value and len(value) == 2
+
+
+def unpack_json_value(value: dict) -> Any:
+    return orjson.loads(_decompress(value[COMPACT_MARKER], base64.b64decode(value["data"])))
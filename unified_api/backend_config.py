@@ -9,6 +9,9 @@ class Backend_config:
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
     SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    SUPABASE_TIMEOUT: float = float(os.getenv("SUPABASE_TIMEOUT", 10))
+    SUPABASE_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_MAX_CONNECTIONS", 20))
+    AUTH_DB_BACKEND: str = os.getenv("AUTH_DB_BACKEND", "supabase").lower()  # supabase | memory
 
     # JWT
     SECRET_KEY = os.getenv("SECRET_KEY")
@@ -16,6 +19,13 @@ class Backend_config:
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
     RESET_TOKEN_EXPIRE_HOURS: int = 1
 
+    # Password hashing (bcrypt runs in a worker pool)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    BCRYPT_MIN_ROUNDS: int = int(os.getenv("BCRYPT_MIN_ROUNDS", 10))  # used while above PASSWORD_HASH_BURST_RATE
+    PASSWORD_HASH_BURST_RATE: float = float(os.getenv("PASSWORD_HASH_BURST_RATE", 20))  # auth ops/sec
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
     # Email
     SMTP_SERVER = os.getenv("SMTP_SERVER")
     SMTP_PORT = os.getenv("SMTP_PORT")
@@ -23,6 +33,16 @@ class Backend_config:
     SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
     SENDER_EMAIL = os.getenv("SENDER_EMAIL")
     SENDER_NAME = os.getenv("SENDER_NAME")
+    EMAIL_BACKEND: str = os.getenv("EMAIL_BACKEND", "smtp").lower()  # smtp | debug
+    EMAIL_WORKERS: int = int(os.getenv("EMAIL_WORKERS", 2))  # = long-lived SMTP connections
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", 20))
+    EMAIL_MAX_RETRIES: int = int(os.getenv("EMAIL_MAX_RETRIES", 3))
+    EMAIL_RETRY_BACKOFF: float = float(os.getenv("EMAIL_RETRY_BACKOFF", 2.0))
+    EMAIL_QUEUE_SIZE: int = int(os.getenv("EMAIL_QUEUE_SIZE", 1000))
+    EMAIL_IDLE_TIMEOUT: float = float(os.getenv("EMAIL_IDLE_TIMEOUT", 60))
+    EMAIL_DRAIN_TIMEOUT: float = float(os.getenv("EMAIL_DRAIN_TIMEOUT", 20))  # shutdown: max wait for queued mail + retries
+    EMAIL_DEBUG_OUTBOX: int = int(os.getenv("EMAIL_DEBUG_OUTBOX", 100))  # debug backend: newest messages kept
+    SMTP_TIMEOUT: float = float(os.getenv("SMTP_TIMEOUT", 30))
 
     # Frontend
     FRONTEND_URL: Optional[str] = "http://localhost:5173"
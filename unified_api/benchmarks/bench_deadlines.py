@@ -0,0 +1,172 @@
+"""
+Turn latency under a slow provider tail, through the real /api/agent/chat stream.
+
+Sessions run the full conversation (greeting → form → research → report → pick → guide)
+against fakes where a share of LLM calls and searches take --tail-latency longer. Every
+turn goes through routes.agent.chat_endpoint, so the per-turn budget, per-call timeouts,
+degraded modes and the hard stop are all the production code. Fails when a turn overruns
+the budget or ends without a response, or when a finished guide prefetch goes unused
+because too little of the turn was left to wait for it.
+
+    python benchmarks/bench_deadlines.py --budget 8 --sessions 10 --tail-rate 0.2 --tail-latency 30
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import warnings
+from collections import Counter
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("TAVILY_API_KEY", "bench")
+os.environ["USE_REDIS"] = "false"
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--budget", type=float, default=8, help="TURN_BUDGET_SECONDS")
+parser.add_argument("--sessions", type=int, default=10)
+parser.add_argument("--llm-latency", type=float, default=0.3)
+parser.add_argument("--search-latency", type=float, default=0.5)
+parser.add_argument("--tail-rate", type=float, default=0.2, help="share of calls hit by the tail")
+parser.add_argument("--tail-latency", type=float, default=30, help="extra seconds for a tail call")
+parser.add_argument("--prefetch", choices=("off", "research", "guide"), default="off",
+                    help="guide prefetch mode (the picked guide may still be prefetching)")
+parser.add_argument("--seed", type=int, default=7)
+args = parser.parse_args()
+
+# Config is read at import: scale the turn budget and the degrade thresholds together
+os.environ["TURN_BUDGET_SECONDS"] = str(args.budget)
+os.environ.setdefault("TURN_HARD_STOP_GRACE", "1")
+os.environ.setdefault("RESEARCH_FULL_BUDGET", str(args.budget * 0.45))
+os.environ.setdefault("RESEARCH_CACHED_BUDGET", str(args.budget * 0.2))
+os.environ.setdefault("REPORT_FULL_BUDGET", str(args.budget * 0.35))
+os.environ.setdefault("LLM_CALL_TIMEOUT", str(args.budget * 0.3))
+os.environ.setdefault("LLM_STREAM_TIMEOUT", str(args.budget * 0.6))
+os.environ.setdefault("SEARCH_CALL_TIMEOUT", str(args.budget * 0.25))
+os.environ.setdefault("RESEARCH_SEARCH_DEADLINE", str(args.budget * 0.25))
+
+from langchain_core.runnables import RunnableLambda
+
+from agent_src import nodes
+from agent_src.cache import search_cache, llm_cache
+from agent_src.config import TURN_HARD_STOP_GRACE
+from agent_src.metrics import FALLBACKS, CACHE_REQUESTS
+from agent_src.models import ChatRequest
+from agent_src.research_store import research_store
+from agent_src.prefetch import guide_prefetcher
+from agent_src.deadline import DEADLINE_KEY
+from agent_src.config import DEADLINE_MIN_CALL_TIMEOUT
+from routes.agent import chat_endpoint
+from benchmarks.bench_graph import conversation, percentile
+from benchmarks.fakes import FakeChatModel, FakeSearchTool
+
+SLACK = 0.25  # event-loop scheduling and streaming the final lines
+
+
+async def run_turn(session_id: uuid.UUID, text: str) -> dict:
+    start = time.perf_counter()
+    response = await chat_endpoint(ChatRequest(message=text, session_id=session_id))
+    lines = [json.loads(chunk) async for chunk in response.body_iterator]
+    finals = [line for line in lines if "response" in line]
+    return {
+        "seconds": time.perf_counter() - start,
+        "answered": bool(finals),
+        "hard_stop": any(line.get("error") == "deadline exceeded" for line in finals),
+    }
+
+
+async def run_session(session_no: int, turns: list) -> None:
+    session_id = uuid.uuid4()
+    for text in conversation(session_no):
+        turns.append(await run_turn(session_id, text))
+
+
+async def finished_prefetch_used() -> bool:
+    """A guide prefetched in full is served even when the turn has no time left to wait."""
+    mode, guide_prefetcher.mode = guide_prefetcher.mode, "guide"
+    key = ("Prefetched", "SEO")
+
+    async def job():
+        return nodes.GuideResearch("q", [], "prefetched guide")
+
+    guide_prefetcher.start("finished-prefetch", {key: job})
+    await asyncio.sleep(0.01)
+    config = {"configurable": {"thread_id": "finished-prefetch",
+                               DEADLINE_KEY: time.monotonic() + DEADLINE_MIN_CALL_TIMEOUT}}
+    state = {"selected_strategy": key[1], "product_name": key[0]}
+    try:
+        result = await RunnableLambda(nodes.guide_strategy).ainvoke(state, config)
+    finally:
+        guide_prefetcher.cancel("finished-prefetch")
+        guide_prefetcher.mode = mode
+    return result["messages"][0].content == "prefetched guide"
+
+
+def counts(counter, *labels: str, **match: str) -> Counter:
+    found = Counter()
+    for metric in counter.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_total") and sample.value and \
+                    all(sample.labels.get(k) == v for k, v in match.items()):
+                found["/".join(sample.labels[label] for label in labels)] += int(sample.value)
+    return found
+
+
+async def main() -> int:
+    random.seed(args.seed)
+    nodes.llm = nodes.fast_llm = FakeChatModel(
+        latency=args.llm_latency, tail_latency=args.tail_latency, tail_rate=args.tail_rate
+    )
+    nodes.tavily_tool = FakeSearchTool(
+        latency=args.search_latency, tail_latency=args.tail_latency, tail_rate=args.tail_rate
+    )
+    search_cache.enabled = llm_cache.enabled = research_store.enabled = False
+    guide_prefetcher.mode = args.prefetch
+
+    turns = []
+    await asyncio.gather(*[run_session(i, turns) for i in range(args.sessions)])
+
+    times = [t["seconds"] for t in turns]
+    limit = args.budget + TURN_HARD_STOP_GRACE
+    print(f"{len(turns)} turns, budget {args.budget}s (+{TURN_HARD_STOP_GRACE}s grace), "
+          f"tail: {args.tail_rate:.0%} of calls +{args.tail_latency}s")
+    print(f"turn latency  p50 {percentile(times, 50):.2f}s  p95 {percentile(times, 95):.2f}s  "
+          f"p99 {percentile(times, 99):.2f}s  max {max(times):.2f}s")
+    print(f"hard stops: {sum(t['hard_stop'] for t in turns)}")
+    print("degraded / fallbacks:")
+    for name, count in sorted(counts(FALLBACKS, "node", "reason").items()):
+        print(f"  {name:<44}{count:>5}")
+    if guide_prefetcher.enabled:
+        taken = counts(CACHE_REQUESTS, "result", cache="prefetch")
+        print("prefetch: " + ", ".join(f"{name} {count}" for name, count in sorted(taken.items())))
+
+    # The hard stop is only a safety net: no call may start or run past the budget itself
+    failures = 0
+    over = [t for t in times if t > args.budget + SLACK]
+    if over:
+        print(f"  FAIL: {len(over)} turn(s) overran the {args.budget}s budget (worst {max(over):.2f}s)")
+        failures += 1
+    cut = [t for t in times if t > limit + SLACK]
+    if cut:
+        print(f"  FAIL: {len(cut)} turn(s) outlived the {limit}s hard stop")
+        failures += 1
+    unanswered = sum(not t["answered"] for t in turns)
+    if unanswered:
+        print(f"  FAIL: {unanswered} turn(s) ended without a response")
+        failures += 1
+    if not await finished_prefetch_used():
+        print("  FAIL: a finished prefetch was dropped for lack of time to wait for it")
+        failures += 1
+    print(f"\n{'OK' if not failures else f'{failures} FAILURE(S)'}")
+    return failures
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    sys.exit(1 if asyncio.run(main()) else 0)
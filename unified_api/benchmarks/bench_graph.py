@@ -0,0 +1,199 @@
+"""
+End-to-end latency benchmark for agent_src.graph.app with Groq and Tavily swapped for fakes.
+
+Drives N concurrent sessions through a full conversation
+(greeting → readiness → form → research → report → selection → guide) via astream_events,
+and reports per-node wall time, event-loop blocking and throughput.
+
+    python benchmarks/bench_graph.py --sessions 20 --llm-latency 0.3 --search-latency 0.5
+    python benchmarks/bench_graph.py --sessions 1 --think-time 3 --prefetch guide
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+import warnings
+import statistics
+from collections import defaultdict
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Never touch real services from a benchmark
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("TAVILY_API_KEY", "bench")
+os.environ["USE_REDIS"] = "false"
+
+from langchain_core.messages import HumanMessage
+
+from agent_src import nodes
+from agent_src.graph import app as graph_app
+from agent_src.cache import search_cache, llm_cache
+from agent_src.metrics import llm_metrics
+from agent_src.prefetch import guide_prefetcher
+from benchmarks.fakes import FakeChatModel, FakeSearchTool
+
+NODE_NAMES = {
+    "summarize_history", "manager", "gather_product", "process_more_info", "perform_deep_research", "write_report",
+    "select_strategy", "guide_strategy", "check_satisfaction", "reset_and_gather", "correct_product_details",
+}
+
+
+def conversation(session_no: int, extra_turns: int = 0) -> list:
+    """
+    User turns of one full session; the product differs per session so caches don't answer everything.
+    `extra_turns` free-form questions after the guide make the session long.
+    """
+    return [
+        "Hi",
+        "Yes",
+        f"Product Name: Widget {session_no}\n"
+        f"Product Description: An AI gadget (model {session_no}) that helps remote workers plan their day\n"
+        "Target Audience: Remote workers\nPrimary Goal: 20% sales growth\nBudget Range: 5k-10k\n"
+        "Timeline: 3 months\nIndustry: Tech\nUSP: long battery\n"
+        "Current Marketing Channels: Instagram, SEO\nGeography: USA",
+        "2",
+    ] + [f"Question {i}: how would you adapt approach {i % 5 + 1} for a smaller budget?" for i in range(extra_turns)]
+
+
+class LoopLagMonitor:
+    """Wakes up every `interval` seconds; any extra delay is time the event loop was blocked."""
+
+    def __init__(self, interval: float = 0.01, threshold: float = 0.005):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - start - self.interval
+            if lag > self.threshold:
+                self.lags.append(lag)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    @property
+    def blocked(self) -> float:
+        return sum(self.lags)
+
+
+async def run_turn(session_id: str, text: str, node_times: dict, events_version: str) -> dict:
+    """One user message through the graph; returns timing for the turn."""
+    config = {"configurable": {"thread_id": session_id}}
+    started = {}
+    first_token = None
+    t0 = time.perf_counter()
+    async for event in graph_app.astream_events({"messages": [HumanMessage(content=text)]}, config, version=events_version):
+        kind = event["event"]
+        if kind == "on_chat_model_stream" and first_token is None and nodes.STREAM_TAG in event.get("tags", []):
+            first_token = time.perf_counter() - t0
+        elif event["name"] in NODE_NAMES:
+            if kind == "on_chain_start":
+                started[event["run_id"]] = time.perf_counter()
+            elif kind == "on_chain_end" and event["run_id"] in started:
+                node_times[event["name"]].append(time.perf_counter() - started.pop(event["run_id"]))
+    return {"total": time.perf_counter() - t0, "first_token": first_token}
+
+
+async def run_session(session_no: int, node_times: dict, turn_times: list, first_tokens: list, events_version: str, extra_turns: int, think_time: float = 0.0):
+    session_id = f"bench-{session_no}-{uuid.uuid4().hex[:6]}"
+    for i, text in enumerate(conversation(session_no, extra_turns)):
+        if i and think_time:
+            # The user reading the last answer — time speculative work can use
+            await asyncio.sleep(think_time)
+        turn = await run_turn(session_id, text, node_times, events_version)
+        turn_times.append(turn["total"])
+        if turn["first_token"] is not None:
+            first_tokens.append(turn["first_token"])
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(title: str, sessions: int, elapsed: float, node_times: dict, turn_times: list, first_tokens: list, monitor: LoopLagMonitor):
+    print(f"\n==================== {title} ====================")
+    print(f"Sessions: {sessions}   wall: {elapsed:.2f}s   "
+          f"throughput: {sessions / elapsed:.2f} conversations/s, {len(turn_times) / elapsed:.2f} turns/s")
+    print(f"Turn latency   p50 {percentile(turn_times, 50) * 1000:8.1f} ms   p95 {percentile(turn_times, 95) * 1000:8.1f} ms   "
+          f"max {max(turn_times, default=0) * 1000:8.1f} ms")
+    if first_tokens:
+        print(f"First token    p50 {percentile(first_tokens, 50) * 1000:8.1f} ms   p95 {percentile(first_tokens, 95) * 1000:8.1f} ms")
+    print(f"Event loop blocked: {monitor.blocked * 1000:.1f} ms total over {len(monitor.lags)} stalls "
+          f"(worst {max(monitor.lags, default=0) * 1000:.1f} ms)")
+
+    print(f"\n{'node':<26}{'calls':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for name, times in sorted(node_times.items(), key=lambda kv: -sum(kv[1])):
+        print(f"{name:<26}{len(times):>7}{statistics.mean(times) * 1000:>10.1f}"
+              f"{percentile(times, 50) * 1000:>10.1f}{percentile(times, 95) * 1000:>10.1f}{sum(times):>10.2f}")
+
+
+async def bench(sessions: int, llm_latency: float, token_latency: float, search_latency: float, use_cache: bool,
+                events_version: str = "v2", extra_turns: int = 0, think_time: float = 0.0, prefetch: str = "off",
+                query_planner: str = "template"):
+    nodes.llm = nodes.fast_llm = FakeChatModel(latency=llm_latency, token_latency=token_latency, callbacks=[llm_metrics])
+    nodes.tavily_tool = FakeSearchTool(latency=search_latency)
+    search_cache.enabled = use_cache
+    llm_cache.enabled = use_cache
+    guide_prefetcher.mode = prefetch
+    nodes.query_planner.mode = query_planner
+
+    node_times = defaultdict(list)
+    turn_times, first_tokens = [], []
+    monitor = LoopLagMonitor()
+    monitor.start()
+    t0 = time.perf_counter()
+    await asyncio.gather(*[
+        run_session(i, node_times, turn_times, first_tokens, events_version, extra_turns, think_time) for i in range(sessions)
+    ])
+    elapsed = time.perf_counter() - t0
+    await monitor.stop()
+
+    report(
+        f"{sessions} concurrent session(s), llm {llm_latency}s, search {search_latency}s, cache {'on' if use_cache else 'off'}, "
+        f"events {events_version}, prefetch {prefetch}, queries {query_planner}",
+        sessions, elapsed, node_times, turn_times, first_tokens, monitor,
+    )
+    print(f"\nFake LLM calls: {nodes.llm.calls}   fake searches: {nodes.tavily_tool.calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10], help="concurrent sessions (one run per value)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds to first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed tokens")
+    parser.add_argument("--search-latency", type=float, default=0.5, help="seconds per search")
+    parser.add_argument("--cache", action="store_true", help="leave the search / LLM caches enabled")
+    parser.add_argument("--extra-turns", type=int, default=0, help="free-form questions appended to every session")
+    parser.add_argument("--events-version", default="v2", choices=["v1", "v2"], help="astream_events version (routes/agent.py uses v2)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds the user waits before each reply")
+    parser.add_argument("--prefetch", default="off", choices=["off", "research", "guide"], help="speculative guide prefetch mode")
+    parser.add_argument("--query-planner", default="template", choices=["template", "hybrid", "llm"], help="research query planner mode")
+    args = parser.parse_args()
+
+    # v1 is only here to compare against; its deprecation warning is just noise
+    warnings.filterwarnings("ignore", message=".*astream_events version='v1' is deprecated.*")
+    for n in args.sessions:
+        asyncio.run(bench(n, args.llm_latency, args.token_latency, args.search_latency, args.cache,
+                          args.events_version, args.extra_turns, args.think_time, args.prefetch, args.query_planner))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import re
+import sys
+import timeit
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent_src.intents import classify
+
+# Messages as they show up in real sessions: short chat turns plus one product form submission
+MESSAGES = [
+    "Hi",
+    "Hello there!",
+    "yes",
+    "no thanks",
+    "Not that one, try number 3",
+    "number 4 please",
+    "I want to start over with a new product",
+    "wait no, the budget is now $5k",
+    "I'd like to change the product",
+    "changed my mind about the product",
+    "Can you explain approach 2 in more detail? I think it would work well for us but I'm not sure about the budget.",
+    "ok let's go",
+    # Phrases that overlap: each must still be found
+    "surestart marketing",
+    "enoughit's for",
+    "go ahead",
+    "Product Name: SuperWidget\nProduct Description: An AI gadget that helps remote workers manage their day\n"
+    "Target Audience: Remote workers\nPrimary Goal: 20% sales growth\nBudget Range: 5k-10k\nTimeline: 3 months\n"
+    "Industry: Tech\nUSP: long battery\nCurrent Marketing Channels: Instagram, SEO\nGeography: USA",
+]
+
+
+def legacy_classify(user_msg: str):
+    """The keyword cascade manager_node / route_from_manager used before agent_src/intents.py."""
+    u = user_msg.lower()
+    found, selection = set(), None
+    if any(re.search(p, u) for p in [r"start over", r"restart", r"new product", r"different product",
+                                      r"forget everything", r"begin again", r"new idea", r"wrong product",
+                                      r"change.*product", r"changing.*product", r"reset", r"chang.*product"]):
+        found.add("reset")
+    if any(p in u for p in ["actually the product", "wait no", "it's actually", "no it's", "budget is now",
+                            "target audience is", "it's for", "we're in", "changed my mind",
+                            "actually we target", "usp is", "industry is"]):
+        found.add("correction")
+    if any(p in u for p in ["another one", "different strategy", "try number", "what about #", "instead",
+                            "not that one", "show me another"]) or re.search(r"\b(number|#)\s*\d+", user_msg):
+        found.add("strategy_change")
+    match = re.search(r"\b([1-5])\b", user_msg)
+    if match:
+        found.add("selection")
+        selection = int(match.group(1))
+    if any(re.search(p, u) for p in [r"market a product", r"launch a product", r"start marketing",
+                                      r"create a strategy", r"need a strategy", r"help me market",
+                                      r"marketing strategy", r"go to form", r"fill form"]):
+        found.add("start")
+    if any(w in u for w in ["hi", "hello", "hey", "greetings", "start"]):
+        found.add("greeting")
+    if any(w in u for w in ["yes", "yeah", "yep", "sure", "ok", "okay", "certainly", "definitely", "absolutely"]):
+        found.add("affirmative")
+    if "yes" in u:
+        found.add("yes")
+    if "no" in u:
+        found.add("negative")
+    if any(x in u for x in ["no", "nope", "that's all", "enough", "proceed", "go ahead"]):
+        found.add("finished")
+    return found, selection
+
+
+def check_agreement() -> int:
+    mismatches = 0
+    for msg in MESSAGES:
+        old_names, old_selection = legacy_classify(msg)
+        new = classify(msg)
+        if old_names != set(new.names) or old_selection != new.selection:
+            mismatches += 1
+            print(f"MISMATCH {msg[:50]!r}: legacy={sorted(old_names)},{old_selection} new={new}")
+    return mismatches
+
+
+def main(number: int = 5000):
+    mismatches = check_agreement()
+    print(f"Agreement: {len(MESSAGES) - mismatches}/{len(MESSAGES)} messages\n")
+
+    print(f"{'chars':>6} {'legacy µs':>10} {'classify µs':>12} {'speedup':>8}")
+    total_old = total_new = 0.0
+    for msg in MESSAGES:
+        old = timeit.timeit(lambda: legacy_classify(msg), number=number) / number * 1e6
+        new = timeit.timeit(lambda: classify(msg), number=number) / number * 1e6
+        total_old += old
+        total_new += new
+        print(f"{len(msg):>6} {old:>10.2f} {new:>12.2f} {old / new:>7.1f}x")
+    print(f"{'total':>6} {total_old:>10.2f} {total_new:>12.2f} {total_old / total_new:>7.1f}x")
+    return mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main() else 0)
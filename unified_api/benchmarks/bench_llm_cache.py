@@ -0,0 +1,100 @@
+"""
+Semantic LLM cache: which prompts may answer for each other.
+
+Stores the query-generation prompt for one product, then looks up rewordings of it
+(must hit), other products — including ones sharing audience, goal and geography — (must
+miss), the same product in another geography or budget bucket (must miss — these read
+almost alike), and the same product under another chain's system prompt (must miss). Similarities
+are shown for the embedded text and, for reference, for the whole serialized prompt.
+
+    python benchmarks/bench_llm_cache.py --threshold 0.95
+"""
+import os
+import sys
+import argparse
+import warnings
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("TAVILY_API_KEY", "bench")
+os.environ["USE_REDIS"] = "false"
+
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.prompts import ChatPromptTemplate
+
+from agent_src.cache import LLMResponseCache, hashed_embedding, split_prompt, _cosine
+from agent_src.config import LLM_CACHE_SIMILARITY
+from agent_src.nodes import _QUERY_PROMPT
+
+LLM_STRING = "groq:llama-3.1-8b-instant:temperature=0"
+OTHER_CHAIN = ChatPromptTemplate.from_messages([
+    ("system", "User is correcting product details. Re-extract ALL fields from latest messages. Output JSON."),
+    ("human", "{ctx}"),
+])
+
+
+def ctx(product, description, industry, audience, goal, usp, geography, budget="5k-10k", timeline="3 months") -> str:
+    return (f"Product: {product}\nDescription: {description}\nIndustry: {industry}\nTarget Audience: {audience}\n"
+            f"Primary Goal: {goal}\nUSP: {usp}\nGeography: {geography}\nBudget: {budget}\nTimeline: {timeline}")
+
+
+STORED = ctx("FocusPod", "A noise-cancelling desk pod", "Consumer electronics", "Remote workers",
+             "20% sales growth", "Folds flat", "USA")
+# (label, prompt template, context, should hit)
+CASES = [
+    ("same, reworded", _QUERY_PROMPT, ctx("FocusPod", "a noise cancelling desk pod", "consumer electronics",
+                                          "remote workers", "20% sales growth", "folds flat", "USA", "5k - 10k"), True),
+    ("other product, same audience", _QUERY_PROMPT, ctx("SnackBox", "Healthy snack subscription", "Food & beverage",
+                                                        "Remote workers", "20% sales growth", "Zero sugar", "USA"), False),
+    ("other product, same industry", _QUERY_PROMPT, ctx("QuietDesk", "A standing desk with a sound hood",
+                                                        "Consumer electronics", "Remote workers", "20% sales growth",
+                                                        "Folds flat", "USA"), False),
+    ("other product entirely", _QUERY_PROMPT, ctx("DentaBook", "Booking software for dental clinics", "B2B SaaS",
+                                                  "Dentists", "Lead generation", "HIPAA compliant", "Germany"), False),
+    ("same product, other geography", _QUERY_PROMPT, ctx("FocusPod", "A noise-cancelling desk pod", "Consumer electronics",
+                                                         "Remote workers", "20% sales growth", "Folds flat", "Canada"), False),
+    ("same product, other budget", _QUERY_PROMPT, ctx("FocusPod", "A noise-cancelling desk pod", "Consumer electronics",
+                                                      "Remote workers", "20% sales growth", "Folds flat", "USA",
+                                                      "100k"), False),
+    ("same product, other chain", OTHER_CHAIN, STORED, False),
+]
+
+
+def prompt(template, text: str) -> str:
+    return dumps(template.format_messages(ctx=text))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=LLM_CACHE_SIMILARITY)
+    args = parser.parse_args()
+
+    cache = LLMResponseCache(max_entries=100, ttl=600, similarity_threshold=args.threshold)
+    stored = prompt(_QUERY_PROMPT, STORED)
+    cache.update(stored, LLM_STRING, [ChatGeneration(message=AIMessage(content="focuspod queries"))])
+    stored_vec = hashed_embedding(split_prompt(stored)[1])
+
+    failures = 0
+    print(f"threshold {args.threshold}")
+    print(f"{'case':<32}{'embedded':>10}{'whole prompt':>14}  result")
+    for label, template, text, should_hit in CASES:
+        candidate = prompt(template, text)
+        embedded = _cosine(hashed_embedding(split_prompt(candidate)[1]), stored_vec)
+        whole = _cosine(hashed_embedding(candidate), hashed_embedding(stored))
+        hit = cache.lookup(candidate, LLM_STRING) is not None
+        print(f"{label:<32}{embedded:>10.3f}{whole:>14.3f}  {'hit' if hit else 'miss'}")
+        if hit != should_hit:
+            print(f"  FAIL: expected a {'hit' if should_hit else 'miss'}")
+            failures += 1
+
+    print(f"\n{'OK' if not failures else f'{failures} FAILURE(S)'}")
+    return failures
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    sys.exit(1 if main() else 0)
@@ -0,0 +1,123 @@
+"""
+Rate limiter priorities and in-flight coalescing, against the fake LLM.
+
+1. Priority: a burst of research calls saturates the token bucket, then chat calls arrive.
+   Chat must wait far less than research (it jumps the queue).
+2. Coalescing: many identical concurrent prompts must reach the model once; the same
+   prompt with other call options (e.g. `stop`) must not share that request.
+3. Coalesced priority: chat joining a research request still queued behind a research
+   burst must get its answer about as fast as chat on its own.
+
+    python benchmarks/bench_llm_limiter.py --rps 20 --research 40 --chat 5 --duplicates 20
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("TAVILY_API_KEY", "bench")
+os.environ["USE_REDIS"] = "false"
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from agent_src.config import LLM_PRIORITIES
+from agent_src.limiter import PriorityTokenBucket, CoalescingLLM
+from benchmarks.bench_graph import percentile
+from benchmarks.fakes import FakeChatModel
+
+PROMPT = ChatPromptTemplate.from_messages([("system", "You are a helpful assistant."), ("human", "{q}")])
+
+
+async def call(chain, question: str, node: str) -> float:
+    start = time.perf_counter()
+    await chain.ainvoke({"q": question}, {"metadata": {"langgraph_node": node}})
+    return time.perf_counter() - start
+
+
+async def priorities(rps: float, research: int, chat: int) -> int:
+    limiter = PriorityTokenBucket(requests_per_second=rps, max_bucket_size=1, priorities=LLM_PRIORITIES)
+    chain = PROMPT | FakeChatModel(latency=0.05, rate_limiter=limiter) | StrOutputParser()
+
+    research_calls = [asyncio.create_task(call(chain, f"research {i}", "perform_deep_research")) for i in range(research)]
+    await asyncio.sleep(0.2)  # the bucket is drained and research is queued
+    chat_times = await asyncio.gather(*[call(chain, f"chat {i}", "manager") for i in range(chat)])
+    research_times = await asyncio.gather(*research_calls)
+
+    print(f"Priority: {research} research + {chat} chat calls at {rps} req/s")
+    print(f"{'node':<24}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, times in (("perform_deep_research", research_times), ("manager", chat_times)):
+        print(f"{name:<24}{len(times):>7}{percentile(times, 50) * 1000:>10.0f}"
+              f"{percentile(times, 95) * 1000:>10.0f}{max(times) * 1000:>10.0f}")
+
+    # Chat arrives behind the whole research queue; with priority it only waits for the next tokens
+    if max(chat_times) > (chat + 2) / rps + 0.1:
+        print(f"  FAIL: chat waited {max(chat_times):.2f}s behind the research burst")
+        return 1
+    return 0
+
+
+async def coalescing(duplicates: int) -> int:
+    model = FakeChatModel(latency=0.2)
+    chain = PROMPT | CoalescingLLM(model, {}) | StrOutputParser()
+
+    start = time.perf_counter()
+    answers = await asyncio.gather(*[call(chain, "same question", "perform_deep_research") for _ in range(duplicates)])
+    elapsed = time.perf_counter() - start
+    print(f"\nCoalescing: {duplicates} identical concurrent prompts -> {model.calls} model call(s) in {elapsed * 1000:.0f} ms")
+
+    distinct = await asyncio.gather(*[chain.ainvoke({"q": f"question {i}"}) for i in range(3)])
+    print(f"Distinct prompts: 3 -> {model.calls - 1} model call(s)")
+
+    stop_model = FakeChatModel(latency=0.2)
+    stopped = CoalescingLLM(stop_model, {})
+    prompt = PROMPT.invoke({"q": "same question"})
+    await asyncio.gather(stopped.ainvoke(prompt), stopped.ainvoke(prompt, stop=["\n"]))
+    print(f"Same prompt, with and without stop: 2 -> {stop_model.calls} model call(s)")
+
+    if model.calls != 1 + len(distinct) or len(answers) != duplicates or stop_model.calls != 2:
+        print("  FAIL: identical prompts weren't coalesced (or distinct ones were)")
+        return 1
+    return 0
+
+
+async def coalesced_priority(rps: float, research: int) -> int:
+    limiter = PriorityTokenBucket(requests_per_second=rps, max_bucket_size=1, priorities=LLM_PRIORITIES)
+    chain = PROMPT | CoalescingLLM(FakeChatModel(latency=0.05, rate_limiter=limiter), {}) | StrOutputParser()
+
+    research_calls = [asyncio.create_task(call(chain, f"research {i}", "perform_deep_research")) for i in range(research)]
+    await asyncio.sleep(0.1)
+    shared = asyncio.create_task(call(chain, "shared question", "perform_deep_research"))  # queued last
+    await asyncio.sleep(0.1)
+    chat_time = await call(chain, "shared question", "manager")
+    await asyncio.gather(shared, *research_calls)
+
+    print(f"\nCoalesced priority: chat joining a queued research request answered in {chat_time * 1000:.0f} ms")
+    if chat_time > 3 / rps + 0.1:
+        print(f"  FAIL: chat waited {chat_time:.2f}s at the research request's priority")
+        return 1
+    return 0
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--research", type=int, default=40)
+    parser.add_argument("--chat", type=int, default=5)
+    parser.add_argument("--duplicates", type=int, default=20)
+    args = parser.parse_args()
+
+    failures = await priorities(args.rps, args.research, args.chat)
+    failures += await coalescing(args.duplicates)
+    failures += await coalesced_priority(args.rps, args.research)
+    print(f"\n{'OK' if not failures else f'{failures} FAILURE(S)'}")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(main()) else 0)
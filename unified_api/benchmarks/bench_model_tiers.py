@@ -0,0 +1,167 @@
+"""
+Quality / latency of each chain per model tier, against recorded fixtures.
+
+Every fixture in benchmarks/fixtures/chains.json names a chain, the node that runs it,
+a state to run it on, and checks on the node's output. Each fixture is run with its
+chain forced onto each tier (the other chains keep their configured tier); search is
+always the fake, so only the LLM differs.
+
+    python benchmarks/bench_model_tiers.py                    # fake models — checks the harness
+    python benchmarks/bench_model_tiers.py --provider groq --runs 5 --record tiers.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import warnings
+from collections import defaultdict
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("TAVILY_API_KEY", "bench")
+os.environ["USE_REDIS"] = "false"
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from agent_src import nodes
+from agent_src.cache import search_cache, llm_cache
+from agent_src.research_store import research_store
+from agent_src.config import LLM_CHAIN_TIERS, LLM_MODEL_FAST, LLM_MODEL_LARGE
+from agent_src.metrics import llm_metrics
+from benchmarks.bench_graph import percentile
+from benchmarks.fakes import FakeChatModel, FakeSearchTool
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "chains.json")
+MODELS = {"fast": LLM_MODEL_FAST, "large": LLM_MODEL_LARGE}
+
+
+class RecordingSearchTool(FakeSearchTool):
+    """Fake search that remembers the queries it got and the URLs it returned."""
+
+    def __init__(self):
+        super().__init__(latency=0)
+        self.queries, self.urls = [], set()
+
+    def _results(self, query: str) -> dict:
+        results = super()._results(query)
+        self.queries.append(query)
+        self.urls.update(r["url"] for r in results["results"])
+        return results
+
+
+def build_state(spec: dict) -> dict:
+    spec = dict(spec)
+    turns = spec.pop("messages", []) * spec.pop("repeat", 1)
+    messages = [HumanMessage(content=text) if role == "human" else AIMessage(content=text) for role, text in turns]
+    return {**spec, "messages": messages}
+
+
+def _text(value) -> str:
+    return " ".join(value) if isinstance(value, list) else str(value or "")
+
+
+def score(checks: dict, result: dict, search: RecordingSearchTool) -> list:
+    """Names of the failed checks."""
+    failed = []
+    for field, expected in checks.get("fields", {}).items():
+        if expected.lower() not in _text(result.get(field)).lower():
+            failed.append(f"fields.{field}")
+    if "query_count" in checks:
+        queries = result.get("research_queries_used") or []
+        if len(set(queries)) != checks["query_count"]:
+            failed.append("query_count")
+    if "search_mentions" in checks:
+        if not any(all(w in q.lower() for w in checks["search_mentions"]) for q in search.queries):
+            failed.append("search_mentions")
+    sources = result.get("selected_sources") or []
+    if checks.get("sources_from_results") and any(s.get("url") not in search.urls for s in sources):
+        failed.append("sources_from_results")
+    if len(sources) < checks.get("min_sources", 0):
+        failed.append("min_sources")
+    summary = result.get("conversation_summary") or ""
+    if "max_words" in checks and not 0 < len(summary.split()) <= checks["max_words"]:
+        failed.append("max_words")
+    for word in checks.get("mentions", []):
+        if word.lower() not in summary.lower():
+            failed.append(f"mentions.{word}")
+    return failed
+
+
+async def run_fixture(fixture: dict, tier: str, run: int) -> dict:
+    nodes.LLM_CHAIN_TIERS = {**LLM_CHAIN_TIERS, fixture["chain"]: tier}
+    nodes.tavily_tool = search = RecordingSearchTool()
+
+    # Run as a runnable so the node's progress events have a parent run
+    node = RunnableLambda(getattr(nodes, fixture["node"]))
+    config = {"configurable": {"thread_id": f"tiers-{fixture['name']}-{tier}-{run}"}}
+    start = time.perf_counter()
+    result = await node.ainvoke(build_state(fixture["state"]), config)
+    elapsed = time.perf_counter() - start
+
+    failed = score(fixture["checks"], result, search)
+    return {
+        "fixture": fixture["name"], "chain": fixture["chain"], "tier": tier, "model": MODELS[tier],
+        "seconds": round(elapsed, 3), "failed": failed, "searched": search.queries,
+        "output": {k: (v.content if isinstance(v, AIMessage) else v) for k, v in result.items() if k != "messages"},
+    }
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", default="fake", choices=["fake", "groq"], help="groq needs a real GROQ_API_KEY")
+    parser.add_argument("--tiers", nargs="+", default=["fast", "large"], choices=["fast", "large"])
+    parser.add_argument("--chains", nargs="*", help="only these chains")
+    parser.add_argument("--runs", type=int, default=1, help="runs per fixture and tier")
+    parser.add_argument("--fake-latency", type=float, nargs=2, default=[0.1, 0.4], metavar=("FAST", "LARGE"))
+    parser.add_argument("--record", help="write every output to this JSON file")
+    args = parser.parse_args()
+
+    if args.provider == "fake":
+        nodes.fast_llm = FakeChatModel(latency=args.fake_latency[0], callbacks=[llm_metrics])
+        nodes.llm = FakeChatModel(latency=args.fake_latency[1], callbacks=[llm_metrics])
+    # Measure the models, not the caches
+    search_cache.enabled = llm_cache.enabled = research_store.enabled = False
+    # Templates would skip the query_generation chain
+    nodes.query_planner.mode = "llm"
+
+    with open(FIXTURES) as f:
+        fixtures = [fx for fx in json.load(f) if not args.chains or fx["chain"] in args.chains]
+
+    records = []
+    for fixture in fixtures:
+        for tier in args.tiers:
+            for run in range(args.runs):
+                records.append(await run_fixture(fixture, tier, run))
+
+    by_chain = defaultdict(list)
+    for r in records:
+        by_chain[(r["chain"], r["tier"])].append(r)
+
+    print(f"\nprovider: {args.provider}   configured tiers: {LLM_CHAIN_TIERS}")
+    print(f"{'chain':<20}{'tier':<8}{'model':<26}{'runs':>5}{'pass %':>8}{'p50 ms':>9}{'p95 ms':>9}  failed checks")
+    for (chain, tier), runs in by_chain.items():
+        times = [r["seconds"] for r in runs]
+        passed = sum(not r["failed"] for r in runs)
+        failed = sorted({c for r in runs for c in r["failed"]})
+        marker = " *" if LLM_CHAIN_TIERS.get(chain, "large") == tier else ""
+        print(f"{chain:<20}{tier + marker:<8}{MODELS[tier]:<26}{len(runs):>5}{passed / len(runs) * 100:>8.0f}"
+              f"{percentile(times, 50) * 1000:>9.0f}{percentile(times, 95) * 1000:>9.0f}  {', '.join(failed)}")
+    print("(* = configured tier; node wall time, fake search)")
+
+    if args.record:
+        with open(args.record, "w") as f:
+            json.dump(records, f, indent=2, default=str)
+        print(f"Recorded {len(records)} outputs to {args.record}")
+
+    # Only a configured tier failing its fixtures is a regression
+    return sum(1 for r in records if r["failed"] and LLM_CHAIN_TIERS.get(r["chain"], "large") == r["tier"])
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    sys.exit(1 if asyncio.run(main()) else 0)
@@ -0,0 +1,105 @@
+"""
+Local source ranker against recorded search result sets.
+
+Every set holds a product profile, Tavily-shaped results (title, url, content, score) and
+the URLs judged worth citing. The ranker's top-k is compared with the provider's own order
+(by relevance score), and its cost is timed on candidate batches the size the research
+pipeline produces.
+
+- fixtures/search_results.json: the sets FEATURE_WEIGHTS were tuned on (in-sample).
+- fixtures/search_results_holdout.json: held-out sets, labelled before being ranked and
+  never used for tuning. Relevant = specific to the product's industry / audience / goal /
+  region and from a practitioner or publication; forums, videos, listicles, homepages and
+  off-topic pages on authoritative domains are not. Quote these numbers, not the in-sample ones.
+
+    python benchmarks/bench_ranker.py --k 5 --batch 21 --repeat 2000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("TAVILY_API_KEY", "bench")
+os.environ["USE_REDIS"] = "false"
+
+from agent_src.ranker import SourceRanker
+from agent_src.search import source_domain
+
+FIXTURES = {
+    "in-sample": os.path.join(os.path.dirname(__file__), "fixtures", "search_results.json"),
+    "held-out": os.path.join(os.path.dirname(__file__), "fixtures", "search_results_holdout.json"),
+}
+AVOIDED = ("reddit.com", "quora.com", "youtube.com", "tiktok.com", "pinterest.com")
+
+
+def candidates(results: list) -> list:
+    """Result set → the pipeline's candidate shape."""
+    return [{"title": r["title"], "url": r["url"], "snippet": r["content"], "relevance": r["score"]} for r in results]
+
+
+def precision(urls: list, relevant: set) -> float:
+    return sum(u in relevant for u in urls) / len(urls) if urls else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5, help="sources compared (precision@k)")
+    parser.add_argument("--batch", type=int, default=21, help="candidates per timed batch (3 searches x 7)")
+    parser.add_argument("--repeat", type=int, default=2000, help="timed batches")
+    args = parser.parse_args()
+
+    ranker = SourceRanker()
+    sets = []
+    failures = 0
+    for split, path in FIXTURES.items():
+        with open(path) as f:
+            split_sets = json.load(f)
+        sets += split_sets
+
+        print(f"{split:<28}{'results':>9}{'provider p@k':>14}{'ranker p@k':>12}  ranker top {args.k}")
+        totals = [0.0, 0.0]
+        for s in split_sets:
+            relevant = set(s["relevant"])
+            pool = candidates(s["results"])
+            by_provider = [c["url"] for c in sorted(pool, key=lambda c: -c["relevance"])][:args.k]
+            by_ranker = [c["url"] for c in ranker.rank(pool, s["state"])][:args.k]
+            p_provider, p_ranker = precision(by_provider, relevant), precision(by_ranker, relevant)
+            totals[0] += p_provider
+            totals[1] += p_ranker
+            print(f"  {s['name']:<26}{len(pool):>9}{p_provider:>14.2f}{p_ranker:>12.2f}  "
+                  f"{', '.join(source_domain(u) for u in by_ranker)}")
+
+            if p_ranker < p_provider or p_ranker < 0.6:
+                print(f"  FAIL: ranker precision@{args.k} {p_ranker:.2f} (provider order {p_provider:.2f})")
+                failures += 1
+            avoided = [u for u in by_ranker if source_domain(u).endswith(AVOIDED)]
+            if avoided:
+                print(f"  FAIL: avoided domains in the top {args.k}: {avoided}")
+                failures += 1
+            sources, summary = ranker.select(ranker.rank(pool, s["state"]), s["state"])
+            if not 5 <= len(sources) <= 7 or not summary:
+                print(f"  FAIL: replace mode picked {len(sources)} sources")
+                failures += 1
+        print(f"  {'mean':<26}{'':>9}{totals[0] / len(split_sets):>14.2f}{totals[1] / len(split_sets):>12.2f}\n")
+
+    # Cost on a pipeline-sized batch: the LLM call it replaces takes seconds
+    pool = [c for s in sets for c in candidates(s["results"])]
+    batch = (pool * (args.batch // len(pool) + 1))[:args.batch]
+    state = sets[0]["state"]
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        ranker.rank(batch, state)
+    per_batch = (time.perf_counter() - start) / args.repeat
+    print(f"Ranking {args.batch} candidates: {per_batch * 1e6:.0f} µs per batch")
+
+    print(f"\n{'OK' if not failures else f'{failures} FAILURE(S)'}")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main() else 0)
@@ -0,0 +1,119 @@
+"""
+Pipelined research against a straggling search, with the fake LLM and search.
+
+One of the three research queries (the geography / trends one) is slow. With the pipeline,
+curation starts once enough candidates are in and the straggler is dropped; "wait for all"
+(min candidates set out of reach) is the old behaviour. A deadline run checks that searches
+slower than the deadline can't hold research up when too few candidates are in.
+
+    python benchmarks/bench_research_pipeline.py --search-latency 0.3 --straggler 3 --runs 5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import warnings
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("TAVILY_API_KEY", "bench")
+os.environ["USE_REDIS"] = "false"
+
+from langchain_core.runnables import RunnableLambda
+
+from agent_src import nodes
+from agent_src.cache import search_cache, llm_cache
+from agent_src.research_store import research_store
+from agent_src.config import RESEARCH_MIN_CANDIDATES, RESEARCH_SEARCH_DEADLINE
+from benchmarks.bench_graph import percentile
+from benchmarks.fakes import FakeChatModel, FakeSearchTool
+
+STATE = {
+    "product_name": "FocusPod", "product_description": "A noise-cancelling desk pod", "industry": "Consumer electronics",
+    "target_audience": "Remote workers", "primary_goal": "20% sales growth", "unique_selling_proposition": "Folds flat",
+    "geography": "USA", "budget_range": "5k-10k", "timeline": "3 months", "messages": [],
+}
+
+
+class StragglingSearchTool(FakeSearchTool):
+    """Fake search where queries containing `slow_word` take `straggler` seconds, the rest `latency`."""
+
+    def __init__(self, latency: float, straggler: float, slow_word: str = "trends"):
+        super().__init__(latency=latency)
+        self.straggler = straggler
+        self.slow_word = slow_word
+        self.cancelled = 0
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        query = input["query"] if isinstance(input, dict) else input
+        try:
+            await asyncio.sleep(self.straggler if self.slow_word in query else self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self._results(query)
+
+
+async def run(label: str, runs: int, min_candidates: int, deadline: float, search: StragglingSearchTool) -> dict:
+    nodes.RESEARCH_MIN_CANDIDATES = min_candidates
+    nodes.RESEARCH_SEARCH_DEADLINE = deadline
+    nodes.tavily_tool = search
+    times, candidates = [], []
+    for i in range(runs):
+        start = time.perf_counter()
+        result = await RunnableLambda(nodes.perform_deep_research).ainvoke(
+            dict(STATE), {"configurable": {"thread_id": f"pipeline-{label}-{i}"}}
+        )
+        times.append(time.perf_counter() - start)
+        candidates.append(len(result["selected_sources"]))
+    row = {"label": label, "p50": percentile(times, 50), "p95": percentile(times, 95),
+           "sources": min(candidates), "cancelled": search.cancelled}
+    print(f"{label:<24}{row['p50'] * 1000:>10.0f}{row['p95'] * 1000:>10.0f}{row['sources']:>10}{row['cancelled']:>12}")
+    return row
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--straggler", type=float, default=3.0, help="seconds the slow search takes")
+    parser.add_argument("--deadline", type=float, default=1.0, help="deadline for the deadline run")
+    args = parser.parse_args()
+
+    nodes.llm = nodes.fast_llm = FakeChatModel(latency=args.llm_latency)
+    search_cache.enabled = llm_cache.enabled = research_store.enabled = False
+    nodes.query_planner.mode = "template"
+
+    print(f"search {args.search_latency}s, straggler {args.straggler}s, llm {args.llm_latency}s, {args.runs} runs")
+    print(f"{'mode':<24}{'p50 ms':>10}{'p95 ms':>10}{'sources':>10}{'cancelled':>12}")
+    waited = await run("wait for all", args.runs, 10_000, 60,
+                       StragglingSearchTool(args.search_latency, args.straggler))
+    piped = await run("pipeline", args.runs, RESEARCH_MIN_CANDIDATES, RESEARCH_SEARCH_DEADLINE,
+                      StragglingSearchTool(args.search_latency, args.straggler))
+    # Now only the trends search is fast: too few candidates in time, so the deadline must cut the rest
+    timed = await run(f"deadline {args.deadline}s", args.runs, RESEARCH_MIN_CANDIDATES, args.deadline,
+                      StragglingSearchTool(args.straggler, args.search_latency))
+
+    failures = 0
+    fast_path = args.search_latency + 2 * args.llm_latency + 0.2
+    if piped["p95"] > fast_path:
+        print(f"  FAIL: pipeline p95 {piped['p95']:.2f}s — waited for the straggler (expected < {fast_path:.2f}s)")
+        failures += 1
+    if timed["p95"] > args.deadline + args.llm_latency + 0.2:
+        print(f"  FAIL: deadline run p95 {timed['p95']:.2f}s overran the {args.deadline}s deadline")
+        failures += 1
+    if piped["sources"] < 4:
+        print(f"  FAIL: pipeline curated only {piped['sources']} sources")
+        failures += 1
+    print(f"\nSaved per research: {(waited['p50'] - piped['p50']) * 1000:.0f} ms (p50)")
+    print(f"{'OK' if not failures else f'{failures} FAILURE(S)'}")
+    return failures
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    sys.exit(1 if asyncio.run(main()) else 0)
@@ -0,0 +1,180 @@
+"""
+Research reuse across sessions with similar product profiles, against the fake LLM and search.
+
+Sessions are drawn from a few profile clusters, each session rewording its cluster's
+profile (casing, word order, budget written differently). Every session runs
+perform_deep_research; the report shows how many reused earlier research and the
+LLM / search calls that saved. Afterwards, near-misses — another geography, audience or
+budget bucket — must NOT reuse, and the product name must not leak between sessions.
+
+    python benchmarks/bench_research_reuse.py --sessions 60 --seed 7
+"""
+import os
+import re
+import sys
+import time
+import random
+import asyncio
+import argparse
+import warnings
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("TAVILY_API_KEY", "bench")
+os.environ["USE_REDIS"] = "false"
+
+from langchain_core.runnables import RunnableLambda
+
+from agent_src import nodes
+from agent_src.cache import search_cache, llm_cache
+from agent_src.research_store import ResearchStore, ProductProfile, _similarity
+from agent_src.config import RESEARCH_REUSE_THRESHOLD, RESEARCH_REUSE_TTL
+from benchmarks.bench_graph import percentile
+from benchmarks.fakes import FakeChatModel, FakeSearchTool
+
+# Each field lists interchangeable wordings; a session picks one of each
+CLUSTERS = {
+    "dental-saas": {
+        "industry": ["B2B SaaS", "b2b saas", "SaaS, B2B"],
+        "target_audience": ["dentists", "Dentists", "dentists and dental clinics"],
+        "primary_goal": ["lead generation", "Generate leads", "generating leads"],
+        "geography": ["Germany", "germany"],
+        "budget_range": ["5k-10k", "$8,000", "10k"],
+    },
+    "remote-gadgets": {
+        "industry": ["Consumer electronics", "consumer electronics"],
+        "target_audience": ["remote workers", "Remote Workers"],
+        "primary_goal": ["increase sales", "increasing sales"],
+        "geography": ["USA", "usa"],
+        "budget_range": ["20k-50k", "$40,000", "45k"],
+    },
+    "local-fitness": {
+        "industry": ["Fitness", "fitness studios"],
+        "target_audience": ["young professionals", "Young professionals"],
+        "primary_goal": ["brand awareness", "Brand Awareness"],
+        "geography": ["London", "london"],
+        "budget_range": ["500", "$800", "1k"],
+    },
+}
+
+BASE = CLUSTERS["dental-saas"]
+# Must not reuse the dental-saas research
+NEAR_MISSES = {
+    "other geography": {"geography": "USA"},
+    "other audience": {"target_audience": "veterinarians"},
+    "other budget bucket": {"budget_range": "100k"},
+}
+
+# Only industry and audience filled in, product "Go"; the miss words the audience differently
+SPARSE = {"industry": "B2B SaaS", "target_audience": "dentists", "budget_range": "5k", "product_name": "Go"}
+SPARSE_MISS = {**SPARSE, "target_audience": "dentists and dental clinics", "product_name": "Other"}
+SPARSE_RESEARCH = {
+    "research_queries_used": ["Go Google Ads for dentists", "how Go grows with good reviews"],
+    "selected_sources": [{"rank": 1, "title": "Ads for dentists", "url": "https://example.com/a", "domain": "example.com"}],
+    "summary_of_findings": "Go should lean on Google Ads and Google reviews.",
+}
+
+
+def session(cluster: str, index: int, rng: random.Random) -> dict:
+    profile = {field: rng.choice(options) for field, options in CLUSTERS[cluster].items()}
+    return {**profile, "product_name": f"Product{index}", "product_description": "A new product", "messages": []}
+
+
+async def research(state: dict, index: int) -> tuple:
+    node = RunnableLambda(nodes.perform_deep_research)
+    config = {"configurable": {"thread_id": f"reuse-{index}"}}
+    start = time.perf_counter()
+    result = await node.ainvoke(state, config)
+    return result, time.perf_counter() - start
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--threshold", type=float, default=RESEARCH_REUSE_THRESHOLD)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    model = FakeChatModel(latency=args.llm_latency)
+    nodes.llm = nodes.fast_llm = model
+    nodes.tavily_tool = search = FakeSearchTool(latency=args.search_latency)
+    # Only research reuse should save calls here
+    search_cache.enabled = llm_cache.enabled = False
+    nodes.research_store = store = ResearchStore(max_entries=500, ttl=RESEARCH_REUSE_TTL, threshold=args.threshold)
+
+    failures = 0
+    timings = {"fresh": [], "reused": []}
+    reused_by_cluster = {cluster: 0 for cluster in CLUSTERS}
+    for i in range(args.sessions):
+        cluster = rng.choice(list(CLUSTERS))
+        state = session(cluster, i, rng)
+        calls_before = model.calls + search.calls
+        result, elapsed = await research(state, i)
+        reused = model.calls + search.calls == calls_before
+        timings["reused" if reused else "fresh"].append(elapsed)
+        reused_by_cluster[cluster] += reused
+
+        text = " ".join(result["research_queries_used"]) + result["summary_of_findings"]
+        if set(re.findall(r"Product\d+", text)) - {f"Product{i}"} or "{product}" in text:
+            print(f"  FAIL: session {i} got queries for another product: {result['research_queries_used']}")
+            failures += 1
+
+    stats = store.stats()
+    reused = len(timings["reused"])
+    print(f"Sessions: {args.sessions} over {len(CLUSTERS)} profile clusters, threshold {args.threshold}")
+    print(f"{'':<10}{'sessions':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for kind, times in timings.items():
+        if times:
+            print(f"{kind:<10}{len(times):>10}{percentile(times, 50) * 1000:>10.0f}{percentile(times, 95) * 1000:>10.0f}")
+    print(f"Reuse rate: {reused / args.sessions:.0%}  (exact {stats['hits']}, similar {stats['similar_hits']}, "
+          f"stored profiles {stats['entries']})  per cluster: {reused_by_cluster}")
+    fresh = max(1, len(timings["fresh"]))
+    print(f"Saved: ~{reused * model.calls // fresh} LLM calls, ~{reused * search.calls // fresh} searches  "
+          f"(made {model.calls} / {search.calls})")
+
+    # Every cluster should be researched once per distinct budget bucket, then reused
+    if reused < args.sessions - 3 * len(CLUSTERS):
+        print(f"  FAIL: only {reused} of {args.sessions} sessions reused research")
+        failures += 1
+
+    reference = ProductProfile.of({field: options[0] for field, options in BASE.items()})
+    for name, change in NEAR_MISSES.items():
+        state = {**{field: options[0] for field, options in BASE.items()}, **change, "product_name": "Other"}
+        profile = ProductProfile.of(state)
+        score = _similarity(profile.terms(), reference.terms()) if profile.budget == reference.budget else 0.0
+        hit = store.lookup(state) is not None
+        print(f"Near miss — {name:<20} similarity {score:.2f}  {'REUSED' if hit else 'researched afresh'}")
+        if hit:
+            print(f"  FAIL: {name} reused research")
+            failures += 1
+
+    # Two sparse profiles share little just by both leaving fields open
+    sparse = ResearchStore(max_entries=10, ttl=RESEARCH_REUSE_TTL, threshold=args.threshold)
+    sparse.add(SPARSE, SPARSE_RESEARCH)
+    hit = sparse.lookup(SPARSE_MISS) is not None
+    score = _similarity(ProductProfile.of(SPARSE_MISS).terms(), ProductProfile.of(SPARSE).terms())
+    print(f"Near miss — {'sparse profile':<20} similarity {score:.2f}  {'REUSED' if hit else 'researched afresh'}")
+    if hit:
+        print("  FAIL: sparse profile reused research")
+        failures += 1
+
+    # A short product name is swapped as a whole word only
+    reused = sparse.lookup({**SPARSE, "product_name": "Acme"}) or {}
+    text = " | ".join(reused.get("research_queries_used", []) + [reused.get("summary_of_findings", "")])
+    print(f"Short product name — 'Go' reused for 'Acme': {text}")
+    if "Google Ads" not in text or "Acme" not in text or "Go " in text:
+        print("  FAIL: product name masked inside other words")
+        failures += 1
+
+    print(f"\n{'OK' if not failures else f'{failures} FAILURE(S)'}")
+    return failures
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    sys.exit(1 if asyncio.run(main()) else 0)
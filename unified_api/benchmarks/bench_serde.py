@@ -0,0 +1,146 @@
+"""
+Checkpoint size and (de)serialization cost: plain JsonPlusSerializer vs CompactSerializer.
+
+Builds realistic session states (report, guide, sources, growing history) and reports
+bytes per checkpoint, encode/decode µs, and the same for the Redis JSON document
+(where channel values are packed inline). Every variant is checked to round-trip.
+
+    python benchmarks/bench_serde.py
+    python benchmarks/bench_serde.py --history 10 100 400 --level 3
+"""
+import os
+import sys
+import time
+import argparse
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import orjson
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import CheckpointTuple, empty_checkpoint
+from langgraph.checkpoint.redis import RedisSaver
+from langgraph.checkpoint.redis.jsonplus_redis import JsonPlusRedisSerializer
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from agent_src.checkpointer import CompactRedisSaver
+from agent_src.serde import CompactSerializer, get_codec, is_packed
+from benchmarks.fakes import STRATEGY_NAMES
+
+REPORT = "\n\n".join(
+    f"**Approach {i + 1}: {name}**\nA simple explanation of how {name.lower()} drives growth for "
+    f"remote workers, with budget notes, channel mix and a 90-day plan.\n"
+    f"*Reference: [Source {i + 1}](https://example.com/case-study/{i + 1})*"
+    for i, name in enumerate(STRATEGY_NAMES)
+) * 3
+
+GUIDE = "## Step-by-step guide\n\n" + "\n".join(
+    f"{i}. Step {i}: prepare the assets, brief the partners and track the launch metrics." for i in range(1, 25)
+)
+
+SOURCES = [
+    {"rank": i + 1, "title": f"Case study {i + 1}", "url": f"https://site{i}.example.com/marketing/{i}",
+     "domain": f"site{i}.example.com", "why_relevant": "Shows how a similar product grew with this channel."}
+    for i in range(6)
+]
+
+
+def state(history: int) -> dict:
+    messages = []
+    for i in range(history // 2):
+        messages.append(HumanMessage(content=f"Question {i} about my product launch?", id=f"h{i}"))
+        # The report is repeated in the history, like the real conversation
+        messages.append(AIMessage(content=REPORT if i == 0 else f"Answer {i}: a detailed marketing suggestion. " * 8,
+                                  id=f"a{i}"))
+    return {
+        "messages": messages,
+        "product_name": "SuperWidget", "product_description": "An AI gadget for remote teams",
+        "target_audience": "remote workers", "primary_goal": "growth",
+        "research_queries_used": ["q1", "q2", "q3"], "research_report": REPORT, "research_sources": SOURCES,
+        "strategies": STRATEGY_NAMES, "selected_strategy": STRATEGY_NAMES[0], "step_by_step_guide": GUIDE,
+        "conversation_summary": "The user is launching a product for remote workers." * 5,
+        "summarized_messages": 0, "conversation_phase": "general_chat",
+    }
+
+
+def checkpoint(values: dict) -> dict:
+    cp = empty_checkpoint()
+    cp["channel_values"] = values
+    cp["channel_versions"] = {k: "1" for k in values}
+    return cp
+
+
+def timed(fn, number: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(number):
+        result = fn()
+    return result, (time.perf_counter() - start) / number * 1e6
+
+
+def redis_saver(cls, codec=None, min_bytes=1024):
+    # Only the document conversion is exercised — no connection needed
+    saver = object.__new__(cls)
+    saver.serde = JsonPlusRedisSerializer()
+    if codec is not None:
+        saver.codec, saver.compress_min_bytes = codec, min_bytes
+    return saver
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 100, 400])
+    parser.add_argument("--level", type=int, default=3)
+    parser.add_argument("--min-bytes", type=int, default=1024)
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    serializers = {"jsonplus": JsonPlusSerializer()}
+    savers = {"redis json": redis_saver(RedisSaver)}
+    for name in ("zstd", "zlib"):
+        codec = get_codec(name, args.level)
+        serializers[f"compact+{codec.name}"] = CompactSerializer(codec=codec, min_bytes=args.min_bytes)
+        savers[f"redis json+{codec.name}"] = redis_saver(CompactRedisSaver, codec, args.min_bytes)
+
+    failures = 0
+    print(f"{'format':<22}{'history':>8}{'bytes':>10}{'ratio':>8}{'encode µs':>12}{'decode µs':>12}")
+    for history in args.history:
+        cp = checkpoint(state(history))
+        baseline = None
+
+        for name, serde in serializers.items():
+            data, enc = timed(lambda: serde.dumps_typed(cp), args.number)
+            loaded, dec = timed(lambda: serde.loads_typed(data), args.number)
+            size = len(data[1])
+            baseline = baseline or size
+            print(f"{name:<22}{history:>8}{size:>10}{baseline / size:>8.1f}{enc:>12.0f}{dec:>12.0f}")
+            if loaded["channel_values"] != cp["channel_values"]:
+                print(f"  FAIL: {name} doesn't round-trip")
+                failures += 1
+
+        baseline = None
+        for name, saver in savers.items():
+            doc, enc = timed(lambda: saver._dump_checkpoint(cp), args.number)
+            loaded, dec = timed(lambda: saver._recursive_deserialize(doc["channel_values"]), args.number)
+            size = len(orjson.dumps(doc))
+            baseline = baseline or size
+            print(f"{name:<22}{history:>8}{size:>10}{baseline / size:>8.1f}{enc:>12.0f}{dec:>12.0f}")
+            if loaded != cp["channel_values"]:
+                print(f"  FAIL: {name} doesn't round-trip")
+                failures += 1
+            # The sync list() path (get_state_history): tuples built as RedisSaver.list builds them
+            if isinstance(saver, CompactRedisSaver):
+                listed = saver._load_checkpoint(doc, doc["channel_values"], [])
+                listed = saver._unpack_tuple(CheckpointTuple({}, listed, {}, None, [])).checkpoint["channel_values"]
+                packed = [k for k, v in doc["channel_values"].items() if is_packed(v)]
+                if any(is_packed(v) for v in listed.values()) or \
+                        any(listed[k] != cp["channel_values"][k] for k in packed):
+                    print(f"  FAIL: {name} list() doesn't round-trip")
+                    failures += 1
+        print()
+
+    print("OK" if not failures else f"{failures} FAILURE(S)")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main() else 0)
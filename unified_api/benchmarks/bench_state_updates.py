@@ -0,0 +1,182 @@
+"""
+Regression check: node updates must carry only their new messages.
+
+For growing histories it runs the nodes that reply with a message and checks that
+- each returns just the new message(s), not the history
+- the serialized update (the node's pending write) stays the same size
+- the messages reducer cost stays flat
+and prints the cost of the old `messages + [AIMessage(...)]` pattern for comparison.
+
+Only node writes are O(new). It then runs one chat turn through the graph per history
+size and reports every byte the checkpointer stores for it: the writes stay flat, but
+each checkpoint still stores the new version of the `messages` channel whole, so that
+blob is the full history on every step that adds a message.
+
+    python benchmarks/bench_state_updates.py
+"""
+import os
+import sys
+import time
+import asyncio
+import inspect
+import warnings
+from collections import Counter
+
+# Add the parent directory to sys.path to import modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("GROQ_API_KEY", "bench")
+os.environ.setdefault("TAVILY_API_KEY", "bench")
+os.environ["USE_REDIS"] = "false"
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from agent_src import nodes
+from agent_src.metrics import llm_metrics
+from agent_src.history import append_messages
+from agent_src.checkpointer import BoundedMemorySaver
+from agent_src.config import MEMORY_MAX_CHECKPOINTS
+from agent_src.graph import workflow
+from benchmarks.fakes import FakeChatModel
+
+HISTORY_SIZES = [10, 100, 400]
+# An update may grow a little with history (e.g. a longer summary) — but not with every message
+MAX_GROWTH = 1.5
+
+serde = JsonPlusSerializer()
+
+
+def history(n: int) -> list:
+    messages = []
+    for i in range(n // 2):
+        messages.append(HumanMessage(content=f"Question {i} about my product launch?", id=f"h{i}"))
+        messages.append(AIMessage(content=f"Answer {i}: here is a detailed marketing suggestion. " * 8, id=f"a{i}"))
+    return messages
+
+
+def base_state(messages: list, last: str) -> dict:
+    return {
+        "messages": messages + [HumanMessage(content=last, id="latest")],
+        "product_name": "SuperWidget", "product_description": "An AI gadget",
+        "primary_goal": "growth", "target_audience": "remote workers",
+        "research_queries_used": ["q"], "strategies": ["A", "B"], "selected_strategy": "A", "guided": True,
+        "conversation_phase": "general_chat",
+    }
+
+
+# node name -> (callable, last user message that routes into the message-returning branch)
+CASES = {
+    "manager (chat)": (nodes.manager_node, "tell me more about budgets"),
+    "manager (strategy change)": (nodes.manager_node, "show me another"),
+    "reset_and_gather": (nodes.reset_and_gather, "start over"),
+    "manager (reset)": (nodes.manager_node, "start over"),
+    "correct_product_details": (nodes.correct_product_details, "wait no, the budget is now 10k"),
+}
+
+
+async def run_node(fn, state: dict) -> dict:
+    config = {"configurable": {"thread_id": "bench"}}
+    result = fn(state, config) if "config" in inspect.signature(fn).parameters else fn(state)
+    return await result if asyncio.iscoroutine(result) else result
+
+
+class MeteredSaver(BoundedMemorySaver):
+    """Counts the serialized bytes stored per kind: node writes, `messages` blobs, other blobs + checkpoints."""
+
+    def __init__(self):
+        super().__init__(max_sessions=100, idle_ttl=3600, max_checkpoints_per_thread=MEMORY_MAX_CHECKPOINTS, serde=serde)
+        self.bytes = Counter()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        thread_id, ns = config["configurable"]["thread_id"], config["configurable"]["checkpoint_ns"]
+        for channel, version in new_versions.items():
+            size = len(self.blobs[(thread_id, ns, channel, version)][1])
+            self.bytes["messages blob" if channel == "messages" else "other"] += size
+        stored, meta, _ = self.storage[thread_id][ns][checkpoint["id"]]
+        self.bytes["other"] += len(stored[1]) + len(meta[1])
+        return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        super().put_writes(config, writes, task_id, task_path)
+        key = (config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", ""),
+               config["configurable"]["checkpoint_id"])
+        self.bytes["writes"] += sum(len(value[1]) for tid, _, value, _ in self.writes[key].values() if tid == task_id)
+
+
+async def checkpoint_bytes(n: int) -> Counter:
+    """Bytes the checkpointer stores for one chat turn on top of a history of `n` messages."""
+    saver = MeteredSaver()
+    graph = workflow.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": f"turn-{n}"}}
+    seeded = base_state(history(n), "Hi again")
+    await graph.aupdate_state(config, {**seeded, "messages": seeded["messages"][:-1]}, as_node="manager")
+    saver.bytes.clear()
+    await graph.ainvoke({"messages": [HumanMessage(content="tell me more about budgets")]}, config)
+    return saver.bytes
+
+
+def reducer_time(existing: list, update: list, number: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        # Fresh copies: the reducer assigns ids, which would take the fast path away on the next round
+        append_messages(existing, [m.model_copy() for m in update])
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def main() -> int:
+    nodes.llm = nodes.fast_llm = FakeChatModel(latency=0, callbacks=[llm_metrics])
+    failures = 0
+
+    print(f"{'node':<28}{'history':>8}{'new msgs':>10}{'update bytes':>14}{'reducer µs':>12}")
+    for name, (fn, last) in CASES.items():
+        sizes, times = [], []
+        for n in HISTORY_SIZES:
+            state = base_state(history(n), last)
+            update = await run_node(fn, state)
+            new_messages = update.get("messages", [])
+            size = len(serde.dumps_typed(new_messages)[1])
+            cost = reducer_time(state["messages"], new_messages)
+            sizes.append(size)
+            times.append(cost)
+            print(f"{name:<28}{n:>8}{len(new_messages):>10}{size:>14}{cost:>12.1f}")
+
+            if not new_messages or len(new_messages) > 2:
+                print(f"  FAIL: {name} returned {len(new_messages)} messages for a history of {n}")
+                failures += 1
+
+        if sizes[-1] > sizes[0] * MAX_GROWTH:
+            print(f"  FAIL: {name} update grows with history ({sizes[0]} -> {sizes[-1]} bytes)")
+            failures += 1
+        if times[-1] > times[0] * 10:
+            print(f"  FAIL: {name} reducer time grows with history ({times[0]:.1f} -> {times[-1]:.1f} µs)")
+            failures += 1
+
+    # What every turn used to cost
+    print("\nOld pattern (history + [new]) for comparison:")
+    for n in HISTORY_SIZES:
+        existing = history(n)
+        full = existing + [AIMessage(content="reply")]
+        print(f"{'messages + [AIMessage]':<28}{n:>8}{len(full):>10}{len(serde.dumps_typed(full)[1]):>14}"
+              f"{reducer_time(existing, full):>12.1f}")
+
+    print("\nCheckpoint bytes per chat turn (everything the checkpointer stores):")
+    print(f"{'history':>8}{'writes':>10}{'messages blob':>15}{'other':>10}")
+    turns = []
+    for n in HISTORY_SIZES:
+        stored = await checkpoint_bytes(n)
+        turns.append(stored)
+        print(f"{n:>8}{stored['writes']:>10}{stored['messages blob']:>15}{stored['other']:>10}")
+    if turns[-1]["writes"] > turns[0]["writes"] * MAX_GROWTH:
+        print(f"  FAIL: checkpoint writes grow with history ({turns[0]['writes']} -> {turns[-1]['writes']} bytes)")
+        failures += 1
+    print("  (the messages blob is the whole history, stored again for every step that adds a message)")
+
+    print(f"\n{'OK' if not failures else f'{failures} FAILURE(S)'}")
+    return failures
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    sys.exit(1 if asyncio.run(main()) else 0)
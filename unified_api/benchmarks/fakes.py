@@ -0,0 +1,176 @@
+"""
+Deterministic stand-ins for Groq and Tavily, used by the benchmarks.
+FakeChatModel answers by recognising which node's system prompt it got; FakeSearchTool
+returns stable, query-derived hits. Both sleep to simulate network latency.
+"""
+import re
+import json
+import time
+import asyncio
+import random
+import hashlib
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_URL = re.compile(r"(https?://\S+)")
+
+STRATEGY_NAMES = [
+    "Influencer Partnerships",
+    "Content Marketing Hub",
+    "Referral Program",
+    "Paid Social Retargeting",
+    "Community Building",
+]
+
+
+def _reply_for(system: str, human: str) -> str:
+    """The text a well-behaved model would produce for each node's prompt."""
+    if "Generate exactly 3 different" in system:
+        product = human.splitlines()[0].replace("Product:", "").strip() or "product"
+        return "\n".join([
+            f"{product} marketing strategy for target audience",
+            f"{product} unique selling proposition growth tactics",
+            f"{product} regional marketing trends budget",
+        ])
+
+    if "strict curator" in system:
+        urls = _URL.findall(human)[:6]
+        return json.dumps({
+            "selected_sources": [
+                {"rank": i + 1, "title": f"Source {i + 1}", "url": url, "domain": "", "why_relevant": "Relevant case study"}
+                for i, url in enumerate(urls)
+            ],
+            "summary_of_findings": "Audiences respond to social proof and clear, benefit-led messaging.",
+        })
+
+    count = re.search(r"exactly (\d) unique strategies", system)
+    if count:
+        names = STRATEGY_NAMES[:int(count.group(1))]
+        body = "\n\n".join(
+            f"**Approach {i + 1}: {name}**\nA simple explanation of how {name.lower()} drives growth.\n"
+            f"*Reference: [Source {i + 1}](https://example.com/{i + 1})*"
+            for i, name in enumerate(names)
+        )
+        return f"{body}\n\nYou've got this — pick one and let's make it happen!\n" \
+               f"<STRATEGIES>{json.dumps({'strategies': names})}</STRATEGIES>"
+
+    if "running summary" in system:
+        return "The user is launching a product for remote workers, picked a strategy and is asking follow-up questions."
+
+    if "Create one perfect search query" in system:
+        strategy = human.split("Strategy:")[-1].strip()
+        return f"step by step guide {strategy}"
+
+    if "step-by-step guide" in system:
+        return "## Step-by-step guide\n\n1. Define the goal\n2. Prepare the assets\n3. Launch and measure\n\n" \
+               "**Required documents:** brand kit, budget sheet."
+
+    if "Extract product details" in system or "correcting product details" in system:
+        fields = dict(re.findall(r"^\s*([A-Za-z ]+):\s*(.+)$", human, re.MULTILINE))
+        return json.dumps({
+            "product_name": fields.get("Product Name", "SuperWidget"),
+            "product_description": fields.get("Product Description", "An AI gadget"),
+            "target_audience": fields.get("Target Audience"),
+            "primary_goal": fields.get("Primary Goal"),
+            "budget_range": fields.get("Budget Range"),
+            "timeline": fields.get("Timeline"),
+            "industry": fields.get("Industry"),
+            "unique_selling_proposition": fields.get("USP"),
+            "current_marketing_channels": fields.get("Current Marketing Channels"),
+            "geography": fields.get("Geography"),
+        })
+
+    return "Great question! Short answer: focus on the channel your audience already trusts. Want to dig into a strategy?"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model with canned, prompt-aware answers.
+    `latency` is the time to first token, `token_latency` the gap between streamed tokens;
+    a `tail_rate` share of calls takes `tail_latency` longer (a slow provider's tail).
+    """
+
+    latency: float = 0.3
+    token_latency: float = 0.0
+    tail_latency: float = 0.0
+    tail_rate: float = 0.0
+    calls: int = 0
+
+    def _delay(self) -> float:
+        return self.latency + (self.tail_latency if random.random() < self.tail_rate else 0.0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"latency": self.latency, "token_latency": self.token_latency}
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        self.calls += 1
+        system = "\n".join(m.content for m in messages if m.type == "system")
+        human = messages[-1].content if messages else ""
+        return _reply_for(system, human)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        await asyncio.sleep(self._delay())
+        for token in re.findall(r"\S+\s*|\s+", self._reply(messages)):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeSearchTool:
+    """
+    Tavily stand-in returning `max_results` stable hits per query.
+    `invoke` blocks like a synchronous HTTP client would, so blocking call sites show up as loop lag.
+    """
+
+    def __init__(self, latency: float = 0.5, max_results: int = 7, tail_latency: float = 0.0, tail_rate: float = 0.0):
+        self.latency = latency
+        self.max_results = max_results
+        self.tail_latency = tail_latency
+        self.tail_rate = tail_rate
+        self.calls = 0
+
+    def _delay(self) -> float:
+        return self.latency + (self.tail_latency if random.random() < self.tail_rate else 0.0)
+
+    def _results(self, query: str) -> dict:
+        self.calls += 1
+        digest = hashlib.sha1(query.encode()).hexdigest()[:8]
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"{query[:40]} — guide {i + 1}",
+                    "url": f"https://site{i}.example.com/{digest}/{i}",
+                    "content": f"How teams apply {query} in practice. " * 10,
+                    "score": round(1 - i / 10, 2),
+                }
+                for i in range(self.max_results)
+            ],
+        }
+
+    def invoke(self, input, config=None, **kwargs):
+        time.sleep(self._delay())
+        return self._results(input["query"] if isinstance(input, dict) else input)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        await asyncio.sleep(self._delay())
+        return self._results(input["query"] if isinstance(input, dict) else input)
@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from backend_config import Backend_config
 from routes.auth import router as auth_router
 from routes.agent import router as agent_router
+from services.email_dispatcher import email_dispatcher
+from agent_src.metrics import render_metrics
+from agent_src.clients import aclose_clients
 import logging
 import uvicorn
 
@@ -38,11 +41,30 @@ app.include_router(auth_router)
 app.include_router(agent_router)
 
 
+@app.on_event("shutdown")
+async def flush_email_queue():
+    # Deliver anything still queued and close the pooled SMTP connections
+    await email_dispatcher.stop()
+
+
+@app.on_event("shutdown")
+async def close_provider_clients():
+    # Pooled Groq / Tavily connections
+    await aclose_clients()
+
+
 @app.get("/health")
 async def health_check():
     return JSONResponse(status_code=200, content={"status": "healthy", "message": "Unified API is running"})
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Prometheus scrape endpoint: node / LLM / search latency, tokens, cache hits, fallbacks
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/")
 async def root():
     return JSONResponse(status_code=200, content={"message": "Welcome to Unified Marketing Agent API", "version": "1.0.0", "docs": "/docs"})
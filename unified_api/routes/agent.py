@@ -3,13 +3,72 @@ from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage
 from agent_src.models import ChatRequest, ChatResponse
 from agent_src.graph import app as graph_app
+from agent_src.nodes import STREAM_TAG, STRATEGIES_MARKER
+from agent_src.deadline import start_turn
+from agent_src.metrics import FALLBACKS
+from agent_src.config import TURN_BUDGET_SECONDS, TURN_HARD_STOP_GRACE
+from typing import Optional
 import uuid
+import asyncio
 import logging
 import json
 
 router = APIRouter(prefix="/api/agent", tags=["AI Agent"])
 logger = logging.getLogger("agent.routes")
 
+# Nodes whose STREAM_TAG-ged LLM output is forwarded token by token
+STREAMING_NODES = {"manager", "write_report", "guide_strategy"}
+
+
+class DeltaFilter:
+    """
+    Cuts write_report's machine-readable trailer out of the token stream.
+    Text that might be the start of the marker is held back until the next chunk decides it.
+    """
+
+    def __init__(self, marker: str = STRATEGIES_MARKER):
+        self.marker = marker
+        self.pending = ""
+        self.stopped = False
+
+    def feed(self, text: str) -> str:
+        if self.stopped:
+            return ""
+        self.pending += text
+
+        idx = self.pending.find(self.marker)
+        if idx != -1:
+            self.stopped = True
+            out, self.pending = self.pending[:idx], ""
+            return out
+
+        keep = 0
+        for k in range(min(len(self.marker) - 1, len(self.pending)), 0, -1):
+            if self.marker.startswith(self.pending[-k:]):
+                keep = k
+                break
+        out = self.pending[:len(self.pending) - keep]
+        self.pending = self.pending[len(self.pending) - keep:]
+        return out
+
+
+async def until(stream, deadline: Optional[float]):
+    """
+    Items of `stream` until loop time `deadline`, then TimeoutError. Only the wait for the next
+    item is timed — never the caller's handling of one (that's where the response is written).
+    """
+    try:
+        while True:
+            try:
+                async with asyncio.timeout_at(deadline):
+                    item = await anext(stream)
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        await stream.aclose()
+
+
 @router.post("/chat")
 async def chat_endpoint(request: ChatRequest):
     """
@@ -18,15 +77,21 @@ async def chat_endpoint(request: ChatRequest):
     session_id = request.session_id or str(uuid.uuid4())
     logger.info(f"Starting chat session: {session_id}")
 
-    config = {"configurable": {"thread_id": session_id}}
+    # Nodes size their calls to what's left of the turn's budget (see agent_src/deadline.py)
+    config = start_turn({"configurable": {"thread_id": session_id}})
+    # ...and if they still overrun, the stream is cut
+    hard_stop = asyncio.get_running_loop().time() + TURN_BUDGET_SECONDS + TURN_HARD_STOP_GRACE \
+        if TURN_BUDGET_SECONDS > 0 else None
     
     # Create a generator to stream the response
     async def event_generator():
         try:
             inputs = {"messages": [HumanMessage(content=request.message)]}
+            delta_filters = {}   # message_id -> DeltaFilter
+            streamed_ids = {}    # node -> message_id of its streamed text
             
-            # Stream events for granular progress
-            async for event in graph_app.astream_events(inputs, config, version="v1"):
+            # Stream events for granular progress (v2: v1 rebuilds every run's input/output on the loop)
+            async for event in until(graph_app.astream_events(inputs, config, version="v2"), hard_stop):
                 kind = event["event"]
                 
                 # Log tool calls (Search)
@@ -52,6 +117,22 @@ async def chat_endpoint(request: ChatRequest):
                             "content": step
                         }) + "\n"
 
+                # Stream tokens of user-facing generations as they arrive
+                elif kind == "on_chat_model_stream":
+                    node_name = event.get("metadata", {}).get("langgraph_node")
+                    if node_name in STREAMING_NODES and STREAM_TAG in event.get("tags", []):
+                        message_id = str(event["run_id"])
+                        text = delta_filters.setdefault(message_id, DeltaFilter()).feed(event["data"]["chunk"].content)
+                        if text:
+                            streamed_ids[node_name] = message_id
+                            yield json.dumps({
+                                "session_id": str(session_id),
+                                "type": "delta",
+                                "node": node_name,
+                                "message_id": message_id,
+                                "content": text
+                            }) + "\n"
+
                 # Log node output (Chat response)
                 elif kind == "on_chain_end":
                     # We look for the final node output
@@ -63,12 +144,24 @@ async def chat_endpoint(request: ChatRequest):
                         
                         # Only yield if it's a significant node
                         if node_name in ["manager", "gather_product", "process_more_info", "perform_deep_research", "write_report", "select_strategy", "guide_strategy", "check_satisfaction"]:
-                            yield json.dumps({
+                            final = {
                                 "session_id": str(session_id),
                                 "response": content,
                                 "node": node_name
-                            }) + "\n"
+                            }
+                            # Lets the client swap its streamed draft for the final text
+                            if node_name in streamed_ids:
+                                final["message_id"] = streamed_ids.pop(node_name)
+                            yield json.dumps(final) + "\n"
                         
+        except TimeoutError:
+            logger.error(f"Chat session {session_id} overran its {TURN_BUDGET_SECONDS}s turn budget — stream cut")
+            FALLBACKS.labels(node="chat", reason="hard_stop").inc()
+            yield json.dumps({
+                "session_id": str(session_id),
+                "response": "Sorry, this is taking longer than it should. Send your message again and I'll pick it up from here!",
+                "error": "deadline exceeded"
+            }) + "\n"
         except Exception as e:
             logger.error(f"Error in chat session {session_id}: {e}", exc_info=True)
             yield json.dumps({
@@ -4,7 +4,7 @@ from schemas import (
     ResetPasswordRequest, SignupResponse, LoginResponse,
     MessageResponse
 )
-from services.auth_service import AuthService
+from services.auth_service import AuthService, SERVER_BUSY
 from services.email_service import EmailService
 from backend_config import Backend_config
 import logging
@@ -28,6 +28,8 @@ async def signup(request: SignupRequest, background_tasks: BackgroundTasks):
         # map internal messages to proper HTTP status if needed
         if message == "User with this email already exists":
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
+        if message == SERVER_BUSY:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=message)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
 
     # Send welcome email in background (best-effort)
@@ -41,16 +43,19 @@ async def signup(request: SignupRequest, background_tasks: BackgroundTasks):
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, background_tasks: BackgroundTasks):
     success, message, user_data, token = await auth_service.login(
         email=request.email,
-        password=request.password
+        password=request.password,
+        background_tasks=background_tasks
     )
     if not success:
         if message == "User account is inactive":
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=message)
         if message == "Invalid email or password":
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=message)
+        if message == SERVER_BUSY:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=message)
         # generic
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
 
@@ -83,5 +88,7 @@ async def reset_password(request: ResetPasswordRequest):
         confirm_password=request.confirm_password
     )
     if not success:
+        if message == SERVER_BUSY:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=message)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
     return MessageResponse(success=True, message=message)
@@ -1,9 +1,10 @@
-from supabase import create_client, Client
 from typing import Optional, Tuple, Dict
+from fastapi import BackgroundTasks
 from backend_config import Backend_config
-from utils.password import PasswordHandler
+from utils.password import PasswordHandler, PasswordPoolBusy
 from utils.validators import PasswordValidator, EmailValidator
 from utils.token import TokenHandler
+from services.user_repository import UserRepository, build_user_repository
 import uuid
 from datetime import datetime, timezone, timedelta
 import logging
@@ -11,13 +12,12 @@ import logging
 settings = Backend_config()
 logger = logging.getLogger("auth.service")
 
+SERVER_BUSY = "Server is busy, please try again"
+
 
 class AuthService:
-    def __init__(self):
-        # regular client (anon) for public-safe reads
-        self.supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-        # admin client (service_role) for privileged operations (insert/update sensitive rows)
-        self.supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+    def __init__(self, repository: Optional[UserRepository] = None):
+        self.repository = repository or build_user_repository()
 
     async def signup(self, email: str, password: str, full_name: Optional[str] = None) -> Tuple[bool, str, Optional[Dict]]:
         if not email or not password:
@@ -31,15 +31,16 @@ class AuthService:
             return False, validation_message, None
 
         try:
-            # check existence using anon client is fine
-            response = self.supabase.table("users").select("id").eq("email", email).execute()
-            if response.data:
+            if await self.repository.get_user_by_email(email, columns="id"):
                 return False, "User with this email already exists", None
         except Exception:
             logger.exception("Database error while checking existing user during signup")
             return False, "Internal server error", None
 
-        password_hash = PasswordHandler.hash_password(password)
+        try:
+            password_hash = await PasswordHandler.hash_password_async(password)
+        except PasswordPoolBusy:
+            return False, SERVER_BUSY, None
         now = datetime.now(timezone.utc).isoformat()
 
         user_data = {
@@ -53,14 +54,12 @@ class AuthService:
         }
 
         try:
-            # insert with admin client to avoid RLS issues
-            response = self.supabase_admin.table("users").insert(user_data).execute()
+            saved = await self.repository.create_user(user_data)
             # ensure response success
-            if not getattr(response, "data", None):
+            if not saved:
                 logger.error("Empty response.data from supabase insert during signup")
                 return False, "Failed to register user", None
 
-            saved = response.data[0]
             user_response = {
                 "id": saved["id"],
                 "email": saved["email"],
@@ -74,7 +73,7 @@ class AuthService:
             logger.exception("Failed to register user")
             return False, "Failed to register user", None
 
-    async def login(self, email: str, password: str) -> Tuple[bool, str, Optional[Dict], Optional[str]]:
+    async def login(self, email: str, password: str, background_tasks: Optional[BackgroundTasks] = None) -> Tuple[bool, str, Optional[Dict], Optional[str]]:
         if not email or not password:
             return False, "Invalid email or password", None, None
 
@@ -82,12 +81,10 @@ class AuthService:
             return False, "Invalid email or password", None, None
 
         try:
-            response = self.supabase.table("users").select("*").eq("email", email).execute()
-            if not response.data:
+            user = await self.repository.get_user_by_email(email)
+            if not user:
                 # generic message to avoid enumeration
                 return False, "Invalid email or password", None, None
-
-            user = response.data[0]
         except Exception:
             logger.exception("Database error during login")
             return False, "Internal server error", None, None
@@ -95,10 +92,18 @@ class AuthService:
         if not user.get("is_active", True):
             return False, "User account is inactive", None, None
 
-        if not PasswordHandler.verify_password(password, user["password_hash"]):
+        try:
+            password_ok = await PasswordHandler.verify_password_async(password, user["password_hash"])
+        except PasswordPoolBusy:
+            return False, SERVER_BUSY, None, None
+        if not password_ok:
             # generic message
             return False, "Invalid email or password", None, None
 
+        # Hashes created at reduced cost during a burst are upgraded after the response is sent
+        if background_tasks is not None and PasswordHandler.needs_rehash(user["password_hash"]):
+            background_tasks.add_task(self.upgrade_password_hash, user["id"], password)
+
         token = TokenHandler.create_access_token({"sub": user["id"]})
         user_response = {
             "id": user["id"],
@@ -109,6 +114,18 @@ class AuthService:
         }
         return True, "Login successful", user_response, token
 
+    async def upgrade_password_hash(self, user_id: str, password: str) -> None:
+        """Re-hash at full cost and store it — skipped while hashing is under load (the next login retries)."""
+        if PasswordHandler.under_load():
+            return
+        try:
+            upgraded = await PasswordHandler.hash_password_async(password)
+            await self.repository.update_user(user_id, {"password_hash": upgraded})
+        except PasswordPoolBusy:
+            pass
+        except Exception:
+            logger.exception("Failed to upgrade password hash")
+
     async def request_password_reset(self, email: str) -> Tuple[bool, str, Optional[str]]:
         if not email:
             return False, "Invalid email format", None
@@ -118,11 +135,11 @@ class AuthService:
             return True, "If user exists, password reset link will be sent", None
 
         try:
-            response = self.supabase.table("users").select("id").eq("email", email).execute()
-            if not response.data:
+            user = await self.repository.get_user_by_email(email, columns="id")
+            if not user:
                 # keep behavior: don't reveal existence
                 return True, "If user exists, password reset link will be sent", None
-            user_id = response.data[0]["id"]
+            user_id = user["id"]
         except Exception:
             logger.exception("Database error while requesting password reset")
             return False, "Internal server error", None
@@ -142,8 +159,7 @@ class AuthService:
         }
 
         try:
-            # use admin client to insert reset token
-            self.supabase_admin.table("password_resets").insert(token_data).execute()
+            await self.repository.create_password_reset(token_data)
             return True, "Password reset link sent to email", reset_token
         except Exception:
             logger.exception("Failed to store reset token")
@@ -165,10 +181,9 @@ class AuthService:
             return False, "Invalid or expired reset token"
 
         try:
-            resp = self.supabase.table("password_resets").select("*").eq("token", token).execute()
-            if not resp.data:
+            reset_row = await self.repository.get_password_reset(token)
+            if not reset_row:
                 return False, "Invalid reset token"
-            reset_row = resp.data[0]
         except Exception:
             logger.exception("DB error verifying reset token")
             return False, "Internal server error"
@@ -187,18 +202,19 @@ class AuthService:
             logger.exception("Malformed expires_at in DB for reset token")
             return False, "Invalid reset token"
 
-        # Everything ok -> update user password using admin client
-        hashed = PasswordHandler.hash_password(new_password)
+        # Everything ok -> update user password
+        try:
+            hashed = await PasswordHandler.hash_password_async(new_password)
+        except PasswordPoolBusy:
+            return False, SERVER_BUSY
         try:
-            self.supabase_admin.table("users").update({
+            await self.repository.update_user(user_id_from_token, {
                 "password_hash": hashed,
                 "updated_at": datetime.now(timezone.utc).isoformat()
-            }).eq("id", user_id_from_token).execute()
+            })
 
             # mark reset token used
-            self.supabase_admin.table("password_resets").update({
-                "used": True
-            }).eq("token", token).execute()
+            await self.repository.mark_password_reset_used(token)
 
             return True, "Password reset successfully"
         except Exception:
@@ -0,0 +1,205 @@
+import asyncio
+import aiosmtplib
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional
+from backend_config import Backend_config
+import logging
+
+settings = Backend_config()
+logger = logging.getLogger("auth.email.dispatcher")
+
+
+@dataclass
+class EmailJob:
+    sender: str
+    recipients: List[str]
+    message: str
+    attempts: int = 0
+
+
+class SMTPTransport:
+    """One long-lived, authenticated SMTP connection, reopened when it drops."""
+
+    def __init__(self, hostname: str, port: int, username: str, password: str, timeout: float):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if self._smtp is None or not self._smtp.is_connected:
+            smtp = aiosmtplib.SMTP(hostname=self.hostname, port=self.port, timeout=self.timeout)
+            await smtp.connect()
+            await smtp.login(self.username, self.password)
+            self._smtp = smtp
+        return self._smtp
+
+    async def send(self, job: EmailJob) -> None:
+        smtp = await self._connect()
+        await smtp.sendmail(job.sender, job.recipients, job.message)
+
+    async def close(self) -> None:
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+        self._smtp = None
+
+
+class DebugTransport:
+    """Local stand-in: keeps the newest messages in memory (shared outbox) and logs them instead of sending."""
+
+    outbox: Deque[EmailJob] = deque(maxlen=settings.EMAIL_DEBUG_OUTBOX)
+
+    async def send(self, job: EmailJob) -> None:
+        DebugTransport.outbox.append(job)
+        logger.info(f"[debug email] {job.sender} -> {', '.join(job.recipients)} ({len(job.message)} bytes)")
+
+    async def close(self) -> None:
+        pass
+
+
+class EmailDispatcher:
+    """
+    Async queue drained by a few workers, each holding its own SMTP connection.
+    Workers send whatever is queued (up to `batch_size`) over the open connection,
+    retry failures with exponential backoff and close the connection when idle.
+    On stop, retries still backing off are sent right away rather than dropped.
+    """
+
+    def __init__(
+        self,
+        transport_factory,
+        workers: int = 2,
+        batch_size: int = 20,
+        max_retries: int = 3,
+        retry_backoff: float = 2.0,
+        queue_size: int = 1000,
+        idle_timeout: float = 60.0,
+        drain_timeout: float = 20.0,
+    ):
+        self.transport_factory = transport_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self.drain_timeout = drain_timeout
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retries = set()
+        self._flushing: Optional[asyncio.Event] = None
+        self.sent = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._flushing = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def _drain(self) -> None:
+        # Retries re-enqueue their job before finishing, so loop until neither is left
+        while True:
+            await self._queue.join()
+            if not self._retries:
+                return
+            await asyncio.gather(*self._retries, return_exceptions=True)
+
+    async def stop(self) -> None:
+        """Send what's queued or waiting to be retried (for up to drain_timeout), then close every connection."""
+        if not self._tasks:
+            return
+        self._flushing.set()  # pending retries skip the rest of their backoff
+        try:
+            await asyncio.wait_for(self._drain(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            left = self._queue.qsize() + len(self._retries)
+            logger.error(f"Email drain timed out after {self.drain_timeout}s, dropping {left} queued or retrying message(s)")
+            self.failed += left
+        for task in [*self._tasks, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, job: EmailJob) -> bool:
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except asyncio.QueueFull:
+            logger.error(f"Email queue full, dropping mail to {', '.join(job.recipients)}")
+            self.failed += 1
+            return False
+
+    async def _retry_later(self, job: EmailJob) -> None:
+        try:
+            await asyncio.wait_for(self._flushing.wait(), self.retry_backoff * (2 ** (job.attempts - 1)))
+        except asyncio.TimeoutError:
+            pass
+        self.enqueue(job)
+
+    async def _worker(self, worker_id: int) -> None:
+        transport = self.transport_factory()
+        try:
+            while True:
+                try:
+                    job = await asyncio.wait_for(self._queue.get(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await transport.close()
+                    continue
+
+                batch = [job]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                for job in batch:
+                    try:
+                        await transport.send(job)
+                        self.sent += 1
+                    except Exception as e:
+                        job.attempts += 1
+                        # Connection state is unknown after an error — start clean next time
+                        await transport.close()
+                        if job.attempts <= self.max_retries:
+                            logger.warning(f"Email to {', '.join(job.recipients)} failed (attempt {job.attempts}): {e}")
+                            task = asyncio.create_task(self._retry_later(job))
+                            self._retries.add(task)
+                            task.add_done_callback(self._retries.discard)
+                        else:
+                            logger.error(f"Giving up on email to {', '.join(job.recipients)}: {e}")
+                            self.failed += 1
+                    finally:
+                        self._queue.task_done()
+        finally:
+            await transport.close()
+
+
+def build_transport():
+    if settings.EMAIL_BACKEND == "debug":
+        return DebugTransport()
+    return SMTPTransport(
+        hostname=settings.SMTP_SERVER,
+        port=int(settings.SMTP_PORT) if settings.SMTP_PORT else None,
+        username=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        timeout=settings.SMTP_TIMEOUT,
+    )
+
+
+email_dispatcher = EmailDispatcher(
+    build_transport,
+    workers=settings.EMAIL_WORKERS,
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    retry_backoff=settings.EMAIL_RETRY_BACKOFF,
+    queue_size=settings.EMAIL_QUEUE_SIZE,
+    idle_timeout=settings.EMAIL_IDLE_TIMEOUT,
+    drain_timeout=settings.EMAIL_DRAIN_TIMEOUT,
+)
@@ -1,7 +1,7 @@
-import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from backend_config import Backend_config
+from services.email_dispatcher import EmailJob, email_dispatcher
 from typing import Tuple, Optional
 from datetime import datetime
 import logging
@@ -43,11 +43,10 @@ class EmailService:
             message["To"] = recipient_email
             message.attach(MIMEText(html_body, "html"))
 
-            async with aiosmtplib.SMTP(hostname=settings.SMTP_SERVER, port=settings.SMTP_PORT) as smtp:
-                await smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                await smtp.sendmail(settings.SENDER_EMAIL, [recipient_email], message.as_string())
+            if not email_dispatcher.enqueue(EmailJob(settings.SENDER_EMAIL, [recipient_email], message.as_string())):
+                return False, "Failed to send email"
 
-            return True, "Email sent successfully"
+            return True, "Email queued for delivery"
 
         except Exception as e:
             logger.exception("Failed to send password reset email")
@@ -80,11 +79,10 @@ class EmailService:
             message["To"] = recipient_email
             message.attach(MIMEText(html_body, "html"))
 
-            async with aiosmtplib.SMTP(hostname=settings.SMTP_SERVER, port=settings.SMTP_PORT) as smtp:
-                await smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                await smtp.sendmail(settings.SENDER_EMAIL, [recipient_email], message.as_string())
+            if not email_dispatcher.enqueue(EmailJob(settings.SENDER_EMAIL, [recipient_email], message.as_string())):
+                return False, "Failed to send email"
 
-            return True, "Welcome email sent successfully"
+            return True, "Welcome email queued for delivery"
 
         except Exception:
             logger.exception("Failed to send welcome email")
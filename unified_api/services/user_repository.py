@@ -0,0 +1,157 @@
+import asyncio
+import copy
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, List
+import httpx
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+from backend_config import Backend_config
+import logging
+
+settings = Backend_config()
+logger = logging.getLogger("auth.repository")
+
+
+class UserRepository(ABC):
+    """Async data access for AuthService (users + password_resets tables)."""
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str, columns: str = "*") -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def create_user(self, user_data: Dict) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def update_user(self, user_id: str, fields: Dict) -> None:
+        ...
+
+    @abstractmethod
+    async def create_password_reset(self, token_data: Dict) -> None:
+        ...
+
+    @abstractmethod
+    async def get_password_reset(self, token: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def mark_password_reset_used(self, token: str) -> None:
+        ...
+
+
+class SupabaseUserRepository(UserRepository):
+    """
+    Async Supabase clients sharing one pooled HTTP client, created on first use.
+    Every call is bounded by SUPABASE_TIMEOUT.
+    """
+
+    def __init__(self, url: str, anon_key: str, service_role_key: str, timeout: float, max_connections: int):
+        self.url = url
+        self.anon_key = anon_key
+        self.service_role_key = service_role_key
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[AsyncClient] = None
+        self._admin: Optional[AsyncClient] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _clients(self):
+        if self._client is None:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._client is None:
+                    # Headers (api key / auth) are sent per request, so both clients can share the pool
+                    http = httpx.AsyncClient(
+                        timeout=httpx.Timeout(self.timeout),
+                        limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                    )
+                    # regular client (anon) for public-safe reads
+                    client = await acreate_client(self.url, self.anon_key, AsyncClientOptions(httpx_client=http))
+                    # admin client (service_role) for privileged operations (insert/update sensitive rows)
+                    self._admin = await acreate_client(self.url, self.service_role_key, AsyncClientOptions(httpx_client=http))
+                    self._client = client
+        return self._client, self._admin
+
+    async def _execute(self, query):
+        return await asyncio.wait_for(query.execute(), timeout=self.timeout)
+
+    async def get_user_by_email(self, email: str, columns: str = "*") -> Optional[Dict]:
+        client, _ = await self._clients()
+        response = await self._execute(client.table("users").select(columns).eq("email", email))
+        return response.data[0] if response.data else None
+
+    async def create_user(self, user_data: Dict) -> Optional[Dict]:
+        # insert with admin client to avoid RLS issues
+        _, admin = await self._clients()
+        response = await self._execute(admin.table("users").insert(user_data))
+        return response.data[0] if getattr(response, "data", None) else None
+
+    async def update_user(self, user_id: str, fields: Dict) -> None:
+        _, admin = await self._clients()
+        await self._execute(admin.table("users").update(fields).eq("id", user_id))
+
+    async def create_password_reset(self, token_data: Dict) -> None:
+        _, admin = await self._clients()
+        await self._execute(admin.table("password_resets").insert(token_data))
+
+    async def get_password_reset(self, token: str) -> Optional[Dict]:
+        client, _ = await self._clients()
+        response = await self._execute(client.table("password_resets").select("*").eq("token", token))
+        return response.data[0] if response.data else None
+
+    async def mark_password_reset_used(self, token: str) -> None:
+        _, admin = await self._clients()
+        await self._execute(admin.table("password_resets").update({"used": True}).eq("token", token))
+
+
+class InMemoryUserRepository(UserRepository):
+    """Process-local stand-in with the same behaviour, for tests and benchmarks."""
+
+    def __init__(self):
+        self.users: List[Dict] = []
+        self.password_resets: List[Dict] = []
+
+    async def get_user_by_email(self, email: str, columns: str = "*") -> Optional[Dict]:
+        for user in self.users:
+            if user["email"] == email:
+                if columns == "*":
+                    return copy.deepcopy(user)
+                return {c.strip(): user.get(c.strip()) for c in columns.split(",")}
+        return None
+
+    async def create_user(self, user_data: Dict) -> Optional[Dict]:
+        self.users.append(copy.deepcopy(user_data))
+        return copy.deepcopy(user_data)
+
+    async def update_user(self, user_id: str, fields: Dict) -> None:
+        for user in self.users:
+            if user["id"] == user_id:
+                user.update(fields)
+
+    async def create_password_reset(self, token_data: Dict) -> None:
+        self.password_resets.append(copy.deepcopy(token_data))
+
+    async def get_password_reset(self, token: str) -> Optional[Dict]:
+        for row in self.password_resets:
+            if row["token"] == token:
+                return copy.deepcopy(row)
+        return None
+
+    async def mark_password_reset_used(self, token: str) -> None:
+        for row in self.password_resets:
+            if row["token"] == token:
+                row["used"] = True
+
+
+def build_user_repository() -> UserRepository:
+    if settings.AUTH_DB_BACKEND == "memory":
+        logger.warning("AUTH_DB_BACKEND=memory — users are kept in process memory only")
+        return InMemoryUserRepository()
+    return SupabaseUserRepository(
+        url=settings.SUPABASE_URL,
+        anon_key=settings.SUPABASE_KEY,
+        service_role_key=settings.SUPABASE_SERVICE_ROLE_KEY,
+        timeout=settings.SUPABASE_TIMEOUT,
+        max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+    )
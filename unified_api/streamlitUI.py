@@ -14,6 +14,8 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 
+from agent_src.clients import sync_client, provider_timeout
+
 # --- Setup and Configuration ---
 
 load_dotenv()
@@ -22,7 +24,10 @@ load_dotenv()
 os.environ["GROQ_API_KEY"] = os.getenv('GROQ_API_KEY')
 
 # Initialize LLM
-llm = ChatGroq(model="llama-3.1-8b-instant", temperature=0.7)
+llm = ChatGroq(
+    model="llama-3.1-8b-instant", temperature=0.7,
+    http_client=sync_client("groq"), timeout=provider_timeout("groq"),
+)
 
 # Initialize web search tool
 web_search_wrapper = DuckDuckGoSearchAPIWrapper()
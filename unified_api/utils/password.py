@@ -1,12 +1,38 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
+from backend_config import Backend_config
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+settings = Backend_config()
+
+# min_rounds makes needs_update() flag hashes created at reduced cost during a burst
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+class PasswordPoolBusy(Exception):
+    """Too many hash/verify jobs are already waiting for a worker."""
 
 
 class PasswordHandler:
+    # bcrypt releases the GIL, so a thread pool gives real parallelism without pickling overhead
+    _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    _pending = 0
+    _recent = deque()  # monotonic timestamps of recent hash/verify requests
+    _RATE_WINDOW = 10.0
+
     @staticmethod
-    def hash_password(password: str) -> str:
-        return pwd_context.hash(password)
+    def hash_password(password: str, rounds: int = None) -> str:
+        if rounds is None:
+            return pwd_context.hash(password)
+        return bcrypt.using(rounds=rounds).hash(password)
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -15,3 +41,48 @@ class PasswordHandler:
         except Exception:
             # In case of corrupted hash or other issues
             return False
+
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        try:
+            return pwd_context.needs_update(hashed_password)
+        except Exception:
+            return False
+
+    # ── async API (runs bcrypt off the event loop) ───────────
+    @classmethod
+    def auth_rate(cls) -> float:
+        """Hash/verify requests per second over the last few seconds."""
+        cutoff = time.monotonic() - cls._RATE_WINDOW
+        while cls._recent and cls._recent[0] < cutoff:
+            cls._recent.popleft()
+        return len(cls._recent) / cls._RATE_WINDOW
+
+    @classmethod
+    def under_load(cls) -> bool:
+        return cls.auth_rate() > settings.PASSWORD_HASH_BURST_RATE
+
+    @classmethod
+    def current_rounds(cls) -> int:
+        """Cost for new hashes: full cost normally, BCRYPT_MIN_ROUNDS during a login burst."""
+        return settings.BCRYPT_MIN_ROUNDS if cls.under_load() else settings.BCRYPT_ROUNDS
+
+    @classmethod
+    async def _run(cls, fn, *args):
+        if cls._pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise PasswordPoolBusy()
+        cls._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(cls._executor, fn, *args)
+        finally:
+            cls._pending -= 1
+
+    @classmethod
+    async def hash_password_async(cls, password: str) -> str:
+        cls._recent.append(time.monotonic())
+        return await cls._run(cls.hash_password, password, cls.current_rounds())
+
+    @classmethod
+    async def verify_password_async(cls, plain_password: str, hashed_password: str) -> bool:
+        cls._recent.append(time.monotonic())
+        return await cls._run(cls.verify_password, plain_password, hashed_password)